@@ -1,5 +1,6 @@
 import re
-from backend.utils.threat_intel import is_domain_suspicious
+from backend.utils.threat_intel import BLOCKLISTED, MALICIOUS, SUSPICIOUS, is_domain_suspicious
+from backend.utils.domain_rules import get_domain_matcher
 
 # ----------------------------
 # CONFIGURABLE WEIGHTS
@@ -57,10 +58,13 @@ def score_email(features: dict) -> dict:
 
     # VirusTotal check (optional if internet available)
     vt_status = is_domain_suspicious(domain)
-    if vt_status == "VT_Malicious":
+    if vt_status == MALICIOUS:
         score += weights["vt_malicious"]
         reasons.append("VirusTotal: Malicious")
-    elif vt_status == "VT_Suspicious":
+    elif vt_status == BLOCKLISTED:
+        score += weights["vt_malicious"]
+        reasons.append("Local blocklist")
+    elif vt_status == SUSPICIOUS:
         score += weights["vt_suspicious"]
         reasons.append("VirusTotal: Suspicious")
 
@@ -82,14 +86,5 @@ def score_email(features: dict) -> dict:
 # HEURISTIC DOMAIN CHECK
 # ----------------------------
 def is_suspicious_domain(domain: str) -> bool:
-    suspicious_keywords = ["xyz", "click", "discount", "darkweb", "tor", "onion", "proxy"]
-    free_providers = ["mail.ru", "protonmail.com", "yopmail.com", "tutanota.com"]
-    tld_blacklist = [".xyz", ".top", ".buzz", ".ru", ".onion"]
-
-    if any(domain.endswith(tld) for tld in tld_blacklist):
-        return True
-    if any(free in domain for free in free_providers):
-        return True
-    if any(kw in domain.lower() for kw in suspicious_keywords):
-        return True
-    return False
+    # Blacklisted TLDs, free providers and keywords: "email_model" ruleset
+    return get_domain_matcher("email_model").match(domain) is not None
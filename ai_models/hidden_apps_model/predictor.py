@@ -1,14 +1,13 @@
-import pickle
-import os
 import pandas as pd
 
-MODEL_PATH = "ai_models/hidden_apps_model/model.pkl"
+from ai_models.registry import get_model
 
 def load_model():
-    if not os.path.exists(MODEL_PATH):
+    # Loaded once and kept resident; reloaded only if the pickle changes
+    model = get_model("hidden_apps")
+    if model is None:
         raise FileNotFoundError("Model not found. Train it first.")
-    with open(MODEL_PATH, "rb") as f:
-        return pickle.load(f)
+    return model
 
 def predict_risk(df: pd.DataFrame):
     model = load_model()
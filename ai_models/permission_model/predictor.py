@@ -1,18 +1,16 @@
 # permissions_audit/predictor.py
 import json
 import os
-import joblib
 import logging
 import numpy as np
 import pandas as pd
 from typing import List, Dict, Tuple
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.preprocessing import LabelEncoder
-from sklearn.model_selection import train_test_split
+
+from ai_models.registry import get_model
+from backend.utils.constants import PERMISSION_MODEL_PATH as MODEL_PATH
 
 logging.basicConfig(level=logging.INFO)
 
-MODEL_PATH = "ai_models/permissions_risk_model.pkl"
 EXAMPLE_DATA_PATH = "ai_models/example_training_data.csv"
 
 # Example dangerous permissions for feature vector construction
@@ -26,22 +24,40 @@ RISK_LABELS = {0: "Low", 1: "Intermediate", 2: "High"}
 
 class PermissionRiskPredictor:
     def __init__(self):
-        self.model = None
-        self.label_encoder = LabelEncoder()
-        self._load_or_init_model()
+        # The model (and sklearn) are loaded on first use, not on construction
+        self._model = None
+        self._label_encoder = None
+
+    @property
+    def model(self):
+        if self._model is None:
+            self._load_or_init_model()
+        return self._model
+
+    @model.setter
+    def model(self, model):
+        self._model = model
+
+    @property
+    def label_encoder(self):
+        if self._label_encoder is None:
+            from sklearn.preprocessing import LabelEncoder
+            self._label_encoder = LabelEncoder()
+        return self._label_encoder
 
     def _load_or_init_model(self):
-        if os.path.exists(MODEL_PATH):
-            self.model = joblib.load(MODEL_PATH)
+        self._model = get_model("permissions")
+        if self._model is not None:
             logging.info("Loaded pre-trained model from disk.")
         else:
-            self.model = RandomForestClassifier(
+            from sklearn.ensemble import RandomForestClassifier
+            self._model = RandomForestClassifier(
             n_estimators=100,
             random_state=42,
             min_samples_leaf=1,
             max_features="sqrt"
             )
-            self.model.fit(np.zeros((1, len(DANGEROUS_PERMISSIONS) + 1)), [0])  # Dummy fit
+            self._model.fit(np.zeros((1, len(DANGEROUS_PERMISSIONS) + 1)), [0])  # Dummy fit
             logging.warning("No model found. Initialized new RandomForestClassifier.")
 
     def _extract_features(self, permissions: List[str], metadata: Dict = None) -> np.ndarray:
@@ -66,6 +82,9 @@ def predict_risk(self, permissions: List[str], metadata: Dict = None) -> Tuple[f
 
 
 def train_model(self, csv_path: str = EXAMPLE_DATA_PATH):
+        import joblib
+        from sklearn.model_selection import train_test_split
+
         if not os.path.exists(csv_path):
             raise FileNotFoundError("Training CSV not found.")
         df = pd.read_csv(csv_path)
@@ -0,0 +1,108 @@
+# ai_models/registry.py
+
+import os
+import threading
+import time
+
+from backend.utils.constants import (
+    BANDWIDTH_MODEL_PATH, DNS_MODEL_PATH, HIDDEN_APPS_MODEL_PATH, PERMISSION_MODEL_PATH
+)
+
+
+def _joblib_load(path):
+    import joblib
+    return joblib.load(path)
+
+
+def _pickle_load(path):
+    import pickle
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+class ModelRegistry:
+    """
+    Named model files loaded on first use and kept resident. Every get()
+    stats the file; a changed mtime (a retrained model) triggers a reload.
+    A file that fails to load yields None until it changes again, so a bad
+    pickle is not re-read on every call. Load times are kept per model.
+    """
+
+    def __init__(self):
+        self._specs = {}
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, path, loader=_joblib_load):
+        with self._lock:
+            self._specs[name] = (path, loader)
+            self._entries.pop(name, None)
+
+    def get(self, name):
+        """The model registered as name, or None if its file is missing or unreadable."""
+        path, loader = self._specs[name]
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        entry = self._entries.get(name)
+        if entry is not None and entry["mtime"] == mtime:
+            return entry["model"]
+
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None and entry["mtime"] == mtime:
+                return entry["model"]
+            loads = entry["loads"] if entry else 0
+            start = time.perf_counter()
+            try:
+                model, error = loader(path), None
+            except Exception as e:
+                model, error = None, str(e)
+                print(f"[!] Warning: model '{name}' could not be loaded from {path}. {e}")
+            self._entries[name] = {
+                "model": model,
+                "mtime": mtime,
+                "load_seconds": time.perf_counter() - start,
+                "loads": loads + 1,
+                "error": error,
+            }
+            return model
+
+    def invalidate(self, name=None):
+        """Drop one resident model (or all); the next get() reloads from disk."""
+        with self._lock:
+            if name is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(name, None)
+
+    def stats(self):
+        """One dict per registered model: path, whether it is resident, load count and timing."""
+        rows = []
+        for name, (path, _) in self._specs.items():
+            entry = self._entries.get(name) or {}
+            rows.append({
+                "model": name,
+                "path": path,
+                "loaded": entry.get("model") is not None,
+                "loads": entry.get("loads", 0),
+                "load_seconds": entry.get("load_seconds"),
+                "error": entry.get("error"),
+            })
+        return rows
+
+
+MODELS = ModelRegistry()
+MODELS.register("dns", DNS_MODEL_PATH)
+MODELS.register("bandwidth", BANDWIDTH_MODEL_PATH)
+MODELS.register("hidden_apps", HIDDEN_APPS_MODEL_PATH, loader=_pickle_load)
+MODELS.register("permissions", PERMISSION_MODEL_PATH)
+
+
+def get_model(name):
+    return MODELS.get(name)
+
+
+def model_load_stats():
+    return MODELS.stats()
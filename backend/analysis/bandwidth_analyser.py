@@ -2,14 +2,50 @@
 
 import os
 import subprocess
+import numpy as np
 import pandas as pd
-import hashlib
-from datetime import datetime
-from scapy.all import rdpcap, TCP, IP
-import joblib
-from collections import defaultdict
+from datetime import datetime, timezone
+import socket
+from scapy.all import PcapReader, TCP, UDP, IP, IPv6
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from ai_models.registry import get_model
+from backend.utils.pcap_reader import (
+    IPPROTO_TCP, IPPROTO_UDP, PcapFormatError, build_shard_index, can_decode, decode_ip,
+    is_pcapng, iter_pcap_records, iter_pcapng_packets, open_decompressed, read_pcap_header
+)
+from backend.utils.network import LocalNetworkClassifier, ip_to_str
+from backend.utils.streaming_stats import EWMA, P2Quantile
+from backend.utils.file_hash import calculate_hashes, drain, open_hashed
+from backend.utils.dns_wire import DNS_PORT
+from backend.analysis.bandwidth_cache import (
+    cache_path, load_aggregates, lookup_hashes, remember_hashes, save_aggregates
+)
+from backend.analysis.dns_pcap import DnsNameCollector
 OUTPUT_DIR = "forensics_output/bandwidth"
-MODEL_PATH = "ai_models/bandwidth_anomaly_model.pkl"
+REPORT_DIR = "reports/bandwidth"
+# Captures smaller than this are parsed on one core; pool start-up would dominate
+SHARD_MIN_BYTES = 64 * 1024 * 1024
+SHARD_BYTES = 32 * 1024 * 1024
+# Bump whenever aggregation changes so stale capture caches are not reused
+PARSER_VERSION = 2
+
+# Bucket sizes offered for the upload series; everything is derived from 1s buckets
+BUCKET_SIZES = {"1s": 1, "10s": 10, "1m": 60, "5m": 300, "1h": 3600}
+
+PROTOCOL_NAMES = {IPPROTO_TCP: "TCP", IPPROTO_UDP: "UDP"}
+FLOW_COLUMNS = [
+    "Source", "Destination", "Source_Port", "Destination_Port", "Protocol",
+    "Bytes_Up", "Bytes_Down", "Packets_Up", "Packets_Down", "First_Seen", "Last_Seen",
+]
+DESTINATION_COLUMNS = [
+    "Destination", "Upload_Bytes", "Upload_MB", "Download_Bytes", "Packets_Up",
+    "Packets_Down", "Flows", "First_Seen", "Last_Seen",
+]
+BURST_COLUMNS = [
+    "Timestamp", "Bucket", "Series", "Upload_Bytes", "Baseline_Bytes", "Threshold_Bytes", "Z_Score",
+]
+TOTAL_SERIES = "All"
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
 def pull_pcap_from_device():
@@ -18,50 +54,572 @@ def pull_pcap_from_device():
     subprocess.run(["adb", "pull", adb_path, local_path], check=True)
     return local_path
 
-def extract_upload_data(pcap_path):
-    packets = rdpcap(pcap_path)
+def analyze_capture(pcap_path, workers=None, device_ips=(), use_cache=True, burst_detector=None):
+    """
+    Single pass over the capture returning (upload_df, flow_df): per-second
+    upload totals (the base buckets for resample_upload) plus the per-flow
+    table. Chain-of-custody digests of the capture (EVIDENCE_HASH_ALGORITHMS),
+    computed from the same reads, are kept in upload_df.attrs["hashes"] and
+    the SHA256 also in upload_df.attrs["sha256"]. The DNS answers seen on
+    the way are in upload_df.attrs["dns_names"] (as dns_name_map returns).
+
+    workers=None uses every core for captures larger than SHARD_MIN_BYTES;
+    workers=1 forces a single pass. device_ips are treated as local on top of
+    the private ranges and the addresses learned from the capture itself.
+    With use_cache, parsed aggregates are reused for an already-seen capture
+    (same SHA256 and PARSER_VERSION) without decoding any packets; the
+    capture is still re-hashed, so the digests are always of its content.
+
+    A burst_detector (OnlineBurstDetector) is fed every packet in capture
+    order during the same pass; that forces a single-core parse and skips
+    the cache lookup, since it needs the packets themselves.
+    """
+    aggregates, hashes = _load_or_parse(pcap_path, workers, use_cache, burst_detector)
+    upload_df, flow_df = _finalize(aggregates, LocalNetworkClassifier(device_ips=device_ips))
+    upload_df.attrs["hashes"] = hashes
+    upload_df.attrs["sha256"] = hashes["sha256"]
+    upload_df.attrs["dns_names"] = aggregates["dns_names"]
+    return upload_df, flow_df
+
+
+def _load_or_parse(pcap_path, workers, use_cache, burst_detector=None):
+    observe = None
+    if burst_detector is not None:
+        observe = burst_detector.observe_packet
+        workers = 1
+    elif use_cache:
+        known = lookup_hashes(pcap_path)
+        aggregates = load_aggregates(known["sha256"], PARSER_VERSION) if known else None
+        if aggregates is not None:
+            # The index only matches path, size and mtime: re-hash, so the
+            # digests reported (and the cache key) are those of the file as it is now
+            hashes = calculate_hashes(pcap_path)
+            if hashes["sha256"] != known["sha256"]:
+                aggregates = load_aggregates(hashes["sha256"], PARSER_VERSION)
+            if aggregates is not None:
+                remember_hashes(pcap_path, hashes)
+                return aggregates, hashes
+
+    if workers is None:
+        workers = (os.cpu_count() or 1) if os.path.getsize(pcap_path) >= SHARD_MIN_BYTES else 1
+    try:
+        if workers > 1:
+            aggregates, hashes = _aggregate_sharded(pcap_path, workers)
+        else:
+            aggregates, hashes = _aggregate_raw_pcap(pcap_path, observe)
+    except PcapFormatError:
+        if burst_detector is not None:
+            burst_detector.reset()  # the fast path may have stopped part-way
+        aggregates, hashes = _aggregate_scapy(pcap_path, observe)
+    if burst_detector is not None:
+        burst_detector.flush()
+
+    if use_cache:
+        if not os.path.exists(cache_path(hashes["sha256"], PARSER_VERSION)):
+            save_aggregates(hashes["sha256"], PARSER_VERSION, aggregates)
+        remember_hashes(pcap_path, hashes)
+    return aggregates, hashes
+
+
+def extract_upload_data(pcap_path, workers=None, bucket="1m", use_cache=True):
+    return resample_upload(analyze_capture(pcap_path, workers, use_cache=use_cache)[0], bucket)
+
+
+def _new_aggregates():
+    return {"upload": defaultdict(int), "flows": {}, "dns_names": {}}
+
+
+def _add_packet(aggregates, ts_sec, ts, length, decoded):
+    """
+    Fold one decoded packet into the raw aggregates: TCP bytes per
+    (epoch second, source address) and TCP/UDP flows keyed by the on-the-wire
+    (src, dst, sport, dport, proto). Which side is local is decided once per
+    address in _finalize, so nothing is classified per packet and shards
+    merge exactly.
+    """
+    version, proto, src, dst, sport, dport = decoded
+    if proto != IPPROTO_TCP and proto != IPPROTO_UDP:
+        return
+
+    if proto == IPPROTO_TCP:
+        aggregates["upload"][ts_sec, src] += length
+
+    flows = aggregates["flows"]
+    key = (src, dst, sport, dport, proto)
+    flow = flows.get(key)
+    if flow is None:
+        # [bytes, packets, first_seen, last_seen]
+        flows[key] = [length, 1, ts, ts]
+        return
+    flow[0] += length
+    flow[1] += 1
+    if ts < flow[2]:
+        flow[2] = ts
+    elif ts > flow[3]:
+        flow[3] = ts
+
+
+def _finalize(aggregates, classifier):
+    """
+    Resolve direction with the local-network classifier and build the
+    per-second upload frame and the device-oriented flow frame.
+    """
+    classifier.learn_device_ips(aggregates["flows"])
+    is_local = classifier.is_local
+
     upload_data = defaultdict(int)
+    for (ts_sec, src), upload_bytes in aggregates["upload"].items():
+        if is_local(src):
+            upload_data[ts_sec] += upload_bytes
+
+    # Fold both wire directions into one entry keyed from the device's side:
+    # [bytes_up, bytes_down, packets_up, packets_down, first_seen, last_seen]
+    flows = {}
+    for (src, dst, sport, dport, proto), (nbytes, packets, first, last) in aggregates["flows"].items():
+        if is_local(src):
+            key, offset = (src, dst, sport, dport, proto), 0
+        elif is_local(dst):
+            key, offset = (dst, src, dport, sport, proto), 1
+        else:
+            continue
+        flow = flows.get(key)
+        if flow is None:
+            flow = flows[key] = [0, 0, 0, 0, first, last]
+        flow[offset] += nbytes
+        flow[2 + offset] += packets
+        flow[4] = min(flow[4], first)
+        flow[5] = max(flow[5], last)
+
+    return _upload_frame(upload_data), _flow_frame(flows)
+
+
+def _read_raw_header(f):
+    byte_order, ts_divisor, linktype = read_pcap_header(f)
+    if not can_decode(linktype):
+        raise PcapFormatError(f"Unsupported link type {linktype}")
+    return byte_order, ts_divisor, linktype
+
+
+def _open_raw_pcap(pcap_path):
+    f = open(pcap_path, "rb", buffering=1024 * 1024)
+    try:
+        return (f,) + _read_raw_header(f)
+    except Exception:
+        f.close()
+        raise
+
+
+def _aggregate_records(records, linktype, ts_divisor, aggregates, observe=None):
+    dns = DnsNameCollector()
+    for ts_sec, ts_frac, data in records:
+        decoded = decode_ip(linktype, data)
+        if decoded is not None:
+            _add_packet(aggregates, ts_sec, ts_sec + ts_frac / ts_divisor, len(data), decoded)
+            if decoded[4] == DNS_PORT or decoded[5] == DNS_PORT:
+                dns.add_frame(linktype, data)
+            if observe is not None:
+                observe(ts_sec, len(data), decoded)
+    aggregates["dns_names"].update(dns.names)
+    return aggregates
+
+
+def _aggregate_packets(packets, aggregates, observe=None):
+    dns = DnsNameCollector()
+    decodable = set()
+    for linktype, ts_sec, ts, data in packets:
+        if linktype not in decodable:
+            if not can_decode(linktype):
+                raise PcapFormatError(f"Unsupported link type {linktype}")
+            decodable.add(linktype)
+        decoded = decode_ip(linktype, data)
+        if decoded is not None:
+            _add_packet(aggregates, ts_sec, ts, len(data), decoded)
+            if decoded[4] == DNS_PORT or decoded[5] == DNS_PORT:
+                dns.add_frame(linktype, data)
+            if observe is not None:
+                observe(ts_sec, len(data), decoded)
+    aggregates["dns_names"].update(dns.names)
+    return aggregates
+
+
+def _aggregate_raw_pcap(pcap_path, observe=None):
+    """
+    Fast path: read libpcap records or pcapng blocks and IP/TCP headers
+    straight from bytes, decompressing gzip/zstd captures in chunks as they
+    are read. Raises PcapFormatError for inputs it can't decode so the caller
+    can fall back to scapy. Returns (aggregates, hashes), digested from the
+    same reads of the file as stored. observe(ts_sec, length, decoded), if
+    given, sees every decoded packet in capture order.
+    """
+    reader, hashing = open_hashed(pcap_path)
+    with reader, open_decompressed(reader) as stream:
+        if is_pcapng(stream):
+            aggregates = _aggregate_packets(iter_pcapng_packets(stream), _new_aggregates(), observe)
+        else:
+            byte_order, ts_divisor, linktype = _read_raw_header(stream)
+            records = iter_pcap_records(stream, byte_order)
+            aggregates = _aggregate_records(records, linktype, ts_divisor, _new_aggregates(), observe)
+        drain(reader)  # a truncated tail still belongs in the evidence hash
+    return aggregates, hashing.hexdigests()
+
+
+def _aggregate_shard(pcap_path, start, length):
+    f, byte_order, ts_divisor, linktype = _open_raw_pcap(pcap_path)
+    with f:
+        f.seek(start)
+        records = iter_pcap_records(f, byte_order, max_bytes=length)
+        return _aggregate_records(records, linktype, ts_divisor, _new_aggregates())
+
+
+def merge_aggregates(partials):
+    """Merge raw partial aggregates from several shards or captures, in capture order."""
+    merged = _new_aggregates()
+    upload_data, flows = merged["upload"], merged["flows"]
+    for partial in partials:
+        merged["dns_names"].update(partial["dns_names"])
+        for key, upload_bytes in partial["upload"].items():
+            upload_data[key] += upload_bytes
+        for key, stats in partial["flows"].items():
+            flow = flows.get(key)
+            if flow is None:
+                flows[key] = list(stats)
+                continue
+            flow[0] += stats[0]
+            flow[1] += stats[1]
+            flow[2] = min(flow[2], stats[2])
+            flow[3] = max(flow[3], stats[3])
+    return merged
+
+
+def _aggregate_sharded(pcap_path, workers):
+    try:
+        f, byte_order, _, _ = _open_raw_pcap(pcap_path)
+    except PcapFormatError:
+        # pcapng and compressed captures have no seekable record boundaries
+        return _aggregate_raw_pcap(pcap_path)
+    with f:
+        shards = build_shard_index(f, byte_order, SHARD_BYTES)
+    if len(shards) <= 1:
+        return _aggregate_raw_pcap(pcap_path)
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(shards))) as pool:
+        partials = pool.map(_aggregate_shard, [pcap_path] * len(shards), *zip(*shards))
+        # Hash sequentially here while the workers parse their byte ranges
+        reader, hashing = open_hashed(pcap_path)
+        with reader:
+            drain(reader)
+        return merge_aggregates(partials), hashing.hexdigests()
+
+
+def _scapy_decode(pkt):
+    if IP in pkt:
+        layer = pkt[IP]
+        version, src, dst = 4, socket.inet_aton(layer.src), socket.inet_aton(layer.dst)
+        proto = layer.proto
+    elif IPv6 in pkt:
+        layer = pkt[IPv6]
+        version = 6
+        src = socket.inet_pton(socket.AF_INET6, layer.src)
+        dst = socket.inet_pton(socket.AF_INET6, layer.dst)
+        proto = layer.nh
+    else:
+        return None
+    for transport, number in ((TCP, IPPROTO_TCP), (UDP, IPPROTO_UDP)):
+        if transport in pkt:
+            return version, number, src, dst, pkt[transport].sport, pkt[transport].dport
+    return version, None if proto in (IPPROTO_TCP, IPPROTO_UDP) else proto, src, dst, 0, 0
+
+
+def _aggregate_scapy(pcap_path, observe=None):
+    aggregates = _new_aggregates()
+    dns = DnsNameCollector()
+
+    # Walk the capture one record at a time so only the aggregates stay in
+    # memory, however large the pcap is.
+    reader, hashing = open_hashed(pcap_path)
+    with reader, open_decompressed(reader) as stream, PcapReader(stream) as packets:
+        for pkt in packets:
+            try:
+                decoded = _scapy_decode(pkt)
+                if decoded is not None:
+                    ts = float(pkt.time)
+                    _add_packet(aggregates, int(ts), ts, len(pkt), decoded)
+                    if UDP in pkt and DNS_PORT in (decoded[4], decoded[5]):
+                        dns.add_payload(bytes(pkt[UDP].payload))
+                    if observe is not None:
+                        observe(int(ts), len(pkt), decoded)
+            except Exception as e:
+                print(f"Error processing packet: {e}")
+        drain(reader)
+    aggregates["dns_names"] = dns.names
+
+    return aggregates, hashing.hexdigests()
+
+
+def _local_seconds(epoch_seconds):
+    """
+    Shift epoch seconds to local wall-clock seconds, the same clock
+    datetime.fromtimestamp uses. The UTC offset is looked up once per hour
+    present, so DST changes inside a capture are honoured.
+    """
+    hours, inverse = np.unique(epoch_seconds // 3600, return_inverse=True)
+    offsets = np.array([
+        int(datetime.fromtimestamp(int(hour) * 3600, timezone.utc).astimezone().utcoffset().total_seconds())
+        for hour in hours
+    ], dtype=np.int64)
+    return epoch_seconds + offsets[inverse.reshape(-1)]
+
+
+def _upload_frame(upload_data):
+    seconds = np.fromiter(upload_data.keys(), dtype=np.int64, count=len(upload_data))
+    upload_bytes = np.fromiter(upload_data.values(), dtype=np.int64, count=len(upload_data))
+    order = np.argsort(seconds, kind="stable")
+    return _bucket_frame(_local_seconds(seconds[order]), upload_bytes[order])
 
-    for pkt in packets:
-        try:
-            if IP in pkt and TCP in pkt:
-                if pkt[IP].src.startswith("192.") or pkt[IP].src.startswith("10.") or pkt[IP].src.startswith("172."):
-                    timestamp = datetime.fromtimestamp(float(pkt.time)).replace(second=0, microsecond=0)
-                    upload_data[timestamp] += int(len(pkt))
-        except Exception as e:
-            print(f"Error processing packet: {e}")
 
-    df = pd.DataFrame(upload_data.items(), columns=["Timestamp", "Upload_Bytes"])
+def _bucket_frame(local_seconds, upload_bytes):
+    df = pd.DataFrame({
+        "Timestamp": pd.to_datetime(local_seconds, unit="s"),
+        "Upload_Bytes": upload_bytes,
+    })
     df["Upload_MB"] = df["Upload_Bytes"] / (1024 * 1024)
-    return df.sort_values("Timestamp")
+    return df
+
+
+def resample_upload(upload_df, bucket="1m"):
+    """
+    Re-bucket a per-second (or finer) upload frame to one of BUCKET_SIZES
+    using integer second arrays; no need to re-read the pcap.
+    """
+    bucket_seconds = BUCKET_SIZES[bucket]
+    seconds = upload_df["Timestamp"].to_numpy().astype("datetime64[s]").astype(np.int64)
+    buckets = seconds - seconds % bucket_seconds
+    keys, inverse = np.unique(buckets, return_inverse=True)
+    totals = np.zeros(len(keys), dtype=np.int64)
+    np.add.at(totals, inverse.reshape(-1), upload_df["Upload_Bytes"].to_numpy(dtype=np.int64))
+    return _bucket_frame(keys, totals)
+
+
+def add_rolling_window(upload_df, window="5m", bucket=None):
+    """
+    Add trailing-window totals over the bucketed series:
+    Rolling_Bytes (sum over the window) and Rolling_Rate_Bps. bucket is the
+    width the series was resampled to; a shorter window is widened to it,
+    since a window can't hold less than one bucket's bytes.
+    """
+    window_seconds = BUCKET_SIZES.get(window) or int(pd.Timedelta(window).total_seconds())
+    if bucket is not None:
+        window_seconds = max(window_seconds, BUCKET_SIZES[bucket])
+    series = upload_df.set_index("Timestamp")["Upload_Bytes"]
+    rolling = series.rolling(f"{window_seconds}s").sum()
+    upload_df["Rolling_Bytes"] = rolling.to_numpy().astype(np.int64)
+    upload_df["Rolling_Rate_Bps"] = upload_df["Rolling_Bytes"] / window_seconds
+    return upload_df
+
+
+def _flow_frame(flows):
+    names = {}
+    rows = []
+    for (src, dst, sport, dport, proto), stats in flows.items():
+        for addr in (src, dst):
+            if addr not in names:
+                names[addr] = ip_to_str(addr)
+        rows.append([
+            names[src], names[dst], sport, dport, PROTOCOL_NAMES[proto],
+            stats[0], stats[1], stats[2], stats[3],
+            datetime.fromtimestamp(stats[4]), datetime.fromtimestamp(stats[5]),
+        ])
+    df = pd.DataFrame(rows, columns=FLOW_COLUMNS)
+    return df.sort_values("Bytes_Up", ascending=False, ignore_index=True)
+
+
+def summarize_destinations(flow_df, dns_names=None):
+    """
+    Per-destination upload summary built from the flow table. With
+    dns_names ({address: domain}, e.g. dns_name_map of the same capture) a
+    "Domain" column names each destination from the captured DNS answers.
+    """
+    columns = DESTINATION_COLUMNS if dns_names is None else ["Domain"] + DESTINATION_COLUMNS
+    if flow_df.empty:
+        return pd.DataFrame(columns=columns)
+    summary = flow_df.groupby("Destination").agg(
+        Upload_Bytes=("Bytes_Up", "sum"),
+        Download_Bytes=("Bytes_Down", "sum"),
+        Packets_Up=("Packets_Up", "sum"),
+        Packets_Down=("Packets_Down", "sum"),
+        Flows=("Source", "size"),
+        First_Seen=("First_Seen", "min"),
+        Last_Seen=("Last_Seen", "max"),
+    ).reset_index()
+    summary["Upload_MB"] = summary["Upload_Bytes"] / (1024 * 1024)
+    if dns_names is not None:
+        summary["Domain"] = summary["Destination"].map(dns_names).fillna("")
+    return summary[columns].sort_values("Upload_Bytes", ascending=False, ignore_index=True)
+
+
+def export_destination_report(destinations, threshold_mb=1.0):
+    """
+    Write the per-destination summary where build_timeline expects it
+    (Timestamp, Destination, Risk Level, ...).
+    """
+    os.makedirs(REPORT_DIR, exist_ok=True)
+    report = detect_anomalies(destinations.assign(Timestamp=destinations["First_Seen"]), threshold_mb=threshold_mb)
+    report = report.rename(columns={"Risk_Level": "Risk Level"})
+    columns = ["Timestamp", "Destination", "Upload_MB", "Upload_Bytes", "Download_Bytes", "Flows", "Last_Seen", "Risk Level"]
+    if "Domain" in report:
+        columns.insert(2, "Domain")
+    csv_path = os.path.join(REPORT_DIR, "bandwidth_analysis.csv")
+    report[columns].to_csv(csv_path, index=False)
+    return csv_path
+
+
+class _SeriesBaseline:
+    """Open bucket plus running baseline of one series at one bucket size."""
+
+    __slots__ = ("seconds", "bucket", "bytes", "ewma", "quantile")
+
+    def __init__(self, seconds, alpha, quantile):
+        self.seconds = seconds
+        self.bucket = None
+        self.bytes = 0
+        self.ewma = EWMA(alpha)
+        self.quantile = P2Quantile(quantile)
+
+
+class OnlineBurstDetector:
+    """
+    Flags upload bursts against each series' own baseline as packets stream
+    through, instead of the fixed thresholds of detect_anomalies. Series are
+    the device's total upload (TOTAL_SERIES) and every flow, each at every
+    one of bucket_sizes.
+
+    Per series and bucket size it keeps an EWMA mean/variance and a P²
+    estimate of the `quantile` of its non-empty buckets, so memory is O(1)
+    per series; a bucket is flagged when it closes above both
+    mean + z_threshold * std and that quantile. Idle buckets are skipped, so
+    the baseline is "what this series uploads when it is active". At most
+    max_series flows are tracked; the least recently active are dropped.
+    """
+
+    def __init__(self, bucket_sizes=("10s", "1m"), alpha=0.1, quantile=0.95, z_threshold=3.0,
+                 min_samples=10, min_bytes=64 * 1024, max_series=5000, device_ips=(), on_burst=None):
+        self.bucket_sizes = {BUCKET_SIZES[bucket]: bucket for bucket in bucket_sizes}
+        self.alpha = alpha
+        self.quantile = quantile
+        self.z_threshold = z_threshold
+        self.min_samples = min_samples
+        self.min_bytes = min_bytes
+        self.max_series = max_series
+        self.on_burst = on_burst
+        self.classifier = LocalNetworkClassifier(device_ips=device_ips)
+        self.reset()
+
+    def reset(self):
+        """Forget all baselines and flagged bursts (learned device IPs are kept)."""
+        self.total = self._new_series()
+        self.series = OrderedDict()
+        self.bursts = []
+
+    def _new_series(self):
+        return [_SeriesBaseline(seconds, self.alpha, self.quantile) for seconds in self.bucket_sizes]
+
+    def observe_packet(self, ts_sec, length, decoded):
+        """Feed one decoded packet; only the device's upload direction counts."""
+        _, proto, src, dst, sport, dport = decoded
+        if proto != IPPROTO_TCP and proto != IPPROTO_UDP:
+            return
+        key = (src, dst, sport, dport, proto)
+        if not self.classifier.is_local(src):
+            if self.classifier.is_local(dst) or not self.classifier.learn_device_ips([key]):
+                return
+        self.observe_upload(ts_sec, key, length)
+
+    def observe_upload(self, ts_sec, flow_key, nbytes):
+        """Feed upload bytes already attributed to a device-side flow key."""
+        self._observe(TOTAL_SERIES, self.total, ts_sec, nbytes)
+        states = self.series.get(flow_key)
+        if states is None:
+            states = self.series[flow_key] = self._new_series()
+            if len(self.series) > self.max_series:
+                self.series.popitem(last=False)
+        else:
+            self.series.move_to_end(flow_key)
+        self._observe(flow_key, states, ts_sec, nbytes)
+
+    def _observe(self, key, states, ts_sec, nbytes):
+        for state in states:
+            bucket = ts_sec - ts_sec % state.seconds
+            if state.bucket is None:
+                state.bucket = bucket
+            elif bucket > state.bucket:
+                self._close(key, state)
+                state.bucket = bucket
+            # Late (out-of-order) packets are counted in the open bucket
+            state.bytes += nbytes
+
+    def _close(self, key, state):
+        value = state.bytes
+        ewma = state.ewma
+        if ewma.count >= self.min_samples and value >= self.min_bytes:
+            std = ewma.std
+            limit = max(ewma.mean + self.z_threshold * std, state.quantile.value())
+            if value > limit:
+                z_score = (value - ewma.mean) / std if std else float("inf")
+                burst = (state.bucket, self.bucket_sizes[state.seconds], key, value, ewma.mean, limit, z_score)
+                self.bursts.append(burst)
+                if self.on_burst is not None:
+                    self.on_burst(burst)
+        ewma.update(value)
+        state.quantile.update(value)
+        state.bytes = 0
+
+    def flush(self):
+        """Close every open bucket, e.g. at the end of a capture."""
+        for key, states in [(TOTAL_SERIES, self.total)] + list(self.series.items()):
+            for state in states:
+                if state.bucket is not None:
+                    self._close(key, state)
+                    state.bucket = None
+
+    def burst_frame(self):
+        """Flagged bursts so far, one row per (series, bucket)."""
+        rows = [
+            [datetime.fromtimestamp(bucket), size, _series_name(key), value, round(mean), round(limit), z_score]
+            for bucket, size, key, value, mean, limit, z_score in self.bursts
+        ]
+        return pd.DataFrame(rows, columns=BURST_COLUMNS)
+
+
+def _series_name(key):
+    if key == TOTAL_SERIES:
+        return key
+    src, dst, sport, dport, proto = key
+    return f"{ip_to_str(src)}:{sport} -> {ip_to_str(dst)}:{dport}/{PROTOCOL_NAMES[proto]}"
 
 
 def detect_after_hours(timestamp):
     return timestamp.hour < 9 or timestamp.hour >= 17
 
 def detect_anomalies(df, threshold_mb=1.0, use_ml=False):
-    df["After_Hours"] = df["Timestamp"].apply(detect_after_hours)
+    # Column-wise equivalents of detect_after_hours and the per-row labelling,
+    # so multi-day second-level series don't pay a Python call per row.
+    hours = pd.to_datetime(df["Timestamp"]).dt.hour
+    df["After_Hours"] = (hours < 9) | (hours >= 17)
 
-    if use_ml and os.path.exists(MODEL_PATH):
-        model = joblib.load(MODEL_PATH)
-        df["Hour"] = df["Timestamp"].dt.hour
-        df["ML_Score"] = model.predict_proba(df[["Upload_MB", "Hour"]])[:, 1]  # Anomaly score
+    model = get_model("bandwidth") if use_ml else None
+    if model is not None:
+        features = pd.DataFrame({"Upload_MB": df["Upload_MB"], "Hour": hours})
+        df["ML_Score"] = model.predict_proba(features)[:, 1]  # Anomaly score
     else:
         df["ML_Score"] = 0.0
 
-    def label(row):
-        if row["Upload_MB"] > 5 or row["After_Hours"] or row["ML_Score"] > 0.8:
-            return "High"
-        elif row["Upload_MB"] > threshold_mb or row["ML_Score"] > 0.4:
-            return "Intermediate"
-        return "Low"
-
-    df["Risk_Level"] = df.apply(label, axis=1)
-    return df.drop(columns=["Hour"], errors="ignore")
+    high = (df["Upload_MB"] > 5) | df["After_Hours"] | (df["ML_Score"] > 0.8)
+    intermediate = (df["Upload_MB"] > threshold_mb) | (df["ML_Score"] > 0.4)
+    df["Risk_Level"] = np.select([high, intermediate], ["High", "Intermediate"], default="Low")
+    return df
 
 def compute_sha256(file_path):
-    with open(file_path, "rb") as f:
-        return hashlib.sha256(f.read()).hexdigest()
+    return calculate_hashes(file_path, ("sha256",))["sha256"]
 
 def export_report(df):
     csv_path = os.path.join(OUTPUT_DIR, "bandwidth_anomalies.csv")
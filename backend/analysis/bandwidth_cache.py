@@ -0,0 +1,139 @@
+# backend/analysis/bandwidth_cache.py
+
+import json
+import os
+from collections import defaultdict
+
+import numpy as np
+
+CACHE_DIR = "forensics_output/bandwidth/cache"
+INDEX_FILE = "index.json"
+
+
+def _stat_key(pcap_path):
+    st = os.stat(pcap_path)
+    return f"{os.path.abspath(pcap_path)}|{st.st_size}|{st.st_mtime_ns}"
+
+
+def _load_index(cache_dir):
+    cache_dir = cache_dir or CACHE_DIR
+    try:
+        with open(os.path.join(cache_dir, INDEX_FILE), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def lookup_hashes(pcap_path, cache_dir=None):
+    """
+    Evidence digests recorded for this file (path, size, mtime) by an
+    earlier parse. Only a hint that a cached parse may exist: content
+    rewritten with the same size and mtime matches too, so callers must
+    re-hash the file before relying on them.
+    """
+    return _load_index(cache_dir).get(_stat_key(pcap_path))
+
+
+def remember_hashes(pcap_path, hashes, cache_dir=None):
+    cache_dir = cache_dir or CACHE_DIR
+    os.makedirs(cache_dir, exist_ok=True)
+    index = _load_index(cache_dir)
+    index[_stat_key(pcap_path)] = hashes
+    tmp_path = os.path.join(cache_dir, INDEX_FILE + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(index, f, indent=2)
+    os.replace(tmp_path, os.path.join(cache_dir, INDEX_FILE))
+
+
+def cache_path(sha256, parser_version, cache_dir=None):
+    return os.path.join(cache_dir or CACHE_DIR, f"{sha256}_v{parser_version}.npz")
+
+
+def _pack_addresses(addresses):
+    packed = np.zeros((len(addresses), 16), dtype=np.uint8)
+    lengths = np.zeros(len(addresses), dtype=np.uint8)
+    for i, addr in enumerate(addresses):
+        packed[i, :len(addr)] = np.frombuffer(addr, dtype=np.uint8)
+        lengths[i] = len(addr)
+    return packed, lengths
+
+
+def save_aggregates(sha256, parser_version, aggregates, cache_dir=None):
+    """
+    Persist raw capture aggregates column by column: per-second upload
+    buckets and wire-direction flows, with addresses stored once in a table,
+    plus the DNS answer names seen in the capture.
+    """
+    cache_dir = cache_dir or CACHE_DIR
+    os.makedirs(cache_dir, exist_ok=True)
+    address_ids = {}
+
+    def address_id(addr):
+        if addr not in address_ids:
+            address_ids[addr] = len(address_ids)
+        return address_ids[addr]
+
+    upload = aggregates["upload"]
+    upload_seconds = np.fromiter((key[0] for key in upload), dtype=np.int64, count=len(upload))
+    upload_src = np.fromiter((address_id(key[1]) for key in upload), dtype=np.int32, count=len(upload))
+    upload_bytes = np.fromiter(upload.values(), dtype=np.int64, count=len(upload))
+
+    flows = aggregates["flows"]
+    keys = list(flows)
+    stats = list(flows.values())
+    columns = {
+        "flow_src": np.array([address_id(k[0]) for k in keys], dtype=np.int32),
+        "flow_dst": np.array([address_id(k[1]) for k in keys], dtype=np.int32),
+        "flow_sport": np.array([k[2] for k in keys], dtype=np.int32),
+        "flow_dport": np.array([k[3] for k in keys], dtype=np.int32),
+        "flow_proto": np.array([k[4] for k in keys], dtype=np.uint8),
+        "flow_bytes": np.array([v[0] for v in stats], dtype=np.int64),
+        "flow_packets": np.array([v[1] for v in stats], dtype=np.int64),
+        "flow_first": np.array([v[2] for v in stats], dtype=np.float64),
+        "flow_last": np.array([v[3] for v in stats], dtype=np.float64),
+    }
+    addresses, address_lengths = _pack_addresses(list(address_ids))
+    dns_names = aggregates["dns_names"]
+
+    path = cache_path(sha256, parser_version, cache_dir)
+    tmp_path = path + ".tmp.npz"
+    np.savez(
+        tmp_path,
+        addresses=addresses, address_lengths=address_lengths,
+        upload_seconds=upload_seconds, upload_src=upload_src, upload_bytes=upload_bytes,
+        dns_addresses=np.array(list(dns_names), dtype=str), dns_domains=np.array(list(dns_names.values()), dtype=str),
+        **columns,
+    )
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_aggregates(sha256, parser_version, cache_dir=None):
+    """Cached raw aggregates for this capture hash and parser version, or None."""
+    path = cache_path(sha256, parser_version, cache_dir)
+    if not os.path.exists(path):
+        return None
+    try:
+        with np.load(path) as data:
+            addresses = [
+                row[:length].tobytes()
+                for row, length in zip(data["addresses"], data["address_lengths"])
+            ]
+            upload = defaultdict(int)
+            for second, src, nbytes in zip(
+                data["upload_seconds"].tolist(), data["upload_src"].tolist(), data["upload_bytes"].tolist()
+            ):
+                upload[second, addresses[src]] = nbytes
+
+            flows = {}
+            for src, dst, sport, dport, proto, nbytes, packets, first, last in zip(
+                data["flow_src"].tolist(), data["flow_dst"].tolist(), data["flow_sport"].tolist(),
+                data["flow_dport"].tolist(), data["flow_proto"].tolist(), data["flow_bytes"].tolist(),
+                data["flow_packets"].tolist(), data["flow_first"].tolist(), data["flow_last"].tolist(),
+            ):
+                flows[addresses[src], addresses[dst], sport, dport, proto] = [nbytes, packets, first, last]
+            dns_names = dict(zip(data["dns_addresses"].tolist(), data["dns_domains"].tolist()))
+    except (OSError, KeyError, ValueError) as e:
+        print(f"[!] Ignoring unreadable capture cache {path}: {e}")
+        return None
+    return {"upload": upload, "flows": flows, "dns_names": dns_names}
@@ -0,0 +1,179 @@
+# backend/analysis/bandwidth_live.py
+
+import subprocess
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from backend.analysis.bandwidth_analyser import (
+    BUCKET_SIZES, _bucket_frame, _flow_frame, _local_seconds, detect_anomalies
+)
+from backend.extract.adb_connector import open_tcpdump_stream
+from backend.utils.network import LocalNetworkClassifier
+from backend.utils.pcap_reader import (
+    IPPROTO_TCP, IPPROTO_UDP, PcapFormatError, can_decode, decode_ip, iter_packets, open_decompressed
+)
+
+LABEL_COLUMNS = ["After_Hours", "ML_Score", "Risk_Level"]
+
+
+class LiveBandwidthMonitor:
+    """
+    Incremental counterpart of analyze_capture for a capture that is still
+    being written: `adb exec-out tcpdump -w -`, a FIFO, or a replayed file.
+
+    Keeps upload totals for the newest max_buckets buckets and the max_flows
+    most recently active flows, so memory stays bounded however long the
+    observation runs. Anomaly labels are recomputed only for buckets that
+    changed since the last snapshot. An optional OnlineBurstDetector is fed
+    the device's upload per flow as packets arrive.
+    """
+
+    def __init__(self, bucket="10s", max_buckets=360, max_flows=5000, threshold_mb=1.0, device_ips=(),
+                 burst_detector=None):
+        self.bucket_seconds = BUCKET_SIZES[bucket]
+        self.max_buckets = max_buckets
+        self.max_flows = max_flows
+        self.threshold_mb = threshold_mb
+        self.classifier = LocalNetworkClassifier(device_ips=device_ips)
+        self.burst_detector = burst_detector
+        self.buckets = {}  # local bucket start (seconds) -> upload bytes
+        # device-side 5-tuple -> [bytes_up, bytes_down, packets_up, packets_down, first_seen, last_seen]
+        self.flows = OrderedDict()
+        self.packets = 0
+        self.evicted_flows = 0
+        self._labels = {}
+        self._dirty = set()
+        self._utc_offsets = {}
+        self._decodable = set()
+
+    def feed(self, linktype, ts_sec, ts, data):
+        """Fold one captured frame into the bucket and flow aggregates."""
+        if linktype not in self._decodable:
+            if not can_decode(linktype):
+                raise PcapFormatError(f"Unsupported link type {linktype}")
+            self._decodable.add(linktype)
+        decoded = decode_ip(linktype, data)
+        if decoded is None:
+            return
+        _, proto, src, dst, sport, dport = decoded
+        if proto != IPPROTO_TCP and proto != IPPROTO_UDP:
+            return
+        self.packets += 1
+        length = len(data)
+
+        # Same orientation rules as _finalize, decided as packets arrive
+        is_local = self.classifier.is_local
+        if is_local(src):
+            key, offset = (src, dst, sport, dport, proto), 0
+        elif is_local(dst):
+            key, offset = (dst, src, dport, sport, proto), 1
+        elif self.classifier.learn_device_ips([(src, dst, sport, dport, proto)]):
+            key, offset = (src, dst, sport, dport, proto), 0
+        else:
+            return
+
+        flows = self.flows
+        flow = flows.get(key)
+        if flow is None:
+            flow = flows[key] = [0, 0, 0, 0, ts, ts]
+            if len(flows) > self.max_flows:
+                flows.popitem(last=False)
+                self.evicted_flows += 1
+        else:
+            flows.move_to_end(key)
+        flow[offset] += length
+        flow[2 + offset] += 1
+        if ts < flow[4]:
+            flow[4] = ts
+        elif ts > flow[5]:
+            flow[5] = ts
+
+        if offset == 0:
+            if proto == IPPROTO_TCP:
+                self._add_upload(ts_sec, length)
+            if self.burst_detector is not None:
+                self.burst_detector.observe_upload(ts_sec, key, length)
+
+    def _add_upload(self, ts_sec, length):
+        hour = ts_sec // 3600
+        utc_offset = self._utc_offsets.get(hour)
+        if utc_offset is None:
+            utc_offset = self._utc_offsets[hour] = int(_local_seconds(np.array([hour * 3600]))[0]) - hour * 3600
+        local = ts_sec + utc_offset
+        bucket = local - local % self.bucket_seconds
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + length
+        self._dirty.add(bucket)
+        if len(self.buckets) > self.max_buckets:
+            oldest = min(self.buckets)
+            del self.buckets[oldest]
+            self._labels.pop(oldest, None)
+            self._dirty.discard(oldest)
+
+    def consume(self, stream, duration=None, on_update=None, update_interval=1.0):
+        """
+        Feed packets from a pcap/pcapng stream until it ends or duration
+        seconds have passed. on_update(monitor) is called at most every
+        update_interval seconds while packets arrive, and once at the end.
+        """
+        now = time.monotonic()
+        deadline = now + duration if duration else None
+        next_update = now + update_interval
+        for linktype, ts_sec, ts, data in iter_packets(open_decompressed(stream)):
+            self.feed(linktype, ts_sec, ts, data)
+            now = time.monotonic()
+            if on_update and now >= next_update:
+                on_update(self)
+                next_update = now + update_interval
+            if deadline and now >= deadline:
+                break
+        if self.burst_detector is not None:
+            self.burst_detector.flush()
+        if on_update:
+            on_update(self)
+        return self
+
+    def upload_frame(self):
+        """Current upload buckets, labelled the way detect_anomalies does."""
+        keys = np.array(sorted(self.buckets), dtype=np.int64)
+        totals = np.array([self.buckets[k] for k in keys.tolist()], dtype=np.int64)
+        df = _bucket_frame(keys, totals)
+        if self._dirty:
+            dirty = np.array(sorted(self._dirty), dtype=np.int64)
+            labelled = detect_anomalies(
+                _bucket_frame(dirty, np.array([self.buckets[k] for k in dirty.tolist()], dtype=np.int64)),
+                threshold_mb=self.threshold_mb,
+            )
+            for bucket, row in zip(dirty.tolist(), labelled[LABEL_COLUMNS].itertuples(index=False)):
+                self._labels[bucket] = tuple(row)
+            self._dirty.clear()
+        labels = [self._labels[k] for k in keys.tolist()]
+        for i, column in enumerate(LABEL_COLUMNS):
+            df[column] = [label[i] for label in labels]
+        return df
+
+    def flow_frame(self):
+        """The most recently active flows in analyze_capture's flow layout."""
+        return _flow_frame(self.flows)
+
+
+def monitor_device(device_id=None, duration=60, on_update=None, **monitor_options):
+    """
+    Stream tcpdump from the device over adb for duration seconds into a
+    LiveBandwidthMonitor. Nothing is written to the device's storage.
+    """
+    proc = open_tcpdump_stream(device_id)
+    # Ends the stream at the deadline even if no packets are arriving
+    stopper = threading.Timer(duration, proc.terminate)
+    stopper.start()
+    try:
+        return LiveBandwidthMonitor(**monitor_options).consume(proc.stdout, on_update=on_update)
+    finally:
+        stopper.cancel()
+        proc.terminate()
+        try:
+            proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            proc.kill()
@@ -1,33 +1,63 @@
 # backend/analysis/dns_log_analyzer.py
 
 import re
+import csv
+import glob
+import heapq
+import shutil
+import tempfile
+import numpy as np
 import pandas as pd
 from datetime import datetime
 import hashlib
-import joblib
 import os
+import time
 import zipfile
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from operator import itemgetter
 
-from backend.utils.threat_intel import is_domain_suspicious
-from backend.utils.constants import DNS_MODEL_PATH
-from backend.utils.csv_writer import write_df_to_csv
-from backend.utils.file_hash import calculate_sha256
+from ai_models.registry import get_model
+from backend.analysis.dns_pcap import iter_dns_pcap_queries
+from backend.analysis.dns_tunneling import TUNNEL_REASON, TUNNEL_RISK, TunnelingFeatureEngine, tunneling_suspects
+from backend.utils.threat_intel import get_client, is_domain_suspicious, is_threat, lookup_domains, use_offline_client
+from backend.utils.domain_rules import get_domain_matcher
+from backend.utils.file_hash import calculate_hashes, drain, open_hashed, open_hashed_text, open_hashed_writer
+from backend.utils.pcap_reader import is_capture_file, open_decompressed
+from backend.utils.lru import LRUCache
 
-# Known suspicious TLDs and patterns
-SUSPICIOUS_TLDS = [".xyz", ".tk", ".top", ".gq", ".ml", ".cf", ".onion"]
-FREE_DOMAINS = ["duckdns.org", "freedns.afraid.org"]
-SUSPICIOUS_KEYWORDS = ["dns-tunnel", "malware", "c2", "leak", "exploit"]
+# Suspicious TLDs, free dynamic-DNS domains and keywords live in the
+# "dns" ruleset of the shared domain rules file (backend/utils/domain_rules.csv)
+DNS_RULESET = "dns"
 
 # Time range outside working hours
 WORK_HOURS_START = 9
 WORK_HOURS_END = 17
 
-# Load ML model for risk scoring
-try:
-    model = joblib.load(DNS_MODEL_PATH)
-except Exception as e:
-    model = None
-    print(f"[!] Warning: DNS ML model could not be loaded. {e}")
+# Distinct feature rows scored per model.predict call
+MODEL_BATCH_ROWS = 100_000
+# Queries parsed, scored and written per chunk; bounds peak memory
+DNS_CHUNK_ROWS = 50_000
+DNS_PREVIEW_ROWS = 1000
+# Files picked up when a directory of rotated logs (or captures) is analyzed
+DNS_LOG_GLOBS = ("*.log", "*.txt", "*.pcap", "*.pcapng", "*.cap", "*.gz", "*.zst", "*.zip")
+REPORT_COLUMNS = ["Timestamp", "Domain", "Accessed After Hours", "Heuristic Risk", "Reason", "Model Risk"]
+SUMMARY_COLUMNS = ["Model Risk", "Heuristic Risk", "Accessed After Hours"]
+FEATURE_COLUMNS = ["domain_length", "num_dots", "hour_accessed", "has_numeric", "tld"]
+# Verdict of a domain whose threat-intel status is a threat
+INTEL_RISK = "High"
+INTEL_REASON = "Threat Intel Match"
+# Seconds one log analysis may spend waiting on threat-intel lookups;
+# domains not looked up in time are classified from the cache only
+THREAT_INTEL_BUDGET = 60
+# Distinct domains whose verdicts are kept across the logs of one case
+DOMAIN_CACHE_SIZE = 200_000
+_domain_cache_case = None
+_domain_cache = None
+
+def get_dns_model():
+    """The DNS risk model, loaded on first use; None if it is unavailable."""
+    return get_model("dns")
 
 def parse_dns_log_line(line):
     pattern = r"(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}).*?query\s+(\S+)"
@@ -42,28 +72,33 @@ def parse_dns_log_line(line):
             return None, None
     return None, None
 
-def classify_risk(domain):
+def classify_risk(domain, intel_status=None):
     domain = domain.lower()
-    if any(tld in domain for tld in SUSPICIOUS_TLDS):
-        return "High", "Suspicious TLD"
-    if any(free in domain for free in FREE_DOMAINS):
-        return "Intermediate", "Free Domain"
-    if any(kw in domain for kw in SUSPICIOUS_KEYWORDS):
-        return "Intermediate", "Keyword"
-    if is_domain_suspicious(domain):
-        return "High", "Threat Intel Match"
+    rule = get_domain_matcher(DNS_RULESET).match(domain)
+    if rule:
+        return rule.risk, rule.reason
+    if intel_status is None:
+        intel_status = is_domain_suspicious(domain)
+    if is_threat(intel_status):
+        return INTEL_RISK, INTEL_REASON
     return "Low", "Normal"
 
-def extract_features(domain, timestamp):
+def domain_features(domain):
+    """The extract_features values that depend only on the domain."""
     return {
         "domain_length": len(domain),
         "num_dots": domain.count('.'),
-        "hour_accessed": timestamp.hour,
         "has_numeric": any(char.isdigit() for char in domain),
         "tld": domain.split('.')[-1],
     }
 
+def extract_features(domain, timestamp):
+    features = domain_features(domain)
+    features["hour_accessed"] = timestamp.hour
+    return {column: features[column] for column in FEATURE_COLUMNS}
+
 def predict_model_risk(domain, timestamp):
+    model = get_dns_model()
     if not model:
         return "Unknown"
     features = extract_features(domain, timestamp)
@@ -74,49 +109,429 @@ def predict_model_risk(domain, timestamp):
     except Exception as e:
         return "Unknown"
 
-def analyze_dns_logs(file_path):
-    parsed_data = []
-    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-        for line in f:
-            timestamp, domain = parse_dns_log_line(line)
-            if timestamp and domain:
-                after_hours = not (WORK_HOURS_START <= timestamp.hour < WORK_HOURS_END)
-                heuristic_risk, reason = classify_risk(domain)
-                model_risk = predict_model_risk(domain, timestamp)
-                parsed_data.append({
-                    "Timestamp": timestamp,
-                    "Domain": domain,
-                    "Accessed After Hours": after_hours,
-                    "Heuristic Risk": heuristic_risk,
-                    "Reason": reason,
-                    "Model Risk": model_risk
-                })
-
-    df = pd.DataFrame(parsed_data)
-
-    if df.empty:
-        return df, None, None, None
-
-    # Save CSV
+def extract_features_frame(domains, timestamps):
+    """
+    Column-wise extract_features for whole Series of domains and timestamps;
+    same columns and values, one row per query.
+    """
+    return pd.DataFrame({
+        "domain_length": domains.str.len().astype(np.int64),
+        "num_dots": domains.str.count(r"\.").astype(np.int64),
+        "hour_accessed": timestamps.dt.hour.astype(np.int64),
+        "has_numeric": domains.str.contains(r"\d", regex=True).astype(bool),
+        "tld": domains.str.rsplit(".", n=1).str[-1],
+    })
+
+def _features_frame(per_domain, codes, hours):
+    """extract_features rows from per-distinct-domain features broadcast by codes."""
+    columns = {}
+    for column in FEATURE_COLUMNS:
+        if column == "hour_accessed":
+            columns[column] = hours.to_numpy(dtype=np.int64)
+        else:
+            dtype = object if column == "tld" else None
+            columns[column] = np.array([features[column] for features in per_domain], dtype=dtype)[codes]
+    return pd.DataFrame(columns)
+
+def get_domain_cache(case_id=None):
+    """
+    LRU of per-domain verdicts shared by every log analysed for case_id, so
+    a domain seen in an earlier file of the same case costs a dict hit.
+    Switching to another case starts a fresh cache.
+    """
+    global _domain_cache_case, _domain_cache
+    if _domain_cache is None or _domain_cache_case != case_id:
+        _domain_cache_case, _domain_cache = case_id, LRUCache(DOMAIN_CACHE_SIZE)
+    return _domain_cache
+
+def domain_verdict(domain, cache=None, intel=None):
+    """
+    (heuristic risk, reason, domain_features) for a domain, via cache if
+    given. intel maps domains to prefetched threat-intel statuses.
+    """
+    verdict = cache.get(domain) if cache is not None else None
+    if verdict is None:
+        intel_status = intel.get(domain) if intel else None
+        risk, reason = classify_risk(domain) if intel_status is None else classify_risk(domain, intel_status)
+        verdict = (risk, reason, domain_features(domain))
+        if cache is not None:
+            cache.put(domain, verdict)
+    return verdict
+
+def predict_model_risk_batch(features):
+    """
+    Model Risk for every row of an extract_features_frame. Identical feature
+    rows get identical predictions, so only the distinct rows are scored,
+    with one model.predict call per MODEL_BATCH_ROWS of them. A chunk the
+    model rejects is retried row by row, so a bad row still yields "Unknown"
+    exactly as predict_model_risk would.
+    """
+    model = get_dns_model()
+    if not model:
+        return np.full(len(features), "Unknown", dtype=object)
+    codes = features.groupby(list(features.columns), sort=False, dropna=False).ngroup().to_numpy()
+    distinct = features.drop_duplicates(ignore_index=True)
+    predictions = np.empty(len(distinct), dtype=object)
+    for start in range(0, len(distinct), MODEL_BATCH_ROWS):
+        chunk = distinct.iloc[start:start + MODEL_BATCH_ROWS]
+        try:
+            predictions[start:start + len(chunk)] = model.predict(chunk)
+        except Exception:
+            for i in range(len(chunk)):
+                try:
+                    predictions[start + i] = model.predict(chunk.iloc[[i]])[0]
+                except Exception:
+                    predictions[start + i] = "Unknown"
+    return predictions[codes]
+
+def iter_dns_queries(lines, chunk_rows=DNS_CHUNK_ROWS):
+    """Yield (timestamps, domains) lists of up to chunk_rows parsed queries."""
+    timestamps, domains = [], []
+    for line in lines:
+        timestamp, domain = parse_dns_log_line(line)
+        if timestamp and domain:
+            timestamps.append(timestamp)
+            domains.append(domain)
+            if len(domains) >= chunk_rows:
+                yield timestamps, domains
+                timestamps, domains = [], []
+    if domains:
+        yield timestamps, domains
+
+def open_dns_queries(file_path, chunk_rows=DNS_CHUNK_ROWS):
+    """
+    Open a resolver log or a packet capture (pcap/pcapng) for scoring:
+    plain, gzip/zstd compressed or, for logs, zipped (sniffed by content).
+    Returns (reader, hashing, chunks): chunks yields (timestamps, domains)
+    lists, and hashing digests the stored file once reader has been drained.
+    """
+    if is_capture_file(file_path):
+        reader, hashing = open_hashed(file_path)
+        return reader, hashing, iter_dns_pcap_queries(open_decompressed(reader), chunk_rows)
+    f, hashing = open_hashed_text(file_path)
+    return f, hashing, iter_dns_queries(f, chunk_rows)
+
+def prefetch_threat_intel(domains, cache=None, timeout=None):
+    """
+    Bulk threat-intel statuses for the domains whose verdict is not cached
+    and that no local rule already classifies.
+    """
+    matcher = get_domain_matcher(DNS_RULESET)
+    wanted = [
+        domain for domain in domains
+        if (cache is None or domain not in cache) and not matcher.match(domain)
+    ]
+    return lookup_domains(wanted, timeout=timeout) if wanted else {}
+
+def score_dns_chunk(timestamps, domains, cache=None, intel_timeout=None, tunneling=None):
+    """
+    Classify and score one chunk of queries into report rows. The domain
+    column is factorized so heuristics and domain features are evaluated
+    once per distinct domain (or taken from cache) and broadcast back.
+    Threat intel for the chunk's new domains is looked up in one batch,
+    waiting at most intel_timeout seconds. With a TunnelingFeatureEngine
+    (fed every chunk of the log in order), queries it flags that no rule
+    or threat intel already rated are reported as TUNNEL_REASON.
+    """
+    timestamps = pd.Series(timestamps)
+    domains = pd.Series(domains)
+    hours = timestamps.dt.hour
+    codes, uniques = pd.factorize(domains)
+    intel = prefetch_threat_intel(uniques, cache, intel_timeout)
+    verdicts = [domain_verdict(domain, cache, intel) for domain in uniques]
+    features = _features_frame([verdict[2] for verdict in verdicts], codes, hours)
+    risks = np.array([verdict[0] for verdict in verdicts], dtype=object)[codes]
+    reasons = np.array([verdict[1] for verdict in verdicts], dtype=object)[codes]
+    if tunneling is not None:
+        flagged = tunneling_suspects(tunneling.transform(domains, timestamps)) & (risks == "Low")
+        risks[flagged] = TUNNEL_RISK
+        reasons[flagged] = TUNNEL_REASON
+    return pd.DataFrame({
+        "Timestamp": timestamps,
+        "Domain": domains,
+        "Accessed After Hours": (hours < WORK_HOURS_START) | (hours >= WORK_HOURS_END),
+        "Heuristic Risk": risks,
+        "Reason": reasons,
+        "Model Risk": predict_model_risk_batch(features),
+    })
+
+def resolve_dns_log_paths(source):
+    """
+    Log files named by source: a single log, a directory (its DNS_LOG_GLOBS
+    files) or a glob pattern such as "data/dump/dns_log_*.log". Sorted by
+    path, so rotated logs keep a stable order.
+    """
+    if os.path.isdir(source):
+        paths = {path for pattern in DNS_LOG_GLOBS for path in glob.glob(os.path.join(source, pattern))}
+    elif any(char in source for char in "*?["):
+        paths = set(glob.glob(source))
+    else:
+        return [source]
+    return sorted(path for path in paths if os.path.isfile(path))
+
+class _DnsReport:
+    """
+    CSV report, preview and row count built up one scored chunk at a time.
+    With append=True rows are added to an existing report (no header).
+    """
+
+    def __init__(self, csv_path, on_chunk=None, append=False):
+        self.csv_path = csv_path
+        self.on_chunk = on_chunk
+        self.append = append
+        self.summary = {"rows": 0, "preview": pd.DataFrame()}
+        self.counts = {column: Counter() for column in SUMMARY_COLUMNS}
+        self.out = self.csv_hashing = self.writer = None
+
+    def write(self, chunk, rows=None):
+        """Append chunk; rows, if given, are its CSV rows as already formatted."""
+        if self.out is None and self.append:
+            self.out = open(self.csv_path, "a", newline="", encoding="utf-8")
+            self.writer = csv.writer(self.out)
+        elif self.out is None:
+            os.makedirs(os.path.dirname(self.csv_path), exist_ok=True)
+            self.out, self.csv_hashing = open_hashed_writer(self.csv_path)
+            self.writer = csv.writer(self.out)
+            self.writer.writerow(chunk.columns.tolist())
+        self.writer.writerows(chunk.values.tolist() if rows is None else rows)
+        summary = self.summary
+        if len(summary["preview"]) < DNS_PREVIEW_ROWS:
+            summary["preview"] = pd.concat([summary["preview"], chunk], ignore_index=True).head(DNS_PREVIEW_ROWS)
+        summary["rows"] += len(chunk)
+        if self.on_chunk:
+            self.on_chunk(chunk)
+
+    def count(self, chunk):
+        for column, counter in self.counts.items():
+            counter.update(chunk[column].tolist())
+
+    def flush(self):
+        if self.out is not None:
+            self.out.flush()
+
+    def close(self):
+        if self.out is not None:
+            self.out.close()
+        self.summary.update({column: pd.Series(counter) for column, counter in self.counts.items()})
+
+    def finish(self, sources, report_dir, timestamp_str):
+        """Write the hash manifest (CSV digest plus every source's digests) and the zip."""
+        if self.out is None and not self.append:
+            return self.summary, None, None, None
+        if self.csv_hashing is not None:
+            csv_sha256 = self.csv_hashing.hexdigests()["sha256"]
+        else:
+            # Appended report: its earlier rows were written by another run
+            csv_sha256 = calculate_hashes(self.csv_path, ("sha256",))["sha256"]
+
+        # Hash file
+        hash_path = os.path.join(report_dir, f"hash_{timestamp_str}.txt")
+        with open(hash_path, "w") as h:
+            h.write(f"SHA256: {csv_sha256}\nFile: {self.csv_path}\n")
+            for source_path, source_hashes in sources:
+                h.write(f"Source: {source_path}\n")
+                for algorithm, digest in source_hashes.items():
+                    h.write(f"Source {algorithm.upper()}: {digest}\n")
+
+        # Zip
+        zip_path = os.path.join("reports/zipped_reports", f"dns_report_{timestamp_str}.zip")
+        os.makedirs(os.path.dirname(zip_path), exist_ok=True)
+        with zipfile.ZipFile(zip_path, 'w') as z:
+            z.write(self.csv_path, os.path.basename(self.csv_path))
+            z.write(hash_path, os.path.basename(hash_path))
+
+        return self.summary, self.csv_path, hash_path, zip_path
+
+def stream_dns_logs(file_path, chunk_rows=DNS_CHUNK_ROWS, progress=None, on_chunk=None, case_id=None,
+                    intel_budget=THREAT_INTEL_BUDGET, workers=None):
+    """
+    Analyze a resolver log chunk by chunk: parse, classify and score
+    chunk_rows queries at a time and append them to the CSV report, hashing
+    the log and the CSV as they are read and written. Peak memory is
+    bounded by the chunk size however large the log is.
+
+    Packet captures are read too: the DNS queries in a pcap/pcapng are
+    decoded from the wire (see open_dns_queries) and scored like log lines.
+    file_path may also be a directory or glob of rotated logs (see
+    resolve_dns_log_paths). Those are scored across `workers` processes
+    (default: one per CPU) and merged into one time-ordered report and one
+    hash manifest, identical to scoring them one by one with workers=1.
+
+    progress(bytes_read, total_bytes, rows) is called after every chunk (or
+    every file) and on_chunk(chunk_df) receives each scored chunk in report
+    order. Per-domain verdicts are reused from earlier logs of the same
+    case_id (see get_domain_cache); threat-intel lookups share intel_budget
+    seconds across all chunks.
+    Returns (summary, csv_path, hash_path, zip_path); the paths are None if
+    no queries were found. summary holds the row count, value counts of
+    "Model Risk", "Heuristic Risk" and "Accessed After Hours", and a
+    "preview" frame of the first DNS_PREVIEW_ROWS rows.
+    """
+    paths = resolve_dns_log_paths(file_path)
     timestamp_str = datetime.now().strftime("%Y%m%d_%H%M%S")
     report_dir = "reports/dns_logs"
-    os.makedirs(report_dir, exist_ok=True)
-    csv_path = os.path.join(report_dir, f"dns_analysis_{timestamp_str}.csv")
-    write_df_to_csv(df, csv_path)
-
-    # Hash file
-    hash_path = os.path.join(report_dir, f"hash_{timestamp_str}.txt")
-    with open(hash_path, "w") as h:
-        h.write(f"SHA256: {calculate_sha256(csv_path)}\nFile: {csv_path}\n")
-
-    # Zip
-    zip_path = os.path.join("reports/zipped_reports", f"dns_report_{timestamp_str}.zip")
-    os.makedirs(os.path.dirname(zip_path), exist_ok=True)
-    with zipfile.ZipFile(zip_path, 'w') as z:
-        z.write(csv_path, os.path.basename(csv_path))
-        z.write(hash_path, os.path.basename(hash_path))
-
-    return df, csv_path, hash_path, zip_path
+    report = _DnsReport(os.path.join(report_dir, f"dns_analysis_{timestamp_str}.csv"), on_chunk)
+    if len(paths) != 1:
+        try:
+            sources = _stream_dns_log_files(paths, report, chunk_rows, progress, case_id, intel_budget, workers)
+        finally:
+            report.close()
+        return report.finish(sources, report_dir, timestamp_str)
+
+    file_path = paths[0]
+    total_bytes = os.path.getsize(file_path)
+    cache = get_domain_cache(case_id)
+    tunneling = TunnelingFeatureEngine()
+    intel_deadline = time.monotonic() + intel_budget
+
+    # Hash the evidence log from the same reads that parse it
+    f, hashing, chunks = open_dns_queries(file_path, chunk_rows)
+    try:
+        with f:
+            for timestamps, domains in chunks:
+                intel_timeout = max(0.0, intel_deadline - time.monotonic())
+                chunk = score_dns_chunk(timestamps, domains, cache, intel_timeout, tunneling)
+                report.write(chunk)
+                report.count(chunk)
+                if progress:
+                    progress(hashing.bytes_read, total_bytes, report.summary["rows"])
+            drain(f)
+    finally:
+        report.close()
+    return report.finish([(file_path, hashing.hexdigests())], report_dir, timestamp_str)
+
+def _score_dns_file(index, file_path, chunk_rows, run_dir, case_id, intel_deadline):
+    """
+    Pool task for one log of a multi-file analysis: score it chunk by chunk
+    and write each chunk, stably sorted by time, as a CSV run in run_dir.
+    Also returns the verdict of every distinct domain in the log.
+    """
+    cache = get_domain_cache(case_id)
+    tunneling = TunnelingFeatureEngine()
+    verdicts = {}
+    runs = []
+    rows = 0
+    f, hashing, chunks = open_dns_queries(file_path, chunk_rows)
+    with f:
+        for timestamps, domains in chunks:
+            chunk = score_dns_chunk(timestamps, domains, cache, max(0.0, intel_deadline - time.time()), tunneling)
+            for domain in pd.unique(chunk["Domain"]):
+                if domain not in verdicts:
+                    verdicts[domain] = cache.get(domain)
+            chunk = chunk.sort_values("Timestamp", kind="stable")
+            run_path = os.path.join(run_dir, f"{index:05d}_{len(runs):06d}.csv")
+            with open(run_path, "w", newline="", encoding="utf-8") as run:
+                csv.writer(run).writerows(chunk.values.tolist())
+            runs.append(run_path)
+            rows += len(chunk)
+        drain(f)
+    return {"path": file_path, "hashes": hashing.hexdigests(), "bytes": hashing.bytes_read,
+            "rows": rows, "runs": runs, "verdicts": verdicts}
+
+def _iter_dns_run(run_path, file_index, run_index):
+    with open(run_path, newline="", encoding="utf-8") as f:
+        for position, row in enumerate(csv.reader(f)):
+            # Timestamps are fixed-width "YYYY-MM-DD HH:MM:SS", so text order is time order
+            yield (row[0], file_index, run_index, position), row
+
+def _report_frame(rows):
+    """Report rows read back from a CSV run as a scored-chunk DataFrame."""
+    df = pd.DataFrame(rows, columns=REPORT_COLUMNS)
+    df["Timestamp"] = pd.to_datetime(df["Timestamp"], format="%Y-%m-%d %H:%M:%S")
+    df["Accessed After Hours"] = df["Accessed After Hours"] == "True"
+    return df
+
+def _stream_dns_log_files(paths, report, chunk_rows, progress, case_id, intel_budget, workers):
+    """
+    Multi-file stream_dns_logs: parallel scoring, then a k-way merge by
+    timestamp. Pool workers score offline (see use_offline_client); the
+    parent looks up each finished file's new domains within the shared
+    budget, upgrades threat matches while merging, and keeps every verdict
+    in the case's domain cache.
+    """
+    total_bytes = sum(os.path.getsize(path) for path in paths)
+    workers = min(workers or os.cpu_count() or 1, max(len(paths), 1))
+    intel_deadline = time.time() + intel_budget
+    cache = get_domain_cache(case_id)
+    intel = {}
+    results = [None] * len(paths)
+    bytes_done = rows_done = 0
+    # Resolve the model and rules before the pool forks, so workers share them read-only
+    get_dns_model()
+    matcher = get_domain_matcher(DNS_RULESET)
+
+    def collect(result):
+        nonlocal bytes_done, rows_done
+        results[result["index"]] = result
+        if workers > 1:
+            wanted = [
+                domain for domain in result["verdicts"]
+                if domain not in intel and domain not in cache and not matcher.match(domain)
+            ]
+            if wanted:
+                intel.update(lookup_domains(wanted, timeout=max(0.0, intel_deadline - time.time())))
+        bytes_done += result["bytes"]
+        rows_done += result["rows"]
+        if progress:
+            progress(bytes_done, total_bytes, rows_done)
+
+    run_dir = tempfile.mkdtemp(prefix="dns_runs_")
+    try:
+        args = [(i, path, chunk_rows, run_dir, case_id, intel_deadline) for i, path in enumerate(paths)]
+        if workers > 1:
+            with ProcessPoolExecutor(
+                max_workers=workers, initializer=use_offline_client, initargs=(get_client().cache.path,)
+            ) as pool:
+                futures = {pool.submit(_score_dns_file, *task): task[0] for task in args}
+                for future in as_completed(futures):
+                    collect(dict(future.result(), index=futures[future]))
+        else:
+            for task in args:
+                collect(dict(_score_dns_file(*task), index=task[0]))
+
+        threats = {domain for domain, status in intel.items() if is_threat(status)}
+        for result in results:
+            for domain, verdict in result["verdicts"].items():
+                if verdict is not None and domain not in cache:
+                    cache.put(domain, (INTEL_RISK, INTEL_REASON, verdict[2]) if domain in threats else verdict)
+
+        runs = [
+            _iter_dns_run(run_path, i, j)
+            for i, result in enumerate(results) for j, run_path in enumerate(result["runs"])
+        ]
+        batch = []
+        for _, row in heapq.merge(*runs, key=itemgetter(0)):
+            if row[1] in threats:
+                row[3], row[4] = INTEL_RISK, INTEL_REASON
+            batch.append(row)
+            if len(batch) >= chunk_rows:
+                _write_merged(report, batch)
+                batch = []
+        if batch:
+            _write_merged(report, batch)
+    finally:
+        shutil.rmtree(run_dir, ignore_errors=True)
+    return [(result["path"], result["hashes"]) for result in results]
+
+def _write_merged(report, rows):
+    chunk = _report_frame(rows)
+    report.write(chunk, rows)
+    report.count(chunk)
+
+def analyze_dns_logs(file_path, chunk_rows=DNS_CHUNK_ROWS, progress=None, case_id=None, workers=None):
+    """
+    stream_dns_logs that also returns every row as one DataFrame:
+    (df, csv_path, hash_path, zip_path). Memory grows with the log, so
+    prefer stream_dns_logs for multi-GB resolver logs. file_path may be a
+    log, a directory of logs or a glob.
+    """
+    chunks = []
+    _, csv_path, hash_path, zip_path = stream_dns_logs(
+        file_path, chunk_rows, progress, on_chunk=chunks.append, case_id=case_id, workers=workers
+    )
+    if not chunks:
+        return pd.DataFrame(), None, None, None
+    return pd.concat(chunks, ignore_index=True), csv_path, hash_path, zip_path
 
 if __name__ == "__main__":
     test_file = "sample_dns_log.txt"
@@ -0,0 +1,186 @@
+# backend/analysis/dns_log_tail.py
+
+import hashlib
+import json
+import os
+import time
+from datetime import datetime
+
+from backend.analysis.dns_log_parser import (
+    DNS_CHUNK_ROWS, THREAT_INTEL_BUDGET, _DnsReport, get_domain_cache, iter_dns_queries, score_dns_chunk,
+    stream_dns_logs,
+)
+from backend.analysis.dns_tunneling import TunnelingFeatureEngine
+from backend.utils.compression import file_compression
+from backend.utils.file_hash import drain, open_hashed
+
+REPORT_DIR = "reports/dns_logs"
+CHECKPOINT_FILE = os.path.join(REPORT_DIR, "checkpoints.json")
+
+
+def _load_checkpoints(checkpoint_path):
+    try:
+        with open(checkpoint_path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def load_checkpoint(source_id, checkpoint_path=None):
+    """Where the last incremental run of source_id stopped, or None."""
+    return _load_checkpoints(checkpoint_path or CHECKPOINT_FILE).get(source_id)
+
+
+def save_checkpoint(source_id, checkpoint, checkpoint_path=None):
+    checkpoint_path = checkpoint_path or CHECKPOINT_FILE
+    os.makedirs(os.path.dirname(checkpoint_path) or ".", exist_ok=True)
+    checkpoints = _load_checkpoints(checkpoint_path)
+    checkpoints[source_id] = checkpoint
+    tmp_path = checkpoint_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(checkpoints, f, indent=2)
+    os.replace(tmp_path, checkpoint_path)
+
+
+def checkpoint_matches(file_path, checkpoint):
+    """
+    True if file_path still begins with what the checkpoint analyzed: it is
+    at least offset bytes long and the line ending at offset has the
+    recorded checksum. False means the log was truncated or rotated.
+    """
+    if not os.path.exists(checkpoint["csv_path"]) or os.path.getsize(file_path) < checkpoint["offset"]:
+        return False
+    length = checkpoint["line_length"]
+    if not length:
+        return True
+    with open(file_path, "rb") as f:
+        f.seek(checkpoint["offset"] - length)
+        return hashlib.sha256(f.read(length)).hexdigest() == checkpoint["line_sha256"]
+
+
+def tail_dns_log(file_path, source_id=None, chunk_rows=DNS_CHUNK_ROWS, progress=None, on_chunk=None,
+                 case_id=None, intel_budget=THREAT_INTEL_BUDGET, checkpoint_path=None):
+    """
+    Incremental stream_dns_logs for a log that keeps growing. Only complete
+    lines after the checkpointed offset of source_id (default: the file's
+    absolute path; use a stable id such as "adb:/sdcard/dns_log.txt" when
+    each pull lands in a new local file) are parsed, and their rows are
+    appended to the report of the previous run. A line still being written
+    is left for the next run. If the log was truncated or rotated, it is
+    rescanned in full into a new report. Compressed logs have no stable
+    byte offsets to resume from and are always analyzed in full.
+
+    The source digests in the hash manifest always cover the whole file,
+    and the manifest lists every file (and version of it) that contributed
+    rows to the report, not just the latest.
+    Returns (summary, csv_path, hash_path, zip_path) like stream_dns_logs;
+    summary["rows"] counts the whole report and summary["new_rows"] this
+    run, whose first rows are in summary["preview"].
+    """
+    if file_compression(file_path):
+        print(f"[!] {file_path} is compressed and cannot be tailed; analyzing it in full.")
+        return stream_dns_logs(file_path, chunk_rows, progress, on_chunk, case_id, intel_budget)
+    source_id = source_id or os.path.abspath(file_path)
+    checkpoint = load_checkpoint(source_id, checkpoint_path)
+    if checkpoint and not checkpoint_matches(file_path, checkpoint):
+        print(f"[!] {file_path} was truncated or rotated since the last run; rescanning it in full.")
+        checkpoint = None
+    if checkpoint is None:
+        timestamp_str = datetime.now().strftime("%Y%m%d_%H%M%S")
+        checkpoint = {
+            "timestamp_str": timestamp_str,
+            "csv_path": os.path.join(REPORT_DIR, f"dns_analysis_{timestamp_str}.csv"),
+            "offset": 0, "line_length": 0, "line_sha256": None, "rows": 0, "counts": {},
+        }
+        append = False
+    else:
+        append = True
+
+    report = _DnsReport(checkpoint["csv_path"], on_chunk, append=append)
+    report.summary["rows"] = start_rows = checkpoint["rows"]
+    for column, pairs in checkpoint["counts"].items():
+        report.counts[column].update(dict(pairs))
+    total_bytes = os.path.getsize(file_path)
+    cache = get_domain_cache(case_id)
+    intel_deadline = time.monotonic() + intel_budget
+    position = {"offset": checkpoint["offset"], "line": None}
+    reader, hashing = open_hashed(file_path)
+
+    def new_lines():
+        # Hash the part analyzed by earlier runs without parsing it again
+        remaining = checkpoint["offset"]
+        while remaining > 0:
+            block = reader.read(min(remaining, 1024 * 1024))
+            if not block:
+                break
+            remaining -= len(block)
+        for line in reader:
+            if not line.endswith(b"\n"):
+                break
+            position["offset"] += len(line)
+            position["line"] = line
+            yield line.decode("utf-8", errors="ignore")
+
+    def save():
+        line = position["line"]
+        if line is not None:
+            checkpoint.update(line_length=len(line), line_sha256=hashlib.sha256(line).hexdigest())
+        checkpoint.update(
+            offset=position["offset"],
+            rows=report.summary["rows"],
+            counts={column: list(counter.items()) for column, counter in report.counts.items()},
+        )
+        save_checkpoint(source_id, checkpoint, checkpoint_path)
+
+    # Window counters start afresh each run; a window split across runs is counted per run
+    tunneling = TunnelingFeatureEngine()
+    try:
+        with reader:
+            # iter_dns_queries pulls lines lazily, so position is at the end of
+            # the chunk's last line whenever a chunk is yielded
+            for timestamps, domains in iter_dns_queries(new_lines(), chunk_rows):
+                chunk = score_dns_chunk(
+                    timestamps, domains, cache, max(0.0, intel_deadline - time.monotonic()), tunneling
+                )
+                report.write(chunk)
+                report.count(chunk)
+                report.flush()
+                save()
+                if progress:
+                    progress(position["offset"], total_bytes, report.summary["rows"])
+            drain(reader)
+    finally:
+        report.close()
+    report.summary["new_rows"] = report.summary["rows"] - start_rows
+    # Every file that fed this report stays in its manifest, e.g. earlier ADB pulls
+    sources = [[path, digests] for path, digests in checkpoint.get("sources", [])]
+    current = [file_path, hashing.hexdigests()]
+    if current not in sources:
+        sources.append(current)
+    if report.out is not None or append:
+        checkpoint["sources"] = sources
+        save()
+    return report.finish(sources, REPORT_DIR, checkpoint["timestamp_str"])
+
+
+def follow_dns_log(file_path=None, pull=None, source_id=None, interval=10.0, duration=None, runs=None,
+                   on_update=None, **tail_options):
+    """
+    Call tail_dns_log every interval seconds until duration seconds have
+    passed or runs runs were made (or forever). pull(), if given, fetches
+    a fresh copy first and returns its path, e.g. pull_dns_logs_from_device.
+    on_update receives each run's (summary, csv_path, hash_path, zip_path).
+    """
+    deadline = time.monotonic() + duration if duration is not None else None
+    result = None
+    done = 0
+    while True:
+        path = pull() if pull else file_path
+        if path:
+            result = tail_dns_log(path, source_id=source_id, **tail_options)
+            if on_update:
+                on_update(*result)
+        done += 1
+        if (runs is not None and done >= runs) or (deadline is not None and time.monotonic() + interval > deadline):
+            return result
+        time.sleep(interval)
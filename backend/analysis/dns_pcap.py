@@ -0,0 +1,209 @@
+# backend/analysis/dns_pcap.py
+
+import struct
+from collections import OrderedDict
+from datetime import datetime
+
+import pandas as pd
+
+from backend.utils.dns_wire import (
+    DNS_PORT, DnsFormatError, answer_addresses, parse_dns_message, qtype_name, rcode_name
+)
+from backend.utils.network import ip_to_str
+from backend.utils.pcap_reader import (
+    IPPROTO_UDP, PcapFormatError, can_decode, iter_packets, open_decompressed, transport_payload
+)
+
+DNS_RECORD_COLUMNS = ["Timestamp", "Client", "Server", "Transport", "Message", "Query", "QType", "RCode", "Answers"]
+# Queries remembered while waiting for their response, so a lookup is reported once
+MAX_OPEN_QUERIES = 100_000
+# A DNS-over-TCP flow holding more than one maximal message is out of sync
+MAX_TCP_BUFFER = 2 + 65535
+
+
+def iter_dns_messages(stream):
+    """
+    Yield (ts_sec, transport, client, server, client_port, message) for every
+    DNS message to or from port 53 in a pcap/pcapng stream: UDP datagrams
+    and length-prefixed DNS-over-TCP, reassembled per flow. client and
+    server are address text; payloads that do not parse are skipped.
+    """
+    decodable = set()
+    skipped = set()
+    addresses = {}
+    tcp_flows = {}  # (src, dst, sport, dport) -> (next expected seq, partial message bytes)
+    for linktype, ts_sec, _, data in iter_packets(stream):
+        if linktype not in decodable:
+            if linktype in skipped:
+                continue
+            if not can_decode(linktype):
+                print(f"[!] Warning: skipping DNS in frames of unsupported link type {linktype}")
+                skipped.add(linktype)
+                continue
+            decodable.add(linktype)
+        segment = transport_payload(linktype, data)
+        if segment is None or not segment[6]:
+            continue
+        _, src, dst, sport, dport, _, _ = segment
+        if sport != DNS_PORT and dport != DNS_PORT:
+            continue
+
+        for transport, message in _segment_messages(tcp_flows, segment):
+            if message.is_response:
+                client, server, client_port = dst, src, dport
+            else:
+                client, server, client_port = src, dst, sport
+            for addr in (client, server):
+                if addr not in addresses:
+                    addresses[addr] = ip_to_str(addr)
+            yield ts_sec, transport, addresses[client], addresses[server], client_port, message
+
+
+def _segment_messages(tcp_flows, segment):
+    """(transport, DnsMessage) for each message a port-53 transport_payload segment completes."""
+    proto, src, dst, sport, dport, seq, payload = segment
+    if proto == IPPROTO_UDP:
+        transport, payloads = "UDP", (payload,)
+    else:
+        transport, payloads = "TCP", _tcp_messages(tcp_flows, (src, dst, sport, dport), seq, payload)
+    for raw in payloads:
+        message = _parse_or_none(raw)
+        if message is not None:
+            yield transport, message
+
+
+def _parse_or_none(raw):
+    try:
+        return parse_dns_message(raw)
+    except (DnsFormatError, IndexError, struct.error):
+        return None
+
+
+def _tcp_messages(flows, flow, seq, payload):
+    """Complete DNS messages of one TCP segment, joined with what the flow had buffered."""
+    next_seq = (seq + len(payload)) & 0xFFFFFFFF
+    state = flows.pop(flow, None)
+    if state is not None:
+        expected, buffered = state
+        if seq == expected:
+            payload = buffered + payload
+        elif (seq - expected) & 0xFFFFFFFF > 0x7FFFFFFF:
+            flows[flow] = state  # retransmission of bytes already buffered
+            return ()
+        # else a segment was lost; resynchronise on this one
+
+    messages = []
+    pos = 0
+    while len(payload) - pos >= 2:
+        size = (payload[pos] << 8) | payload[pos + 1]
+        if len(payload) - pos - 2 < size:
+            break
+        messages.append(payload[pos + 2:pos + 2 + size])
+        pos += 2 + size
+    if pos < len(payload) and len(payload) - pos <= MAX_TCP_BUFFER:
+        flows[flow] = (next_seq, payload[pos:])
+    return messages
+
+
+def _remember_answers(names, message):
+    """Point every address a successful response resolved at the name that was asked."""
+    if message.is_response and message.rcode == 0:
+        for address in answer_addresses(message):
+            names[address] = message.qname
+
+
+class DnsNameCollector:
+    """
+    dns_name_map built from packets fed one at a time, so a pass made for
+    something else (e.g. bandwidth aggregation) collects it on the way
+    instead of decoding the capture again. names maps address text to domain.
+    """
+
+    def __init__(self):
+        self.names = {}
+        self._tcp_flows = {}
+
+    def add_frame(self, linktype, data):
+        """A captured frame already known to be to or from DNS_PORT."""
+        segment = transport_payload(linktype, data)
+        if segment is not None and segment[6]:
+            for _, message in _segment_messages(self._tcp_flows, segment):
+                _remember_answers(self.names, message)
+
+    def add_payload(self, raw):
+        """A DNS message as carried in a UDP datagram."""
+        message = _parse_or_none(raw)
+        if message is not None:
+            _remember_answers(self.names, message)
+
+
+def iter_dns_pcap_queries(stream, chunk_rows, names=None):
+    """
+    Capture counterpart of iter_dns_queries: (timestamps, domains) lists of
+    up to chunk_rows lookups. Each lookup is reported once, at its query; a
+    response whose query was not captured stands in for it. If names is a
+    dict it is filled with answer address -> queried name on the way.
+    """
+    open_queries = OrderedDict()
+    timestamps, domains = [], []
+    last_sec = last_time = None
+    for ts_sec, _, client, server, client_port, message in iter_dns_messages(stream):
+        key = (client, server, client_port, message.id, message.qname)
+        if message.is_response:
+            if names is not None:
+                _remember_answers(names, message)
+            if open_queries.pop(key, False):
+                continue
+        else:
+            open_queries[key] = True
+            if len(open_queries) > MAX_OPEN_QUERIES:
+                open_queries.popitem(last=False)
+        if not message.qname:
+            continue
+        if ts_sec != last_sec:
+            last_sec, last_time = ts_sec, datetime.fromtimestamp(ts_sec)
+        timestamps.append(last_time)
+        domains.append(message.qname)
+        if len(domains) >= chunk_rows:
+            yield timestamps, domains
+            timestamps, domains = [], []
+    if domains:
+        yield timestamps, domains
+
+
+def extract_dns_records(pcap_path):
+    """
+    Every DNS query and response in a capture (pcap or pcapng, plain or
+    gzip/zstd compressed) in one streaming pass. Returns (records_df, names)
+    where records_df has DNS_RECORD_COLUMNS and names maps each answer
+    address to the name it was resolved for (see dns_name_map).
+    """
+    rows = []
+    names = {}
+    with open(pcap_path, "rb", buffering=1024 * 1024) as f, open_decompressed(f) as stream:
+        for ts_sec, transport, client, server, _, message in iter_dns_messages(stream):
+            _remember_answers(names, message)
+            rows.append([
+                datetime.fromtimestamp(ts_sec), client, server, transport,
+                "Response" if message.is_response else "Query",
+                message.qname, qtype_name(message.qtype),
+                rcode_name(message.rcode) if message.is_response else "",
+                ", ".join(answer_addresses(message)),
+            ])
+    return pd.DataFrame(rows, columns=DNS_RECORD_COLUMNS), names
+
+
+def dns_name_map(pcap_path):
+    """
+    {address text: domain} from the DNS answers captured alongside the
+    traffic, so destinations can be named without any network lookups.
+    When an address was handed out for several names the latest wins.
+    """
+    names = {}
+    try:
+        with open(pcap_path, "rb", buffering=1024 * 1024) as f, open_decompressed(f) as stream:
+            for *_, message in iter_dns_messages(stream):
+                _remember_answers(names, message)
+    except PcapFormatError as e:
+        print(f"[!] Warning: DNS answers could not be read from {pcap_path}. {e}")
+    return names
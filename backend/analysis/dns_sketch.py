@@ -0,0 +1,274 @@
+# backend/analysis/dns_sketch.py
+
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from backend.analysis.dns_log_parser import (
+    DNS_CHUNK_ROWS, WORK_HOURS_END, WORK_HOURS_START, domain_verdict, open_dns_queries,
+    prefetch_threat_intel, resolve_dns_log_paths
+)
+from backend.analysis.dns_tunneling import parent_domains
+from backend.utils.file_hash import calculate_hashes, drain
+from backend.utils.sketches import CountMinSketch, HeavyHitters, HyperLogLog, HyperLogLogGrid, hash64
+
+REPORT_DIR = "reports/dns_logs"
+SKETCH_TOP_K = 100
+# Bump when the saved layout changes; older sketches are refused rather than misread
+SKETCH_VERSION = 1
+
+
+class DnsSketch:
+    """
+    One-pass, fixed-memory summary of DNS queries (about 5 MB whatever the
+    log size): HyperLogLogs of distinct names and parent domains, distinct
+    names per parent, Count-Min heavy hitters for names and parents, and
+    an hour-of-day histogram. Sketches of different logs, runs or devices
+    merge into the sketch of all their queries.
+    """
+
+    def __init__(self, top_k=SKETCH_TOP_K):
+        self.queries = 0
+        self.after_hours = 0
+        self.first_seen = None  # local time as epoch-like seconds
+        self.last_seen = None
+        self.hours = np.zeros(24, dtype=np.int64)
+        self.domains = HyperLogLog()
+        self.parents = HyperLogLog()
+        self.subdomains = HyperLogLogGrid()
+        self.top_domains = HeavyHitters(top_k)
+        self.top_parents = HeavyHitters(top_k)
+        self.sources = []  # [(path, sha256)] of every log summarised
+
+    def update(self, timestamps, domains):
+        """Fold one chunk of queries (as from iter_dns_queries) into the sketch."""
+        codes, names = pd.factorize(pd.Series(domains, dtype=object).str.lower())
+        if not len(names):
+            return
+        parent_codes, parents = pd.factorize(parent_domains(names))
+        name_hashes = hash64(names)
+        parent_hashes = hash64(parents)
+        name_counts = np.bincount(codes, minlength=len(names))
+
+        self.domains.add_hashes(name_hashes)
+        self.parents.add_hashes(parent_hashes)
+        self.subdomains.add_hashes(parent_hashes[parent_codes], name_hashes)
+        self.top_domains.add(names, name_hashes, name_counts)
+        self.top_parents.add(parents, parent_hashes, np.bincount(parent_codes, weights=name_counts, minlength=len(parents)))
+
+        seconds = pd.Series(timestamps).to_numpy(dtype="datetime64[s]").astype(np.int64)
+        hours = (seconds // 3600) % 24
+        self.hours += np.bincount(hours, minlength=24)
+        self.after_hours += int(np.count_nonzero((hours < WORK_HOURS_START) | (hours >= WORK_HOURS_END)))
+        self.queries += len(codes)
+        first, last = int(seconds.min()), int(seconds.max())
+        self.first_seen = first if self.first_seen is None else min(self.first_seen, first)
+        self.last_seen = last if self.last_seen is None else max(self.last_seen, last)
+
+    def merge(self, other):
+        self.queries += other.queries
+        self.after_hours += other.after_hours
+        self.hours += other.hours
+        for attr, pick in (("first_seen", min), ("last_seen", max)):
+            values = [v for v in (getattr(self, attr), getattr(other, attr)) if v is not None]
+            setattr(self, attr, pick(values) if values else None)
+        self.domains.merge(other.domains)
+        self.parents.merge(other.parents)
+        self.subdomains.merge(other.subdomains)
+        self.top_domains.merge(other.top_domains)
+        self.top_parents.merge(other.top_parents)
+        self.sources.extend(other.sources)
+        return self
+
+    def summary(self):
+        """
+        {"totals": dict, "top_domains", "top_parents", "hours": DataFrames}.
+        Top domains get their heuristic verdict from the rules and cached
+        threat intel only; nothing is looked up.
+        """
+        domains = self.top_domains.top()
+        names = [name for name, _ in domains]
+        intel = prefetch_threat_intel(names, timeout=0)
+        verdicts = [domain_verdict(name, intel=intel) for name in names]
+        top_domains = pd.DataFrame({
+            "Domain": names,
+            "Estimated Queries": [count for _, count in domains],
+            "Parent Domain": parent_domains(pd.Series(names, dtype=object)).tolist() if names else [],
+            "Heuristic Risk": [verdict[0] for verdict in verdicts],
+            "Reason": [verdict[1] for verdict in verdicts],
+        })
+        parents = self.top_parents.top()
+        parent_names = [parent for parent, _ in parents]
+        top_parents = pd.DataFrame({
+            "Parent Domain": parent_names,
+            "Estimated Queries": [count for _, count in parents],
+            "Distinct Subdomains": np.rint(self.subdomains.count(parent_names)).astype(np.int64),
+        })
+        totals = {
+            "Queries": self.queries,
+            "Distinct Domains": round(self.domains.count()),
+            "Distinct Parent Domains": round(self.parents.count()),
+            "After-Hours Queries": self.after_hours,
+            "First Seen": _local_time(self.first_seen),
+            "Last Seen": _local_time(self.last_seen),
+            "Sources": len(self.sources),
+        }
+        hours = pd.DataFrame({"Hour": np.arange(24), "Queries": self.hours})
+        return {"totals": totals, "top_domains": top_domains, "top_parents": top_parents, "hours": hours}
+
+    def save(self, path):
+        """Write the sketch as .npz; load_dns_sketch reads it back for merging."""
+        candidates = {}
+        for name, hitters in (("domain", self.top_domains), ("parent", self.top_parents)):
+            candidates[f"{name}_candidates"] = np.array(list(hitters.candidates), dtype=str)
+            candidates[f"{name}_candidate_hashes"] = np.array(list(hitters.candidates.values()), dtype=np.uint64)
+            candidates[f"{name}_counts"] = hitters.sketch.table
+        tmp_path = path + ".tmp.npz"
+        np.savez_compressed(
+            tmp_path,
+            version=SKETCH_VERSION,
+            top_k=self.top_domains.k,
+            scalars=np.array([self.queries, self.after_hours, _or_missing(self.first_seen), _or_missing(self.last_seen)]),
+            hours=self.hours,
+            domain_registers=self.domains.registers,
+            parent_registers=self.parents.registers,
+            subdomain_registers=self.subdomains.registers,
+            source_paths=np.array([source for source, _ in self.sources], dtype=str),
+            source_sha256=np.array([digest for _, digest in self.sources], dtype=str),
+            **candidates,
+        )
+        os.replace(tmp_path, path)
+        return path
+
+
+def _or_missing(seconds):
+    return -1 if seconds is None else seconds
+
+
+def _local_time(seconds):
+    return None if seconds is None else pd.Timestamp(seconds, unit="s").to_pydatetime()
+
+
+def load_dns_sketch(path):
+    """A DnsSketch saved by DnsSketch.save."""
+    with np.load(path) as data:
+        if int(data["version"]) != SKETCH_VERSION:
+            raise ValueError(f"{path} is a version {int(data['version'])} DNS sketch; expected {SKETCH_VERSION}")
+        sketch = DnsSketch(int(data["top_k"]))
+        queries, after_hours, first_seen, last_seen = data["scalars"].tolist()
+        sketch.queries, sketch.after_hours = queries, after_hours
+        sketch.first_seen = None if first_seen < 0 else first_seen
+        sketch.last_seen = None if last_seen < 0 else last_seen
+        sketch.hours = data["hours"].copy()
+        sketch.domains = HyperLogLog(registers=data["domain_registers"].copy())
+        sketch.parents = HyperLogLog(registers=data["parent_registers"].copy())
+        registers = data["subdomain_registers"].copy()
+        depth, buckets, size = registers.shape
+        sketch.subdomains = HyperLogLogGrid(buckets, depth, size.bit_length() - 1, registers)
+        for name, hitters in (("domain", sketch.top_domains), ("parent", sketch.top_parents)):
+            table = data[f"{name}_counts"].copy()
+            hitters.sketch = CountMinSketch(table.shape[1], table.shape[0], table)
+            hitters.candidates = dict(zip(data[f"{name}_candidates"].tolist(), data[f"{name}_candidate_hashes"]))
+        sketch.sources = list(zip(data["source_paths"].tolist(), data["source_sha256"].tolist()))
+    return sketch
+
+
+def merge_dns_sketches(paths):
+    """One DnsSketch covering every saved sketch in paths (files, runs or devices)."""
+    if not paths:
+        return DnsSketch()
+    sketch = load_dns_sketch(paths[0])
+    for path in paths[1:]:
+        sketch.merge(load_dns_sketch(path))
+    return sketch
+
+
+def _sketch_dns_file(file_path, top_k, chunk_rows, progress=None):
+    sketch = DnsSketch(top_k)
+    total_bytes = os.path.getsize(file_path)
+    f, hashing, chunks = open_dns_queries(file_path, chunk_rows)
+    with f:
+        for timestamps, domains in chunks:
+            sketch.update(timestamps, domains)
+            if progress:
+                progress(hashing.bytes_read, total_bytes, sketch.queries)
+        drain(f)
+    sketch.sources.append((file_path, hashing.hexdigests()["sha256"]))
+    return sketch
+
+
+def sketch_dns_logs(file_path, top_k=SKETCH_TOP_K, chunk_rows=DNS_CHUNK_ROWS, progress=None, workers=None,
+                    merge_with=()):
+    """
+    Sketch mode of the DNS analyser: one pass over a log, capture,
+    directory or glob (see resolve_dns_log_paths) into a DnsSketch, without
+    keeping or scoring every row. Several files are sketched across
+    `workers` processes and merged; merge_with adds saved sketches (e.g.
+    from other devices of the case). Returns (summary, sketch_path,
+    hash_path, zip_path) with summary as in DnsSketch.summary().
+    """
+    paths = resolve_dns_log_paths(file_path)
+    sketch = DnsSketch(top_k)
+    if len(paths) == 1:
+        sketch.merge(_sketch_dns_file(paths[0], top_k, chunk_rows, progress))
+    else:
+        workers = min(workers or os.cpu_count() or 1, max(len(paths), 1))
+        total_bytes = sum(os.path.getsize(path) for path in paths)
+        sketches = [None] * len(paths)
+        bytes_done = 0
+
+        def done(i, part):
+            nonlocal bytes_done
+            sketches[i] = part
+            bytes_done += os.path.getsize(paths[i])
+            if progress:
+                progress(bytes_done, total_bytes, sum(s.queries for s in sketches if s is not None))
+
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {pool.submit(_sketch_dns_file, path, top_k, chunk_rows): i for i, path in enumerate(paths)}
+                for future in as_completed(futures):
+                    done(futures[future], future.result())
+        else:
+            for i, path in enumerate(paths):
+                done(i, _sketch_dns_file(path, top_k, chunk_rows))
+        # Merge in path order, so sources and ties rank the same however the pool finished
+        for part in sketches:
+            sketch.merge(part)
+    for path in merge_with:
+        sketch.merge(load_dns_sketch(path))
+    return export_dns_sketch(sketch)
+
+
+def export_dns_sketch(sketch, report_dir=REPORT_DIR):
+    """
+    Write the sketch (.npz, mergeable), its summary tables as CSV, a hash
+    manifest of those files and the summarised logs, and a zip of all.
+    """
+    os.makedirs(report_dir, exist_ok=True)
+    timestamp_str = datetime.now().strftime("%Y%m%d_%H%M%S")
+    summary = sketch.summary()
+    sketch_path = sketch.save(os.path.join(report_dir, f"dns_sketch_{timestamp_str}.npz"))
+    outputs = [sketch_path]
+    for table in ("top_domains", "top_parents", "hours"):
+        csv_path = os.path.join(report_dir, f"dns_sketch_{table}_{timestamp_str}.csv")
+        summary[table].to_csv(csv_path, index=False)
+        outputs.append(csv_path)
+
+    hash_path = os.path.join(report_dir, f"hash_sketch_{timestamp_str}.txt")
+    with open(hash_path, "w") as h:
+        for path in outputs:
+            h.write(f"SHA256: {calculate_hashes(path, ('sha256',))['sha256']}\nFile: {path}\n")
+        for source_path, source_sha256 in sketch.sources:
+            h.write(f"Source: {source_path}\nSource SHA256: {source_sha256}\n")
+
+    zip_path = os.path.join("reports/zipped_reports", f"dns_sketch_{timestamp_str}.zip")
+    os.makedirs(os.path.dirname(zip_path), exist_ok=True)
+    with zipfile.ZipFile(zip_path, "w") as z:
+        for path in outputs + [hash_path]:
+            z.write(path, os.path.basename(path))
+    return summary, sketch_path, hash_path, zip_path
@@ -0,0 +1,204 @@
+# backend/analysis/dns_tunneling.py
+
+import numpy as np
+import pandas as pd
+
+# Tumbling window for the per-parent-domain counters
+TUNNEL_WINDOW_SECONDS = 60
+# Public suffixes one level deeper than the TLD; names under them are registered a label further left
+TWO_LEVEL_SUFFIXES = {
+    "co.uk", "org.uk", "ac.uk", "gov.uk", "com.au", "net.au", "org.au", "co.in", "net.in", "org.in",
+    "co.jp", "ne.jp", "com.br", "com.cn", "co.za", "co.nz", "com.mx", "com.tr", "co.kr", "com.sg",
+}
+DOMAIN_FEATURE_COLUMNS = ["label_entropy", "longest_label", "digit_ratio", "consonant_ratio", "subdomain_length"]
+WINDOW_FEATURE_COLUMNS = ["unique_subdomains", "parent_query_rate"]
+TUNNELING_FEATURE_COLUMNS = ["parent_domain"] + DOMAIN_FEATURE_COLUMNS + WINDOW_FEATURE_COLUMNS
+
+# A parent answering this many distinct names in one window, with random-looking labels, is a tunnel
+MIN_TUNNEL_SUBDOMAINS = 30
+MIN_TUNNEL_ENTROPY = 3.5
+MIN_TUNNEL_LABEL = 40
+# A single name carrying this much subdomain is exfiltration on its own
+EXFIL_SUBDOMAIN_LENGTH = 100
+TUNNEL_RISK = "High"
+TUNNEL_REASON = "DNS Tunneling Pattern"
+
+_CONSONANTS = np.zeros(256, dtype=bool)
+_CONSONANTS[np.frombuffer(b"bcdfghjklmnpqrstvwxyz", dtype=np.uint8)] = True
+_DOT = ord(".")
+
+
+def parent_domains(domains):
+    """Registered domain of each name: the last two labels, or three under TWO_LEVEL_SUFFIXES."""
+    domains = pd.Series(domains, dtype=object)
+    last_two = domains.str.extract(r"([^.]+\.[^.]+)$", expand=False)
+    last_three = domains.str.extract(r"([^.]+\.[^.]+\.[^.]+)$", expand=False)
+    parents = last_two.where(~last_two.isin(TWO_LEVEL_SUFFIXES) | last_three.isna(), last_three)
+    return parents.fillna(domains)
+
+
+def domain_char_features(domains):
+    """
+    DOMAIN_FEATURE_COLUMNS (plus parent_domain) for lower-cased names,
+    computed over a byte matrix with one row per name. Entropy and the
+    digit/consonant ratios cover the subdomain labels, the part a tunnel
+    controls; for a bare registered domain, its first label.
+    """
+    domains = pd.Series(domains, dtype=object).reset_index(drop=True)
+    parents = parent_domains(domains)
+    n = len(domains)
+    lengths = domains.str.len().to_numpy(dtype=np.int64)
+    subdomain_length = np.maximum(lengths - parents.str.len().to_numpy(dtype=np.int64) - 1, 0)
+    width = int(lengths.max()) if n else 1
+    encoded = domains.str.encode("ascii", errors="replace").to_numpy().astype(f"S{max(width, 1)}")
+    chars = np.frombuffer(encoded.tobytes(), dtype=np.uint8).reshape(n, max(width, 1))
+
+    is_dot = chars == _DOT
+    first_dot = np.where(is_dot.any(axis=1), is_dot.argmax(axis=1), lengths)
+    end = np.where(subdomain_length > 0, subdomain_length, first_dot)
+    columns = np.arange(chars.shape[1])
+    in_window = (columns < end[:, None]) & ~is_dot
+    counted = in_window.sum(axis=1)
+    denominator = np.maximum(counted, 1)
+
+    # Character entropy from the run lengths of each row's sorted window bytes
+    ordered = np.sort(np.where(in_window, chars, 0), axis=1)
+    valid = ordered != 0
+    starts = valid.copy()
+    starts[:, 1:] &= ordered[:, 1:] != ordered[:, :-1]
+    run_ids = np.cumsum(starts.ravel()) - 1
+    run_counts = np.bincount(run_ids[valid.ravel()], minlength=int(starts.sum()))
+    run_rows = np.flatnonzero(starts.ravel()) // chars.shape[1]
+    p = run_counts / denominator[run_rows]
+    entropy = np.bincount(run_rows, weights=-p * np.log2(p), minlength=n) if n else np.zeros(0)
+
+    # Label lengths are the gaps between consecutive dots (and the end of the name)
+    bounds = np.zeros((n, chars.shape[1] + 1), dtype=bool)
+    bounds[:, :-1] = is_dot
+    bounds[np.arange(n), lengths] = True
+    flat = np.flatnonzero(bounds.ravel())
+    rows, cols = np.divmod(flat, chars.shape[1] + 1)
+    row_start = np.r_[True, rows[1:] != rows[:-1]] if n else np.zeros(0, dtype=bool)
+    previous = np.r_[-1, cols[:-1]] if n else cols
+    previous = np.where(row_start, -1, previous)
+    longest = np.maximum.reduceat(cols - previous - 1, np.flatnonzero(row_start)) if n else np.zeros(0, np.int64)
+
+    is_digit = (chars >= ord("0")) & (chars <= ord("9"))
+    return pd.DataFrame({
+        "parent_domain": parents.to_numpy(dtype=object),
+        "label_entropy": entropy,
+        "longest_label": longest.astype(np.int64),
+        "digit_ratio": (is_digit & in_window).sum(axis=1) / denominator,
+        "consonant_ratio": (_CONSONANTS[chars] & in_window).sum(axis=1) / denominator,
+        "subdomain_length": subdomain_length,
+    })
+
+
+class TunnelingFeatureEngine:
+    """
+    TUNNELING_FEATURE_COLUMNS for chunks of queries in log order. Character
+    features are computed once per distinct name in a chunk; the window
+    features count, per parent domain and window_seconds tumbling window,
+    the queries and distinct names seen so far, including the current one.
+    Counters of the two newest windows are carried across chunks, so the
+    result does not depend on how a log is chunked.
+    """
+
+    def __init__(self, window_seconds=TUNNEL_WINDOW_SECONDS):
+        self.window_seconds = window_seconds
+        self._windows = {}  # (parent, window) -> [queries, set of names]
+        self._latest = None
+
+    def transform(self, domains, timestamps):
+        domains = pd.Series(domains, dtype=object).reset_index(drop=True)
+        n = len(domains)
+        if not n:
+            return pd.DataFrame(columns=TUNNELING_FEATURE_COLUMNS)
+        codes, uniques = pd.factorize(domains)
+        lower_codes, names = pd.factorize(pd.Series(uniques, dtype=object).str.lower())
+        codes = lower_codes[codes]
+        per_name = domain_char_features(names)
+        parent_codes, parents = pd.factorize(per_name["parent_domain"])
+        row_parent = parent_codes[codes]
+
+        seconds = pd.Series(timestamps).to_numpy(dtype="datetime64[s]").astype(np.int64)
+        window = seconds // self.window_seconds
+        first_window = int(window.min())
+        span = int(window.max()) - first_window + 1
+        groups, group_keys = pd.factorize(row_parent.astype(np.int64) * span + (window - first_window))
+
+        order = np.argsort(groups, kind="stable")
+        sorted_groups = groups[order]
+        sorted_names = codes[order]
+        index = np.arange(n)
+        group_start = np.r_[True, sorted_groups[1:] != sorted_groups[:-1]]
+        start_of = np.maximum.accumulate(np.where(group_start, index, 0))
+        _, first = np.unique(sorted_groups.astype(np.int64) * len(names) + sorted_names, return_index=True)
+        is_new = np.zeros(n, dtype=bool)
+        is_new[first] = True
+
+        # Counters carried over from earlier chunks for the same parent and window
+        group_parent, group_window = np.divmod(np.asarray(group_keys, dtype=np.int64), span)
+        group_window = group_window + first_window
+        carried_queries = np.zeros(len(group_keys), dtype=np.int64)
+        carried_names = np.zeros(len(group_keys), dtype=np.int64)
+        carried_sets = {}
+        for g, (p, w) in enumerate(zip(group_parent.tolist(), group_window.tolist())):
+            state = self._windows.get((parents[p], w))
+            if state is not None:
+                carried_queries[g], carried_names[g] = state[0], len(state[1])
+                carried_sets[g] = state[1]
+        if carried_sets:
+            for i in first.tolist():
+                seen = carried_sets.get(sorted_groups[i])
+                if seen is not None and names[sorted_names[i]] in seen:
+                    is_new[i] = False
+
+        new_so_far = np.cumsum(is_new)
+        unique_subdomains = carried_names[sorted_groups] + new_so_far - new_so_far[start_of] + is_new[start_of]
+        queries = carried_queries[sorted_groups] + index - start_of + 1
+
+        out_unique = np.empty(n, dtype=np.int64)
+        out_unique[order] = unique_subdomains
+        out_queries = np.empty(n, dtype=np.int64)
+        out_queries[order] = queries
+        self._carry(group_parent, group_window, parents, names, sorted_groups, sorted_names, is_new, start_of)
+
+        features = per_name.iloc[codes].reset_index(drop=True)
+        features["unique_subdomains"] = out_unique
+        features["parent_query_rate"] = out_queries / self.window_seconds
+        return features[TUNNELING_FEATURE_COLUMNS]
+
+    def _carry(self, group_parent, group_window, parents, names, sorted_groups, sorted_names, is_new, start_of):
+        """Keep the counters of the two newest windows for the next chunk; drop older ones."""
+        latest = int(group_window.max())
+        if self._latest is None or latest > self._latest:
+            self._latest = latest
+        keep = group_window >= self._latest - 1
+        if not keep.any():
+            return
+        group_ends = np.r_[np.flatnonzero(sorted_groups[1:] != sorted_groups[:-1]), len(sorted_groups) - 1]
+        group_sizes = np.zeros(len(group_parent), dtype=np.int64)
+        group_sizes[sorted_groups[group_ends]] = group_ends - start_of[group_ends] + 1
+        states = {}
+        for g in np.flatnonzero(keep).tolist():
+            key = (parents[group_parent[g]], int(group_window[g]))
+            state = self._windows.setdefault(key, [0, set()])
+            state[0] += int(group_sizes[g])
+            states[g] = state[1]
+        for i in np.flatnonzero(is_new & keep[sorted_groups]).tolist():
+            states[sorted_groups[i]].add(names[sorted_names[i]])
+        for key in [key for key in self._windows if key[1] < self._latest - 1]:
+            del self._windows[key]
+
+
+def tunneling_features(domains, timestamps, window_seconds=TUNNEL_WINDOW_SECONDS):
+    """TUNNELING_FEATURE_COLUMNS for one batch of queries, in log order."""
+    return TunnelingFeatureEngine(window_seconds).transform(domains, timestamps)
+
+
+def tunneling_suspects(features):
+    """Boolean array: rows whose features look like DNS tunneling or exfiltration."""
+    random_labels = (features["label_entropy"] >= MIN_TUNNEL_ENTROPY) | (features["longest_label"] >= MIN_TUNNEL_LABEL)
+    busy_parent = features["unique_subdomains"] >= MIN_TUNNEL_SUBDOMAINS
+    return ((busy_parent & random_labels) | (features["subdomain_length"] >= EXFIL_SUBDOMAIN_LENGTH)).to_numpy()
@@ -15,6 +15,7 @@ from backend.zip_exporter  import zip_report
 from backend.session_logger import log_session
 from backend.extract.adb_connector import get_adb_device_name
 from backend.zip_exporter import zip_and_hash
+from backend.utils.domain_rules import get_domain_matcher
 
 
 
@@ -22,7 +23,8 @@ from backend.zip_exporter import zip_and_hash
 # Constants
 LOCAL_PULL_DIR = "local_pull_dir"
 OUTPUT_DIR = "reports/email_headers"
-SUSPICIOUS_DOMAINS = [".onion", ".xyz", ".tk", "mailinator.com", "tempmail", "yopmail"]
+# Suspicious sender domains: "email_header" ruleset of the domain rules file
+EMAIL_HEADER_RULESET = "email_header"
 SUPPORTED_MAIL_EXTS = (".eml", ".mbox", ".msg")
 
 def extract_ip_from_received(received_headers):
@@ -47,7 +49,7 @@ def extract_spf_dkim_dmarc(header_text):
     return spf, dkim, dmarc
 
 def is_suspicious_domain(domain):
-    return any(susp in domain.lower() for susp in SUSPICIOUS_DOMAINS)
+    return get_domain_matcher(EMAIL_HEADER_RULESET).match(domain) is not None
 
 def extract_body_from_msg(msg_obj):
     body = ""
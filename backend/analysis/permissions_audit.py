@@ -2,17 +2,15 @@
 
 import os
 import json
-import hashlib
 import zipfile
 import logging
 import datetime
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 from typing import Dict, List
 from ai_models.permission_model.predictor import PermissionRiskPredictor
 from backend.zip_exporter import compute_file_hash
+from backend.utils.file_hash import calculate_hashes, drain, open_hashed_text
 
 logging.basicConfig(level=logging.INFO)
 
@@ -20,6 +18,8 @@ OUTPUT_DIR = "reports/permissions"
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
 HASH_TYPES = ["sha256", "md5"]
+# Extracted dumps (permissions plus the logcat capture), as written or archived compressed
+DUMP_SUFFIXES = (".json", ".json.gz", ".json.zst")
 RISK_LEVEL = "Risk Level"
 
 DANGEROUS_PERMISSIONS = [
@@ -29,18 +29,22 @@ DANGEROUS_PERMISSIONS = [
 ]
 
 def generate_file_hashes(file_path: str) -> Dict[str, str]:
-    hashes = {}
-    with open(file_path, "rb") as f:
-        data = f.read()
-        if "sha256" in HASH_TYPES:
-            hashes["sha256"] = hashlib.sha256(data).hexdigest()
-        if "md5" in HASH_TYPES:
-            hashes["md5"] = hashlib.md5(data).hexdigest()
-    return hashes
-
-def load_extracted_json(json_path: str) -> Dict:
-    with open(json_path, "r") as f:
-        return json.load(f)
+    # One chunked read feeds every digest; the file is never fully buffered
+    return calculate_hashes(file_path, HASH_TYPES)
+
+def load_extracted_json(json_path: str, with_hashes: bool = False):
+    """
+    Load an extracted permissions dump, plain or gzip/zstd compressed. With
+    with_hashes, also return the dump's HASH_TYPES digests, taken from the
+    same read that parses it.
+    """
+    f, hashing = open_hashed_text(json_path, HASH_TYPES)
+    with f:
+        data = json.load(f)
+        drain(f)
+    if with_hashes:
+        return data, hashing.hexdigests()
+    return data
 
 def analyze_permissions(json_data: Dict) -> pd.DataFrame:
   if isinstance(json_data, list):
@@ -139,6 +143,10 @@ def generate_report(json_data, predictor: PermissionRiskPredictor) -> str:
 
 
 def generate_visualizations(csv_path: str):
+    # Plotting libraries take seconds to import; only reports need them
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
     df = pd.read_csv(csv_path)
     sns.set(style="whitegrid")
     plt.figure(figsize=(10, 6))
@@ -167,7 +175,8 @@ def zip_report_components(report_csv: str):
 # Entry point for full report generation
 if __name__ == "__main__":
     extracted_file = os.path.join("extracted_data", sorted(os.listdir("extracted_data"))[-1])
-    data = load_extracted_json(extracted_file)
+    data, source_hashes = load_extracted_json(extracted_file, with_hashes=True)
+    logging.info(f"Source Hashes ({extracted_file}): {source_hashes}")
     predictor = PermissionRiskPredictor()
     report_csv = generate_report(data, predictor)
     generate_visualizations(report_csv)
@@ -4,12 +4,19 @@ import os
 import ssl
 import socket
 import subprocess
+import shutil
+import threading
 import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
 from OpenSSL import crypto
 from backend.utils.csv_writer import write_csv
 from backend.session_logger import save_to_db
 from backend.zip_exporter import zip_report
+from backend.utils.pcap_reader import (
+    IPPROTO_TCP, PcapFormatError, can_decode, iter_packets, open_decompressed, transport_payload
+)
 
 PCAP_FILE = "data/traffic.pcap"
 OUTPUT_DIR = "forensics_output/ssl"
@@ -17,6 +24,18 @@ KNOWN_TRUSTED_CN = ["Google", "WhatsApp", "Meta", "YouTube", "Amazon"]
 
 SHORT_EXPIRY_LABEL = "Short Expiry"
 FORGED_CN_LABEL = "Forged CN"
+CERT_HEADERS = [
+    "Domain", "Common Name", "Issuer", "Serial Number", "Public Key",
+    "Valid From", "Valid To", "Self-Signed", SHORT_EXPIRY_LABEL,
+    FORGED_CN_LABEL, "Suspicious"
+]
+
+# Seconds one host may take to connect and complete the handshake
+CERT_HOST_TIMEOUT = 4
+# Seconds a whole inspection may take; hosts not reached by then are reported as skipped
+CERT_BUDGET = 60
+CERT_WORKERS = 16
+BUDGET_EXHAUSTED = "Skipped: time budget exhausted"
 
 
 def pull_pcap_from_android():
@@ -28,23 +47,142 @@ def pull_pcap_from_android():
         return False
 
 
-def extract_domains_from_pcap():
-    if not os.path.exists(PCAP_FILE):
+DOMAIN_PATTERN = re.compile(r"^[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$")
+HTTP_METHODS = (b"GET ", b"POST ", b"HEAD ", b"PUT ", b"DELETE ", b"OPTIONS ", b"PATCH ", b"CONNECT ")
+TLS_HANDSHAKE = 0x16
+TLS_CLIENT_HELLO = 0x01
+TLS_EXT_SERVER_NAME = 0
+# A ClientHello larger than this is not worth reassembling
+MAX_CLIENT_HELLO = 16 * 1024
+
+
+def extract_domains_from_pcap(pcap_path=PCAP_FILE):
+    """
+    Server names contacted in a capture: TLS SNI and HTTP Host headers.
+    Reads pcap or pcapng, plain or gzip/zstd compressed, straight from the
+    file; tshark is only used for link types the native reader can't decode.
+    """
+    if not os.path.exists(pcap_path):
         return []
-    result = subprocess.run([
-        "tshark", "-r", PCAP_FILE,
-        "-Y", 'ssl.handshake.extensions_server_name || http.host',
-        "-T", "fields", "-e", "ssl.handshake.extensions_server_name", "-e", "http.host"
-    ], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    try:
+        names = _extract_server_names(pcap_path)
+    except PcapFormatError as e:
+        print(f"[!] Native capture reader failed ({e}), falling back to tshark")
+        names = _extract_server_names_tshark(pcap_path)
+    return list({name for name in names if DOMAIN_PATTERN.match(name)})
+
+
+def _extract_server_names(pcap_path):
+    names = set()
+    # TCP flow -> (next expected seq, partial ClientHello) for hellos split over segments
+    pending = {}
+    with open(pcap_path, "rb", buffering=1024 * 1024) as f, open_decompressed(f) as stream:
+        decodable = set()
+        for linktype, _, _, data in iter_packets(stream):
+            if linktype not in decodable:
+                if not can_decode(linktype):
+                    raise PcapFormatError(f"Unsupported link type {linktype}")
+                decodable.add(linktype)
+            segment = transport_payload(linktype, data)
+            if segment is None or segment[0] != IPPROTO_TCP or not segment[6]:
+                continue
+            _, src, dst, sport, dport, seq, payload = segment
+            flow = (src, dst, sport, dport)
+
+            if flow in pending:
+                expected, buffered = pending.pop(flow)
+                if seq != expected:
+                    continue  # retransmission or loss; give up on this hello
+                payload = buffered + payload
+            elif payload[0] != TLS_HANDSHAKE:
+                host = _http_host(payload)
+                if host:
+                    names.add(host)
+                continue
+            elif len(payload) < 6 or payload[5] != TLS_CLIENT_HELLO:
+                continue
 
-    domains = set()
-    for line in result.stdout.strip().split('\n'):
-        for item in line.split('\t'):
-            domain = item.strip()
-            if re.match(r"^[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$", domain):
-                domains.add(domain)
+            record_end = 5 + int.from_bytes(payload[3:5], "big")
+            if len(payload) < record_end and len(payload) < MAX_CLIENT_HELLO:
+                pending[flow] = (seq + len(segment[6]), payload)
+                continue
+            name = _tls_server_name(payload)
+            if name:
+                names.add(name)
+    return names
 
-    return list(domains)
+
+def _tls_server_name(payload):
+    """SNI host name from a TLS ClientHello record, or None."""
+    try:
+        if payload[0] != TLS_HANDSHAKE or payload[5] != TLS_CLIENT_HELLO:
+            return None
+        # record header (5) + handshake header (4) + version (2) + random (32)
+        pos = 43
+        pos += 1 + payload[pos]  # session id
+        pos += 2 + int.from_bytes(payload[pos:pos + 2], "big")  # cipher suites
+        pos += 1 + payload[pos]  # compression methods
+        end = pos + 2 + int.from_bytes(payload[pos:pos + 2], "big")
+        pos += 2
+        while pos + 4 <= end:
+            ext_type = int.from_bytes(payload[pos:pos + 2], "big")
+            ext_length = int.from_bytes(payload[pos + 2:pos + 4], "big")
+            pos += 4
+            # server_name_list length (2), name type (1, 0 = host_name), name length (2)
+            if ext_type == TLS_EXT_SERVER_NAME and payload[pos + 2] == 0:
+                length = int.from_bytes(payload[pos + 3:pos + 5], "big")
+                return payload[pos + 5:pos + 5 + length].decode("ascii", "ignore")
+            pos += ext_length
+    except IndexError:
+        pass
+    return None
+
+
+def _http_host(payload):
+    """Host header of an HTTP request, without any port, or None."""
+    if not payload.startswith(HTTP_METHODS):
+        return None
+    for line in payload.split(b"\r\n\r\n", 1)[0].split(b"\r\n")[1:]:
+        name, _, value = line.partition(b":")
+        if name.strip().lower() == b"host":
+            return value.strip().rsplit(b":", 1)[0].decode("ascii", "ignore")
+    return None
+
+
+def _extract_server_names_tshark(pcap_path):
+    # Feed tshark the decompressed capture over stdin so compressed evidence
+    # never has to be unpacked to disk.
+    try:
+        proc = subprocess.Popen([
+            "tshark", "-r", "-",
+            "-Y", 'ssl.handshake.extensions_server_name || http.host',
+            "-T", "fields", "-e", "ssl.handshake.extensions_server_name", "-e", "http.host"
+        ], stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    except FileNotFoundError:
+        print("[!] tshark is not installed; no domains extracted")
+        return set()
+
+    def feed():
+        try:
+            with open(pcap_path, "rb", buffering=1024 * 1024) as f, open_decompressed(f) as stream:
+                shutil.copyfileobj(stream, proc.stdin, 1024 * 1024)
+        except (BrokenPipeError, PcapFormatError) as e:
+            print(f"[!] Could not stream capture to tshark: {e}")
+        finally:
+            try:
+                proc.stdin.close()
+            except BrokenPipeError:
+                pass
+
+    feeder = threading.Thread(target=feed, daemon=True)
+    feeder.start()
+    names = set()
+    for line in proc.stdout:
+        for item in line.decode("utf-8", "ignore").split('\t'):
+            names.update(name.strip() for name in item.split(','))
+    proc.wait()
+    feeder.join()
+    return names
 
 
 def is_self_signed(cert):
@@ -67,16 +205,33 @@ def is_forged_cn(cert):
     return False
 
 
-def extract_certificate_info(domain):
+def _certificate_context():
+    # Inspect whatever the server presents: self-signed and otherwise
+    # untrusted certificates are exactly the ones worth recording
+    ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    ctx.check_hostname = False
+    ctx.verify_mode = ssl.CERT_NONE
+    if hasattr(ssl, "TLSVersion"):
+        ctx.minimum_version = ssl.TLSVersion.TLSv1_2
+    return ctx
+
+
+def fetch_certificate(domain, address=None, timeout=CERT_HOST_TIMEOUT):
+    """
+    DER certificate served for domain (sent as SNI) by address, a
+    (host, port) pair defaulting to (domain, 443). Connecting and the
+    handshake together take at most timeout seconds.
+    """
+    deadline = time.monotonic() + timeout
+    with socket.create_connection(address or (domain, 443), timeout=timeout) as sock:
+        sock.settimeout(max(deadline - time.monotonic(), 0.001))
+        with _certificate_context().wrap_socket(sock, server_hostname=domain) as conn:
+            return conn.getpeercert(True)
+
+
+def extract_certificate_info(domain, address=None, timeout=CERT_HOST_TIMEOUT):
     try:
-        ctx = ssl.create_default_context()
-        if hasattr(ssl, "TLSVersion"):
-            ctx.minimum_version = ssl.TLSVersion.TLSv1_2
-        conn = ctx.wrap_socket(socket.socket(), server_hostname=domain)
-        conn.settimeout(4)
-        conn.connect((domain, 443))
-        der_cert = conn.getpeercert(True)
-        x509 = crypto.load_certificate(crypto.FILETYPE_ASN1, der_cert)
+        x509 = crypto.load_certificate(crypto.FILETYPE_ASN1, fetch_certificate(domain, address, timeout))
 
         info = {
             "Domain": domain,
@@ -94,27 +249,65 @@ def extract_certificate_info(domain):
         info["Suspicious"] = ", ".join(flags) if flags else "No"
         return info
     except Exception as e:
-        return {"Domain": domain, "Error": str(e)}
+        return {"Domain": domain, "Error": str(e) or type(e).__name__}
+
+
+def iter_certificates(domains, addresses=None, host_timeout=CERT_HOST_TIMEOUT, budget=CERT_BUDGET,
+                      workers=CERT_WORKERS):
+    """
+    Yield extract_certificate_info for each domain as it completes, fetching
+    up to workers hosts at a time. addresses optionally maps a domain to the
+    (host, port) to connect to, such as the server seen in the capture.
+    Hosts still pending once budget seconds have passed are yielded with
+    BUDGET_EXHAUSTED as their error, so one slow or filtered network cannot
+    hold up the report.
+    """
+    addresses = addresses or {}
+    deadline = time.monotonic() + budget
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ssl-inspect")
+    pending = {
+        executor.submit(extract_certificate_info, domain, addresses.get(domain), host_timeout): domain
+        for domain in dict.fromkeys(domains)
+    }
+    try:
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                del pending[future]
+                yield future.result()
+        for domain in pending.values():
+            yield {"Domain": domain, "Error": BUDGET_EXHAUSTED}
+    finally:
+        # Handshakes in flight end within host_timeout; don't wait for them
+        executor.shutdown(wait=False, cancel_futures=True)
+
 
-def parse_ssl_certificates():
+def parse_ssl_certificates(on_result=None, budget=CERT_BUDGET):
+    """
+    Inspect the certificate of every server name in the capture, concurrently
+    and within budget seconds. on_result(info, done, total) is called as each
+    host completes, for live display. Returns (csv_path, zip_path, certs).
+    """
     os.makedirs(OUTPUT_DIR, exist_ok=True)
     domains = extract_domains_from_pcap()
     if not domains:
         return None, None, []
 
-    certs = [extract_certificate_info(d) for d in domains]
+    certs = []
+    for info in iter_certificates(domains, budget=budget):
+        certs.append(info)
+        if on_result:
+            on_result(info, len(certs), len(domains))
+    certs.sort(key=lambda c: c["Domain"])
 
-    headers = [
-        "Domain", "Common Name", "Issuer", "Serial Number", "Public Key",
-        "Valid From", "Valid To", "Self-Signed", SHORT_EXPIRY_LABEL,
-        FORGED_CN_LABEL, "Suspicious"
-    ]
-    rows = [[c.get(h, "") for h in headers] for c in certs]
+    rows = [[c.get(h, "") for h in CERT_HEADERS] for c in certs]
 
-    csv_path = write_csv(rows, headers, os.path.join(OUTPUT_DIR, "ssl_certificates.csv"))
+    csv_path = write_csv(rows, CERT_HEADERS, os.path.join(OUTPUT_DIR, "ssl_certificates.csv"))
     zip_path = os.path.join(OUTPUT_DIR, "ssl_certificates.zip")
     zip_report(OUTPUT_DIR, zip_path)
     save_to_db(datetime.now().isoformat(), "N/A", csv_path, None, workflow="ssl")
 
     return csv_path, zip_path, certs
-
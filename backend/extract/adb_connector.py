@@ -3,6 +3,7 @@ import subprocess
 from datetime import datetime
 from backend.utils.file_hash import hash_all_files
 SDCARD_PCAP_PATH = "/sdcard/capture.pcap"
+SDCARD_DNS_LOG_PATH = "/sdcard/dns_log.txt"
 def is_adb_device_connected():
     """Check if an Android device is connected via ADB."""
     try:
@@ -110,7 +111,7 @@ def pull_dns_logs_from_device():
     dest = os.path.join(output_dir, filename)
     
     try:
-        subprocess.run(["adb", "pull", "/sdcard/dns_log.txt", dest], check=True)
+        subprocess.run(["adb", "pull", SDCARD_DNS_LOG_PATH, dest], check=True)
         return dest
     except Exception as e:
         print(f"[ADB Pull] Error: {e}")
@@ -163,4 +164,15 @@ def pull_pcap_from_device_with_id(device_id, output_dir="data_dump/bandwidth"):
         return local_pcap_path
     except Exception as e:
         print(f"[!] ADB Pull Error: {e}")
-        return None
\ No newline at end of file
+        return None
+
+def open_tcpdump_stream(device_id=None, interface="any"):
+    """
+    Start tcpdump on the device writing pcap to stdout over `adb exec-out`
+    and return the process; packets can be read from proc.stdout as they
+    are captured, without storing anything on /sdcard. Stop it with
+    proc.terminate().
+    """
+    cmd = ["adb"] + (["-s", device_id] if device_id else [])
+    cmd += ["exec-out", "tcpdump", "-i", interface, "-U", "-w", "-"]
+    return subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
@@ -0,0 +1,132 @@
+# backend/utils/compression.py
+
+import gzip
+import io
+import zipfile
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+ZIP_MAGIC = b"PK\x03\x04"
+EMPTY_ZIP_MAGIC = b"PK\x05\x06"
+
+# File extensions accepted for uploaded compressed evidence (the format itself is sniffed by content)
+COMPRESSED_UPLOAD_TYPES = ["gz", "zst", "zip"]
+
+
+class UnsupportedCompression(ValueError):
+    """Raised for compressed input this environment cannot decompress."""
+
+
+def sniff_compression(f):
+    """"gzip", "zstd", "zip" or None, from the magic bytes of a peekable binary stream."""
+    magic = f.peek(4)[:4]
+    if magic[:2] == GZIP_MAGIC:
+        return "gzip"
+    if magic == ZSTD_MAGIC:
+        return "zstd"
+    if magic in (ZIP_MAGIC, EMPTY_ZIP_MAGIC):
+        return "zip"
+    return None
+
+
+def file_compression(path):
+    with open(path, "rb") as f:
+        return sniff_compression(f)
+
+
+def decompress_stream(f, buffer_size=1024 * 1024, close_source=False):
+    """
+    Return a readable, peekable stream of the data inside f, decompressing
+    gzip or zstd on the fly, chunk by chunk, so nothing is unpacked to disk.
+    Uncompressed input is returned as is. f must support peek()
+    (io.BufferedReader, as returned by open() or open_hashed). With
+    close_source, closing the returned stream also closes f.
+    """
+    kind = sniff_compression(f)
+    if kind == "gzip":
+        stream = gzip.GzipFile(fileobj=f, mode="rb")
+        if close_source:
+            return io.BufferedReader(_ClosingReader(stream, f), buffer_size=buffer_size)
+        return stream
+    if kind == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise UnsupportedCompression("zstd-compressed input needs the 'zstandard' package")
+        reader = zstandard.ZstdDecompressor().stream_reader(f, read_across_frames=True, closefd=close_source)
+        return io.BufferedReader(reader, buffer_size=buffer_size)
+    return f
+
+
+class _ClosingReader(io.RawIOBase):
+    """Reads from stream; closing it closes stream and then source."""
+
+    def __init__(self, stream, source):
+        self.stream = stream
+        self.source = source
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        return self.stream.readinto(buffer)
+
+    def close(self):
+        if not self.closed:
+            try:
+                self.stream.close()
+            finally:
+                self.source.close()
+        super().close()
+
+
+class ZipMembersReader(io.RawIOBase):
+    """
+    The file members of a zip archive read back to back, in name order, as
+    one stream; a newline is inserted between members that lack a trailing
+    one, so line-oriented parsers never see two logs' lines run together.
+    Members are decompressed as they are read. Closing it closes the
+    archive and fileobj.
+    """
+
+    def __init__(self, archive, fileobj=None):
+        self.archive = archive
+        self.fileobj = fileobj
+        self.members = sorted(info.filename for info in archive.infolist() if not info.is_dir())
+        self._current = None
+        self._last = b"\n"
+        self.exhausted = False
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while True:
+            if self._current is None:
+                if not self.members:
+                    self.exhausted = True
+                    return 0
+                self._current = self.archive.open(self.members.pop(0))
+            n = self._current.readinto(buffer)
+            if n:
+                self._last = bytes(buffer[n - 1:n])
+                return n
+            self._current.close()
+            self._current = None
+            if self._last != b"\n":
+                self._last = b"\n"
+                buffer[0:1] = b"\n"
+                return 1
+
+    def close(self):
+        if self._current is not None:
+            self._current.close()
+        self.archive.close()
+        if self.fileobj is not None:
+            self.fileobj.close()
+        super().close()
+
+
+def open_zip_members(f, buffer_size=1024 * 1024):
+    """Buffered ZipMembersReader over (and owning) a seekable binary file holding a zip archive."""
+    return io.BufferedReader(ZipMembersReader(zipfile.ZipFile(f), f), buffer_size=buffer_size)
@@ -1 +1,4 @@
 DNS_MODEL_PATH = "ai_models/dns_model/model.pkl"
+BANDWIDTH_MODEL_PATH = "ai_models/bandwidth_anomaly_model.pkl"
+HIDDEN_APPS_MODEL_PATH = "ai_models/hidden_apps_model/model.pkl"
+PERMISSION_MODEL_PATH = "ai_models/permissions_risk_model.pkl"
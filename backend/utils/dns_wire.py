@@ -0,0 +1,113 @@
+# backend/utils/dns_wire.py
+
+import socket
+import struct
+from collections import namedtuple
+
+DNS_PORT = 53
+DNS_HEADER = struct.Struct(">HHHHHH")
+RR_FIXED = struct.Struct(">HHIH")  # type, class, TTL, rdlength
+
+QTYPE_A = 1
+QTYPE_CNAME = 5
+QTYPE_AAAA = 28
+QTYPE_NAMES = {
+    1: "A", 2: "NS", 5: "CNAME", 6: "SOA", 12: "PTR", 15: "MX", 16: "TXT",
+    28: "AAAA", 33: "SRV", 64: "SVCB", 65: "HTTPS", 255: "ANY",
+}
+RCODE_NAMES = {0: "NOERROR", 1: "FORMERR", 2: "SERVFAIL", 3: "NXDOMAIN", 4: "NOTIMP", 5: "REFUSED"}
+
+# Longest name on the wire (RFC 1035) and a bound on compression pointer chains
+MAX_NAME_LENGTH = 255
+MAX_POINTERS = 32
+
+# answers: [(owner name, type, ttl, value)] for A/AAAA (address text) and CNAME (target name)
+DnsMessage = namedtuple("DnsMessage", ["id", "is_response", "rcode", "qname", "qtype", "answers"])
+
+
+class DnsFormatError(ValueError):
+    """Raised for a payload that is not a well-formed DNS message."""
+
+
+def qtype_name(qtype):
+    return QTYPE_NAMES.get(qtype, f"TYPE{qtype}")
+
+
+def rcode_name(rcode):
+    return RCODE_NAMES.get(rcode, f"RCODE{rcode}")
+
+
+def read_name(buf, pos):
+    """
+    Decode the (possibly compressed) name starting at pos.
+    Returns (lower-cased name without the trailing dot, position after it).
+    """
+    labels = []
+    length = 0
+    end = None
+    pointers = 0
+    while True:
+        size = buf[pos]
+        if size >= 0xC0:
+            if end is None:
+                end = pos + 2
+            pointers += 1
+            if pointers > MAX_POINTERS:
+                raise DnsFormatError("DNS compression pointer loop")
+            pos = ((size & 0x3F) << 8) | buf[pos + 1]
+            continue
+        if size > 63:
+            raise DnsFormatError(f"Unsupported DNS label type {size:#x}")
+        pos += 1
+        if size == 0:
+            break
+        length += size + 1
+        if length > MAX_NAME_LENGTH:
+            raise DnsFormatError("DNS name too long")
+        label = buf[pos:pos + size]
+        if len(label) < size:
+            raise DnsFormatError("Truncated DNS name")
+        labels.append(label)
+        pos += size
+    name = b".".join(labels).decode("ascii", "backslashreplace").lower()
+    return name, pos if end is None else end
+
+
+def parse_dns_message(payload):
+    """
+    Header, first question and A/AAAA/CNAME answers of a DNS message.
+    Other answer types are skipped. Raises DnsFormatError (or IndexError /
+    struct.error on truncation, which callers treat alike) for garbage.
+    """
+    msg_id, flags, qdcount, ancount, _, _ = DNS_HEADER.unpack_from(payload)
+    if (flags >> 11) & 0xF:
+        raise DnsFormatError("Not a standard DNS query")
+    if qdcount == 0:
+        raise DnsFormatError("DNS message without a question")
+    qname, pos = read_name(payload, 12)
+    qtype = (payload[pos] << 8) | payload[pos + 1]
+    pos += 4
+    for _ in range(qdcount - 1):
+        pos = read_name(payload, pos)[1] + 4
+
+    answers = []
+    for _ in range(ancount):
+        owner, pos = read_name(payload, pos)
+        rtype, _, ttl, rdlength = RR_FIXED.unpack_from(payload, pos)
+        pos += 10
+        rdata = payload[pos:pos + rdlength]
+        if len(rdata) < rdlength:
+            raise DnsFormatError("Truncated DNS resource record")
+        if rtype == QTYPE_A and rdlength == 4:
+            answers.append((owner, rtype, ttl, socket.inet_ntoa(rdata)))
+        elif rtype == QTYPE_AAAA and rdlength == 16:
+            answers.append((owner, rtype, ttl, socket.inet_ntop(socket.AF_INET6, rdata)))
+        elif rtype == QTYPE_CNAME:
+            answers.append((owner, rtype, ttl, read_name(payload, pos)[0]))
+        pos += rdlength
+    return DnsMessage(msg_id, bool(flags & 0x8000), flags & 0xF, qname, qtype, answers)
+
+
+def answer_addresses(message):
+    """Addresses the message resolves its question to (A and AAAA answers)."""
+    return [value for _, rtype, _, value in message.answers if rtype in (QTYPE_A, QTYPE_AAAA)]
@@ -0,0 +1,165 @@
+# backend/utils/domain_rules.py
+
+import csv
+import os
+from collections import deque, namedtuple
+
+# Shipped next to this module so it is found whatever the working directory
+DOMAIN_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "domain_rules.csv")
+
+# match is "suffix" (whole trailing labels: a TLD or registered domain)
+# or "substring" (anywhere in the name). Earlier rules win.
+DomainRule = namedtuple("DomainRule", ["ruleset", "match", "pattern", "risk", "reason"])
+RULE_COLUMNS = list(DomainRule._fields)
+
+_matchers = {}
+
+
+class AhoCorasick:
+    """
+    Substring automaton over many patterns. Each state remembers the
+    lowest pattern id ending there or on its failure chain, so a scan is
+    one pass over the text whatever the number of patterns.
+    """
+
+    def __init__(self):
+        self._goto = [{}]
+        self._fail = [0]
+        self._best = [None]
+        self._built = True
+
+    def add(self, pattern, pattern_id):
+        state = 0
+        for char in pattern:
+            nxt = self._goto[state].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._best.append(None)
+            state = nxt
+        if self._best[state] is None or pattern_id < self._best[state]:
+            self._best[state] = pattern_id
+        self._built = False
+
+    def build(self):
+        goto, fail, best = self._goto, self._fail, self._best
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in goto[state].items():
+                f = fail[state]
+                while f and char not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(char, 0)
+                inherited = best[fail[nxt]]
+                if inherited is not None and (best[nxt] is None or inherited < best[nxt]):
+                    best[nxt] = inherited
+                queue.append(nxt)
+        self._built = True
+
+    def first(self, text):
+        """Lowest id among the patterns occurring in text, or None."""
+        if not self._built:
+            self.build()
+        goto, fail, best = self._goto, self._fail, self._best
+        state = 0
+        found = None
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            hit = best[state]
+            if hit is not None and (found is None or hit < found):
+                found = hit
+        return found
+
+
+class SuffixTrie:
+    """Trie over reversed domain labels, for TLD and registered-domain rules."""
+
+    def __init__(self):
+        self._root = {}
+
+    def add(self, suffix, pattern_id):
+        node = self._root
+        for label in reversed(suffix.strip(".").split(".")):
+            node = node.setdefault(label, {})
+        if node.get(None) is None or pattern_id < node[None]:
+            node[None] = pattern_id
+
+    def first(self, domain):
+        """Lowest id among the suffixes domain ends with, or None."""
+        node = self._root
+        found = None
+        for label in reversed(domain.split(".")):
+            node = node.get(label)
+            if node is None:
+                break
+            hit = node.get(None)
+            if hit is not None and (found is None or hit < found):
+                found = hit
+        return found
+
+
+class DomainMatcher:
+    """Compiled rule set: suffix trie plus substring automaton."""
+
+    def __init__(self, rules=()):
+        self.rules = []
+        self._suffixes = SuffixTrie()
+        self._substrings = AhoCorasick()
+        for rule in rules:
+            self.add(rule)
+        self._substrings.build()
+
+    def add(self, rule):
+        pattern_id = len(self.rules)
+        self.rules.append(rule)
+        pattern = rule.pattern.lower()
+        if rule.match == "suffix":
+            self._suffixes.add(pattern, pattern_id)
+        elif rule.match == "substring":
+            self._substrings.add(pattern, pattern_id)
+        else:
+            raise ValueError(f"Unknown domain rule match type: {rule.match}")
+
+    def match(self, domain):
+        """The highest-priority rule matching domain, or None."""
+        if not domain:
+            return None
+        domain = domain.lower().rstrip(".")
+        suffix_hit = self._suffixes.first(domain)
+        substring_hit = self._substrings.first(domain)
+        hits = [hit for hit in (suffix_hit, substring_hit) if hit is not None]
+        return self.rules[min(hits)] if hits else None
+
+    def __len__(self):
+        return len(self.rules)
+
+
+def load_domain_rules(path=DOMAIN_RULES_PATH):
+    """
+    Read a rules CSV (ruleset, match, pattern, risk, reason) into one
+    DomainMatcher per ruleset, keeping the file order as priority.
+    """
+    rulesets = {}
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            rule = DomainRule(**{column: (row.get(column) or "").strip() for column in RULE_COLUMNS})
+            if not rule.pattern or rule.ruleset.startswith("#"):
+                continue
+            rulesets.setdefault(rule.ruleset, []).append(rule)
+    return {name: DomainMatcher(rules) for name, rules in rulesets.items()}
+
+
+def get_domain_matcher(ruleset, path=DOMAIN_RULES_PATH):
+    """Compiled matcher for one ruleset of the rules file, built on first use."""
+    if path not in _matchers:
+        try:
+            _matchers[path] = load_domain_rules(path)
+        except OSError as e:
+            print(f"[!] Warning: domain rules could not be loaded from {path}. {e}")
+            return DomainMatcher()
+    return _matchers[path].get(ruleset) or DomainMatcher()
@@ -1,18 +1,29 @@
 import os
+import io
 import hashlib
 import csv
 
+from backend.utils.compression import decompress_stream, open_zip_members, sniff_compression
+
+# Chain-of-custody digests recorded for evidence files; add "sha1" if required
+EVIDENCE_HASH_ALGORITHMS = ("sha256", "md5")
+
+
 def calculate_sha256(file_path):
     """Calculate SHA256 hash of a given file."""
-    sha256_hash = hashlib.sha256()
     try:
-        with open(file_path, "rb") as f:
-            for byte_block in iter(lambda: f.read(4096), b""):
-                sha256_hash.update(byte_block)
-        return sha256_hash.hexdigest()
+        return calculate_hashes(file_path, ("sha256",))["sha256"]
     except Exception as e:
         return f"ERROR: {e}"
 
+
+def calculate_hashes(file_path, algorithms=EVIDENCE_HASH_ALGORITHMS):
+    """Compute several digests of a file in one chunked read."""
+    reader, hashing = open_hashed(file_path, algorithms)
+    with reader:
+        drain(reader)
+    return hashing.hexdigests()
+
 def hash_all_files(directory, output_csv_path=None):
     """
     Recursively hash all files in a directory.
@@ -37,3 +48,125 @@ def hash_all_files(directory, output_csv_path=None):
         print(f"[+] Hash report saved at: {output_csv_path}")
 
     return hash_records
+
+
+class _HashingStream(io.RawIOBase):
+    def __init__(self, raw, algorithms=EVIDENCE_HASH_ALGORITHMS):
+        self.raw = raw
+        self.hashers = {name: hashlib.new(name) for name in algorithms}
+
+    def _update(self, buffer, n):
+        chunk = memoryview(buffer)[:n]
+        for hasher in self.hashers.values():
+            hasher.update(chunk)
+
+    def close(self):
+        self.raw.close()
+        super().close()
+
+    def hexdigests(self):
+        return {name: hasher.hexdigest() for name, hasher in self.hashers.items()}
+
+
+class HashingReader(_HashingStream):
+    """
+    Read-through wrapper that feeds every byte read from `raw` into one or
+    more hashers, so a parser reading the stream gets the evidence hashes for
+    free. Wrap it in io.BufferedReader (see open_hashed) so hashing happens
+    per chunk rather than per small read. bytes_read counts what has been
+    consumed so far (useful for progress reporting).
+    """
+
+    def __init__(self, raw, algorithms=EVIDENCE_HASH_ALGORITHMS):
+        super().__init__(raw, algorithms)
+        self.bytes_read = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        n = self.raw.readinto(buffer)
+        if n:
+            self._update(buffer, n)
+            self.bytes_read += n
+        return n
+
+
+class HashingWriter(_HashingStream):
+    """Write-through counterpart of HashingReader for reports being written."""
+
+    def writable(self):
+        return True
+
+    def write(self, buffer):
+        n = self.raw.write(buffer)
+        if n:
+            self._update(buffer, n)
+        return n
+
+
+class ArchiveDigests:
+    """
+    Stand-in for HashingReader when the evidence is a zip archive, which is
+    read by seeking: the digests come from one sequential pass beforehand,
+    and bytes_read follows the position of the members reader in the archive.
+    """
+
+    def __init__(self, members, digests):
+        self.members = members
+        self.digests = digests
+        self.size = os.fstat(members.fileobj.fileno()).st_size
+
+    @property
+    def bytes_read(self):
+        if self.members.exhausted or self.members.fileobj.closed:
+            return self.size
+        return self.members.fileobj.tell()
+
+    def hexdigests(self):
+        return dict(self.digests)
+
+
+def open_hashed_text(file_path, algorithms=EVIDENCE_HASH_ALGORITHMS, encoding="utf-8", errors="ignore"):
+    """
+    Text-mode counterpart of open_hashed for line-oriented logs. gzip and
+    zstd files are decompressed as they are read, and the members of a zip
+    archive are read one after another, all in place (sniffed by content).
+    Returns (text_reader, hashing_raw); the digests cover the stored bytes.
+    """
+    reader, hashing = open_hashed(file_path, algorithms)
+    if sniff_compression(reader) == "zip":
+        reader.close()
+        digests = calculate_hashes(file_path, algorithms)
+        stream = open_zip_members(open(file_path, "rb"))
+        hashing = ArchiveDigests(stream.raw, digests)
+    else:
+        stream = decompress_stream(reader, close_source=True)
+    return io.TextIOWrapper(stream, encoding=encoding, errors=errors), hashing
+
+
+def open_hashed(file_path, algorithms=EVIDENCE_HASH_ALGORITHMS, buffer_size=1024 * 1024):
+    """
+    Open file_path for buffered binary reading while hashing everything read.
+    Returns (reader, hashing_raw); call drain(reader) before reading digests
+    if the parser may stop early.
+    """
+    hashing_raw = HashingReader(open(file_path, "rb", buffering=0), algorithms)
+    return io.BufferedReader(hashing_raw, buffer_size=buffer_size), hashing_raw
+
+
+def open_hashed_writer(file_path, algorithms=("sha256",), encoding="utf-8"):
+    """
+    Open file_path as a text writer (newline="" so csv.writer works) that
+    hashes everything written. Returns (writer, hashing_raw); the digests
+    are complete once the writer is closed.
+    """
+    hashing_raw = HashingWriter(open(file_path, "wb", buffering=0), algorithms)
+    buffered = io.BufferedWriter(hashing_raw, buffer_size=1024 * 1024)
+    return io.TextIOWrapper(buffered, encoding=encoding, newline=""), hashing_raw
+
+
+def drain(reader, chunk_size=1024 * 1024):
+    """Read a stream to EOF so a wrapping HashingReader has seen every byte."""
+    while reader.read(chunk_size):
+        pass
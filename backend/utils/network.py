@@ -0,0 +1,99 @@
+# backend/utils/network.py
+
+import ipaddress
+import socket
+from bisect import bisect_right
+
+# Address space that never leaves the device's own network
+LOCAL_NETWORKS = [
+    "10.0.0.0/8",        # RFC1918
+    "172.16.0.0/12",     # RFC1918
+    "192.168.0.0/16",    # RFC1918
+    "100.64.0.0/10",     # carrier-grade NAT (RFC6598)
+    "169.254.0.0/16",    # IPv4 link-local
+    "127.0.0.0/8",       # loopback
+    "fc00::/7",          # IPv6 unique local (ULA)
+    "fe80::/10",         # IPv6 link-local
+    "::1/128",           # IPv6 loopback
+]
+
+# Client side of a connection: ephemeral source port talking to a service port
+SERVICE_PORT_MAX = 1023
+
+
+class LocalNetworkClassifier:
+    """
+    Decides whether an address belongs to the device/local network.
+    Networks are precompiled into sorted integer ranges and looked up with
+    bisect; answers are memoised per address, so repeated lookups over a
+    capture cost a dict hit. Accepts dotted/colon strings or packed bytes.
+    """
+
+    def __init__(self, networks=LOCAL_NETWORKS, device_ips=()):
+        self._networks = {4: [], 6: []}
+        for network in networks:
+            net = ipaddress.ip_network(network)
+            self._networks[net.version].append((int(net.network_address), int(net.broadcast_address)))
+        self.device_ips = set()
+        self._compile()
+        for ip in device_ips:
+            self.add_device_ip(ip)
+
+    def _compile(self):
+        self._ranges = {}
+        for version, ranges in self._networks.items():
+            merged = []
+            for start, end in sorted(ranges):
+                if merged and start <= merged[-1][1] + 1:
+                    merged[-1][1] = max(merged[-1][1], end)
+                else:
+                    merged.append([start, end])
+            self._ranges[version] = ([r[0] for r in merged], [r[1] for r in merged])
+        self._cache = {}
+
+    def add_device_ip(self, ip):
+        """Treat a single address (e.g. the phone's carrier IP) as local."""
+        addr = _to_ip_address(ip)
+        if addr in self.device_ips:
+            return
+        self.device_ips.add(addr)
+        self._networks[addr.version].append((int(addr), int(addr)))
+        self._compile()
+
+    def learn_device_ips(self, flows):
+        """
+        Learn device addresses from wire-direction flow keys
+        (src, dst, sport, dport, proto): the device is the side that opens
+        connections from an ephemeral port to a service port.
+        Returns the newly learned addresses.
+        """
+        clients = {key[0] for key in flows if key[2] > SERVICE_PORT_MAX >= key[3] > 0}
+        learned = []
+        for client in clients:
+            if not self.is_local(client):
+                self.add_device_ip(client)
+                learned.append(_to_ip_address(client))
+        return learned
+
+    def is_local(self, ip):
+        result = self._cache.get(ip)
+        if result is None:
+            addr = _to_ip_address(ip)
+            starts, ends = self._ranges[addr.version]
+            value = int(addr)
+            i = bisect_right(starts, value) - 1
+            result = self._cache[ip] = i >= 0 and value <= ends[i]
+        return result
+
+
+def _to_ip_address(ip):
+    if isinstance(ip, (bytes, bytearray)):
+        return ipaddress.ip_address(bytes(ip))
+    if isinstance(ip, (ipaddress.IPv4Address, ipaddress.IPv6Address)):
+        return ip
+    return ipaddress.ip_address(ip)
+
+
+def ip_to_str(addr):
+    """Packed 4- or 16-byte address to its text form."""
+    return socket.inet_ntop(socket.AF_INET if len(addr) == 4 else socket.AF_INET6, addr)
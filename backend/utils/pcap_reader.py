@@ -0,0 +1,339 @@
+# backend/utils/pcap_reader.py
+
+import struct
+
+from backend.utils.compression import UnsupportedCompression, decompress_stream
+
+# libpcap global header magic -> (byte order, fractional-timestamp divisor)
+PCAP_MAGICS = {
+    b"\xd4\xc3\xb2\xa1": ("<", 1_000_000),
+    b"\xa1\xb2\xc3\xd4": (">", 1_000_000),
+    b"\x4d\x3c\xb2\xa1": ("<", 1_000_000_000),
+    b"\xa1\xb2\x3c\x4d": (">", 1_000_000_000),
+}
+
+PCAPNG_MAGIC = b"\x0a\x0d\x0d\x0a"  # Section Header Block type
+
+# File extensions accepted for uploaded captures (compressed ones are sniffed by content)
+CAPTURE_UPLOAD_TYPES = ["pcap", "pcapng", "cap", "gz", "zst"]
+
+# pcapng block types
+PCAPNG_INTERFACE_DESCRIPTION = 1
+PCAPNG_PACKET = 2  # obsolete, still written by old tools
+PCAPNG_ENHANCED_PACKET = 6
+PCAPNG_OPTION_TSRESOL = 9
+PCAPNG_OPTION_TSOFFSET = 14
+
+LINKTYPE_NULL = 0
+LINKTYPE_ETHERNET = 1
+LINKTYPE_RAW = 101
+LINKTYPE_LINUX_SLL = 113
+LINKTYPE_IPV4 = 228
+LINKTYPE_IPV6 = 229
+LINKTYPE_LINUX_SLL2 = 276
+
+ETHERTYPE_IPV4 = 0x0800
+ETHERTYPE_IPV6 = 0x86DD
+ETHERTYPE_VLAN = (0x8100, 0x88A8, 0x9100)
+
+IPPROTO_TCP = 6
+IPPROTO_UDP = 17
+IPV6_EXTENSION_HEADERS = (0, 43, 60)
+IPV6_FRAGMENT_HEADER = 44
+
+
+class PcapFormatError(ValueError):
+    """Raised when a stream is not a capture the fast readers can decode."""
+
+
+def open_decompressed(f, buffer_size=1024 * 1024):
+    """
+    Return a readable stream of the capture inside f, decompressing gzip or
+    zstd on the fly, chunk by chunk, so nothing is unpacked to disk.
+    Uncompressed input is returned as is. f must support peek()
+    (io.BufferedReader, as returned by open() or open_hashed).
+    """
+    try:
+        return decompress_stream(f, buffer_size)
+    except UnsupportedCompression as e:
+        raise PcapFormatError(str(e))
+
+
+def is_capture_file(path):
+    """True if path holds a pcap or pcapng capture, plain or gzip/zstd compressed."""
+    try:
+        with open(path, "rb") as f:
+            magic = open_decompressed(f).peek(4)[:4]
+    except Exception:  # unreadable, or a corrupt gzip/zstd stream
+        return False
+    return magic in PCAP_MAGICS or magic == PCAPNG_MAGIC
+
+
+def is_pcapng(f):
+    """True if the (decompressed, peekable) stream starts with a pcapng section."""
+    return f.peek(4)[:4] == PCAPNG_MAGIC
+
+
+def read_pcap_header(f):
+    """
+    Read the 24-byte libpcap global header from an open binary stream.
+    Returns (byte_order, ts_divisor, linktype).
+    """
+    header = f.read(24)
+    if len(header) < 24 or header[:4] not in PCAP_MAGICS:
+        raise PcapFormatError("Not a libpcap capture")
+    byte_order, ts_divisor = PCAP_MAGICS[header[:4]]
+    linktype = struct.unpack(byte_order + "I", header[20:24])[0] & 0x0FFFFFFF
+    return byte_order, ts_divisor, linktype
+
+
+def iter_pcap_records(f, byte_order, max_bytes=None):
+    """
+    Yield (ts_sec, ts_frac, data) for every record after the global header.
+    Reads one record at a time, so memory stays flat and pipes work too.
+    With max_bytes, stop once that many bytes of records have been consumed
+    (used to walk a single shard).
+    """
+    record_header = struct.Struct(byte_order + "IIII")
+    unpack = record_header.unpack
+    read = f.read
+    remaining = max_bytes if max_bytes is not None else float("inf")
+    while remaining > 0:
+        header = read(16)
+        if len(header) < 16:
+            return
+        ts_sec, ts_frac, caplen, _ = unpack(header)
+        data = read(caplen)
+        if len(data) < caplen:
+            return  # truncated final record
+        remaining -= 16 + caplen
+        yield ts_sec, ts_frac, data
+
+
+def iter_pcapng_packets(f):
+    """
+    Yield (linktype, ts_sec, ts, data) for every packet of a pcapng stream,
+    one block at a time. Each interface keeps its own link type and
+    timestamp resolution; a new section resets them. Simple Packet Blocks
+    carry no timestamp and are skipped, as are non-packet blocks.
+    """
+    read = f.read
+    byte_order = "<"
+    interfaces = []
+    while True:
+        header = read(8)
+        if len(header) < 8:
+            return
+        if header[:4] == PCAPNG_MAGIC:
+            byte_order = "<" if read(4) == b"\x4d\x3c\x2b\x1a" else ">"
+            block_length = struct.unpack(byte_order + "I", header[4:])[0]
+            if len(read(block_length - 12)) < block_length - 12:
+                return
+            interfaces = []
+            continue
+
+        block_type, block_length = struct.unpack(byte_order + "II", header)
+        if block_length < 12:
+            raise PcapFormatError(f"Corrupt pcapng block length {block_length}")
+        body = read(block_length - 8)
+        if len(body) < block_length - 8:
+            return  # truncated final block
+
+        if block_type == PCAPNG_ENHANCED_PACKET:
+            interface_id, ts_high, ts_low, caplen = struct.unpack_from(byte_order + "IIII", body)
+            data = body[20:20 + caplen]
+        elif block_type == PCAPNG_PACKET:
+            interface_id, _, ts_high, ts_low, caplen = struct.unpack_from(byte_order + "HHIII", body)
+            data = body[20:20 + caplen]
+        elif block_type == PCAPNG_INTERFACE_DESCRIPTION:
+            interfaces.append(_pcapng_interface(body, byte_order))
+            continue
+        else:
+            continue
+
+        if interface_id >= len(interfaces):
+            raise PcapFormatError(f"Packet for undeclared pcapng interface {interface_id}")
+        linktype, units, ts_offset = interfaces[interface_id]
+        ticks = (ts_high << 32) | ts_low
+        ts_sec = ticks // units + ts_offset
+        yield linktype, ts_sec, ts_sec + (ticks % units) / units, data
+
+
+def _pcapng_interface(body, byte_order):
+    """(linktype, timestamp units per second, timestamp offset) of an IDB."""
+    linktype = struct.unpack_from(byte_order + "H", body)[0]
+    units, ts_offset = 1_000_000, 0
+    pos = 8
+    while pos + 4 <= len(body) - 4:
+        code, length = struct.unpack_from(byte_order + "HH", body, pos)
+        if code == 0:
+            break
+        value = body[pos + 4:pos + 4 + length]
+        if code == PCAPNG_OPTION_TSRESOL and length == 1:
+            resolution = value[0]
+            units = 2 ** (resolution & 0x7F) if resolution & 0x80 else 10 ** resolution
+        elif code == PCAPNG_OPTION_TSOFFSET and length == 8:
+            ts_offset = struct.unpack(byte_order + "q", value)[0]
+        pos += 4 + (length + 3) // 4 * 4
+    return linktype, units, ts_offset
+
+
+def iter_packets(f):
+    """
+    Yield (linktype, ts_sec, ts, data) from a libpcap or pcapng stream.
+    Wrap compressed input with open_decompressed first.
+    """
+    if is_pcapng(f):
+        yield from iter_pcapng_packets(f)
+        return
+    byte_order, ts_divisor, linktype = read_pcap_header(f)
+    for ts_sec, ts_frac, data in iter_pcap_records(f, byte_order):
+        yield linktype, ts_sec, ts_sec + ts_frac / ts_divisor, data
+
+
+def build_shard_index(f, byte_order, shard_bytes):
+    """
+    Walk only the record headers of a seekable capture and return
+    [(start_offset, length), ...] byte ranges that each begin on a record
+    boundary and cover roughly shard_bytes of records.
+    """
+    record_header = struct.Struct(byte_order + "IIII")
+    shards = []
+    start = offset = f.tell()
+    f.seek(0, 2)
+    file_size = f.tell()
+    f.seek(offset)
+
+    while offset + 16 <= file_size:
+        header = f.read(16)
+        if len(header) < 16:
+            break
+        caplen = record_header.unpack(header)[2]
+        next_offset = offset + 16 + caplen
+        if next_offset > file_size:
+            break  # truncated final record
+        f.seek(caplen, 1)
+        offset = next_offset
+        if offset - start >= shard_bytes:
+            shards.append((start, offset - start))
+            start = offset
+
+    if offset > start:
+        shards.append((start, offset - start))
+    return shards
+
+
+def ip_offset(linktype, data):
+    """Offset of the IP header inside a link-layer frame, or -1 if not IP."""
+    if linktype == LINKTYPE_ETHERNET:
+        offset = 12
+        ethertype = (data[12] << 8) | data[13]
+        while ethertype in ETHERTYPE_VLAN:
+            offset += 4
+            ethertype = (data[offset] << 8) | data[offset + 1]
+        if ethertype == ETHERTYPE_IPV4 or ethertype == ETHERTYPE_IPV6:
+            return offset + 2
+        return -1
+    if linktype == LINKTYPE_LINUX_SLL:
+        ethertype = (data[14] << 8) | data[15]
+        return 16 if ethertype in (ETHERTYPE_IPV4, ETHERTYPE_IPV6) else -1
+    if linktype == LINKTYPE_LINUX_SLL2:
+        ethertype = (data[0] << 8) | data[1]
+        return 20 if ethertype in (ETHERTYPE_IPV4, ETHERTYPE_IPV6) else -1
+    if linktype in (LINKTYPE_RAW, LINKTYPE_IPV4, LINKTYPE_IPV6):
+        return 0
+    if linktype == LINKTYPE_NULL:
+        return 4
+    return -1
+
+
+def _ip_header(linktype, data):
+    """
+    (version, proto, src, dst, l4_offset, ip_end) for an IP frame, or None.
+    proto is None for non-first fragments; ip_end excludes link-layer padding.
+    """
+    offset = ip_offset(linktype, data)
+    if offset < 0:
+        return None
+    version = data[offset] >> 4
+    if version == 4:
+        ihl = (data[offset] & 0x0F) * 4
+        total_length = (data[offset + 2] << 8) | data[offset + 3]
+        proto = data[offset + 9]
+        src = data[offset + 12:offset + 16]
+        dst = data[offset + 16:offset + 20]
+        end = offset + total_length if total_length else len(data)
+        # Only the first fragment carries the transport header
+        if (data[offset + 6] & 0x1F) or data[offset + 7]:
+            return version, None, src, dst, 0, end
+        return version, proto, src, dst, offset + ihl, end
+    if version == 6:
+        payload_length = (data[offset + 4] << 8) | data[offset + 5]
+        proto = data[offset + 6]
+        src = data[offset + 8:offset + 24]
+        dst = data[offset + 24:offset + 40]
+        end = offset + 40 + payload_length if payload_length else len(data)
+        l4 = offset + 40
+        while proto in IPV6_EXTENSION_HEADERS:
+            proto = data[l4]
+            l4 += (data[l4 + 1] + 1) * 8
+        if proto == IPV6_FRAGMENT_HEADER:
+            if (data[l4 + 2] << 8 | data[l4 + 3]) & 0xFFF8:
+                return version, None, src, dst, 0, end
+            proto = data[l4]
+            l4 += 8
+        return version, proto, src, dst, l4, end
+    return None
+
+
+def decode_ip(linktype, data):
+    """
+    Decode just enough of a frame to attribute it:
+    (version, proto, src, dst, sport, dport) with raw address bytes, or None
+    for non-IP frames. proto is None for non-first fragments, which carry no
+    transport header; ports are 0 when there is no TCP/UDP header.
+    """
+    try:
+        header = _ip_header(linktype, data)
+        if header is None:
+            return None
+        version, proto, src, dst, l4, _ = header
+        if proto in (IPPROTO_TCP, IPPROTO_UDP) and len(data) >= l4 + 4:
+            sport = (data[l4] << 8) | data[l4 + 1]
+            dport = (data[l4 + 2] << 8) | data[l4 + 3]
+            return version, proto, src, dst, sport, dport
+        return version, proto, src, dst, 0, 0
+    except IndexError:
+        return None  # truncated capture (small snaplen)
+
+
+def transport_payload(linktype, data):
+    """
+    Application bytes of a TCP or UDP frame:
+    (proto, src, dst, sport, dport, seq, payload), with seq 0 for UDP.
+    None for anything else, including non-first fragments.
+    """
+    try:
+        header = _ip_header(linktype, data)
+        if header is None:
+            return None
+        _, proto, src, dst, l4, end = header
+        if proto == IPPROTO_TCP:
+            start = l4 + (data[l4 + 12] >> 4) * 4
+            seq = int.from_bytes(data[l4 + 4:l4 + 8], "big")
+        elif proto == IPPROTO_UDP:
+            start, seq = l4 + 8, 0
+        else:
+            return None
+        sport = (data[l4] << 8) | data[l4 + 1]
+        dport = (data[l4 + 2] << 8) | data[l4 + 3]
+        return proto, src, dst, sport, dport, seq, data[start:end]
+    except IndexError:
+        return None
+
+
+def can_decode(linktype):
+    return linktype in (
+        LINKTYPE_NULL, LINKTYPE_ETHERNET, LINKTYPE_RAW, LINKTYPE_LINUX_SLL,
+        LINKTYPE_IPV4, LINKTYPE_IPV6, LINKTYPE_LINUX_SLL2,
+    )
@@ -0,0 +1,186 @@
+# backend/utils/sketches.py
+
+import heapq
+
+import numpy as np
+import pandas as pd
+
+# Fixed siphash key: sketches built in different processes, runs or on
+# different machines hash alike, so they can be merged
+HASH_KEY = "difa-sketch-key0"
+MASK64 = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+
+def hash64(values):
+    """Stable 64-bit hashes for an array-like of strings."""
+    return pd.util.hash_array(np.asarray(values, dtype=object), hash_key=HASH_KEY)
+
+
+def _bit_length(values):
+    """Exact bit length of uint64 values, via the float exponent of each 32-bit half."""
+    high = (values >> np.uint64(32)).astype(np.float64)
+    low = (values & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    return np.where(high > 0, 32 + np.frexp(high)[1], np.frexp(low)[1])
+
+
+def hll_register(hashes, precision):
+    """(register index, rank) of each hash for a HyperLogLog with 2**precision registers."""
+    shift = np.uint64(64 - precision)
+    index = (hashes >> shift).astype(np.int64)
+    rest = (hashes << np.uint64(precision)) & MASK64
+    rank = np.minimum(64 - _bit_length(rest), 64 - precision) + 1
+    return index, rank.astype(np.uint8)
+
+
+def hll_estimate(registers):
+    """Cardinality estimate for each HyperLogLog register array along the last axis."""
+    registers = np.asarray(registers)
+    m = registers.shape[-1]
+    alpha = 0.7213 / (1 + 1.079 / m) if m >= 128 else {16: 0.673, 32: 0.697, 64: 0.709}[m]
+    raw = alpha * m * m / np.sum(np.exp2(-registers.astype(np.float64)), axis=-1)
+    zeros = np.sum(registers == 0, axis=-1)
+    # Linear counting while the sketch is still sparse
+    linear = m * np.log(m / np.maximum(zeros, 1))
+    return np.where((raw <= 2.5 * m) & (zeros > 0), linear, raw)
+
+
+class HyperLogLog:
+    """Distinct-count sketch in 2**precision bytes (about 1.04 / sqrt(2**precision) relative error)."""
+
+    def __init__(self, precision=14, registers=None):
+        self.precision = precision
+        self.registers = registers if registers is not None else np.zeros(1 << precision, dtype=np.uint8)
+
+    def add_hashes(self, hashes):
+        if len(hashes):
+            index, rank = hll_register(hashes, self.precision)
+            np.maximum.at(self.registers, index, rank)
+
+    def add(self, values):
+        self.add_hashes(hash64(values))
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLogs of different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self):
+        return float(hll_estimate(self.registers))
+
+
+class HyperLogLogGrid:
+    """
+    Distinct counts per key (e.g. subdomains per parent domain) in fixed
+    memory: each key hashes to one HyperLogLog in each of `depth` rows of
+    `buckets` sketches, and its estimate is the smallest of its sketches,
+    which limits the inflation from keys sharing a bucket.
+    """
+
+    def __init__(self, buckets=8192, depth=3, precision=7, registers=None):
+        self.buckets = buckets
+        self.depth = depth
+        self.precision = precision
+        self.registers = registers if registers is not None else np.zeros(
+            (depth, buckets, 1 << precision), dtype=np.uint8
+        )
+
+    def _buckets(self, key_hashes):
+        return _row_indexes(key_hashes, self.depth, self.buckets)
+
+    def add_hashes(self, key_hashes, value_hashes):
+        if not len(key_hashes):
+            return
+        index, rank = hll_register(value_hashes, self.precision)
+        for row, bucket in enumerate(self._buckets(key_hashes)):
+            np.maximum.at(self.registers[row], (bucket, index), rank)
+
+    def merge(self, other):
+        if self.registers.shape != other.registers.shape:
+            raise ValueError("Cannot merge HyperLogLog grids of different shapes")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self, keys):
+        """Estimated distinct values for each key."""
+        hashes = hash64(keys)
+        estimates = [hll_estimate(self.registers[row, bucket]) for row, bucket in enumerate(self._buckets(hashes))]
+        return np.min(estimates, axis=0) if len(hashes) else np.zeros(0)
+
+
+def _row_indexes(hashes, depth, width):
+    """depth column indexes per hash from its two 32-bit halves (Kirsch-Mitzenmacher)."""
+    low = (hashes & np.uint64(0xFFFFFFFF)).astype(np.int64)
+    high = (hashes >> np.uint64(32)).astype(np.int64) | 1
+    return [(low + row * high) % width for row in range(depth)]
+
+
+class CountMinSketch:
+    """Frequency estimates that never undercount, in depth x width counters."""
+
+    def __init__(self, width=1 << 15, depth=4, table=None):
+        self.width = width
+        self.depth = depth
+        self.table = table if table is not None else np.zeros((depth, width), dtype=np.int64)
+
+    def add_hashes(self, hashes, counts):
+        for row, index in enumerate(_row_indexes(hashes, self.depth, self.width)):
+            self.table[row] += np.bincount(index, weights=counts, minlength=self.width).astype(np.int64)
+
+    def estimate_hashes(self, hashes):
+        if not len(hashes):
+            return np.zeros(0, dtype=np.int64)
+        return np.min([
+            self.table[row, index] for row, index in enumerate(_row_indexes(hashes, self.depth, self.width))
+        ], axis=0)
+
+    def merge(self, other):
+        if self.table.shape != other.table.shape:
+            raise ValueError("Cannot merge Count-Min sketches of different shapes")
+        self.table += other.table
+        return self
+
+
+class HeavyHitters:
+    """
+    Top-k most frequent values of a stream: a Count-Min sketch for the
+    counts plus the current k best candidates, re-ranked with a heap after
+    every batch. Estimates may overcount (by collisions), never undercount.
+    """
+
+    def __init__(self, k=100, width=1 << 15, depth=4, sketch=None):
+        self.k = k
+        self.sketch = sketch or CountMinSketch(width, depth)
+        self.candidates = {}  # value -> hash
+
+    def update(self, values):
+        """Count a batch of values (array-like of strings)."""
+        codes, uniques = pd.factorize(np.asarray(values, dtype=object))
+        if len(uniques):
+            self.add(uniques, hash64(uniques), np.bincount(codes, minlength=len(uniques)))
+
+    def add(self, values, hashes, counts):
+        """Count distinct values already hashed (hash64) with their batch counts."""
+        self.sketch.add_hashes(hashes, counts)
+        self._rerank(dict(zip(list(values), hashes)))
+
+    def _rerank(self, new):
+        pool = dict(self.candidates)
+        pool.update(new)
+        values = list(pool)
+        estimates = self.sketch.estimate_hashes(np.array([pool[value] for value in values], dtype=np.uint64))
+        best = heapq.nlargest(self.k, zip(estimates.tolist(), values))
+        self.candidates = {value: pool[value] for _, value in best}
+
+    def merge(self, other):
+        self.sketch.merge(other.sketch)
+        self._rerank(other.candidates)
+        return self
+
+    def top(self):
+        """[(value, estimated count)] best first."""
+        values = list(self.candidates)
+        if not values:
+            return []
+        estimates = self.sketch.estimate_hashes(np.array(list(self.candidates.values()), dtype=np.uint64))
+        return sorted(zip(values, estimates.tolist()), key=lambda item: (-item[1], item[0]))
@@ -0,0 +1,95 @@
+# backend/utils/streaming_stats.py
+
+import math
+from bisect import bisect_right, insort
+
+
+class EWMA:
+    """Exponentially weighted moving mean and variance in O(1) memory."""
+
+    __slots__ = ("alpha", "mean", "var", "count")
+
+    def __init__(self, alpha=0.1):
+        self.alpha = alpha
+        self.mean = 0.0
+        self.var = 0.0
+        self.count = 0
+
+    def update(self, x):
+        if self.count == 0:
+            self.mean = float(x)
+        else:
+            diff = x - self.mean
+            increment = self.alpha * diff
+            self.mean += increment
+            self.var = (1 - self.alpha) * (self.var + diff * increment)
+        self.count += 1
+
+    @property
+    def std(self):
+        return math.sqrt(self.var)
+
+
+class P2Quantile:
+    """
+    Streaming estimate of the p-quantile with the P² algorithm
+    (Jain & Chlamtac, 1985): five markers whose heights are adjusted with
+    piecewise-parabolic interpolation, so memory is constant.
+    """
+
+    __slots__ = ("p", "heights", "positions", "desired", "increments", "count")
+
+    def __init__(self, p=0.95):
+        self.p = p
+        self.heights = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+        self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+        self.count = 0
+
+    def update(self, x):
+        self.count += 1
+        heights = self.heights
+        if self.count <= 5:
+            insort(heights, x)
+            return
+
+        if x < heights[0]:
+            heights[0] = x
+            k = 0
+        elif x >= heights[4]:
+            heights[4] = x
+            k = 3
+        else:
+            k = bisect_right(heights, x) - 1
+        positions = self.positions
+        for i in range(k + 1, 5):
+            positions[i] += 1
+        desired = self.desired
+        for i in range(5):
+            desired[i] += self.increments[i]
+
+        for i in (1, 2, 3):
+            d = desired[i] - positions[i]
+            if (d >= 1 and positions[i + 1] - positions[i] > 1) or (d <= -1 and positions[i - 1] - positions[i] < -1):
+                step = 1 if d > 0 else -1
+                height = self._parabolic(i, step)
+                if not heights[i - 1] < height < heights[i + 1]:
+                    height = heights[i] + step * (heights[i + step] - heights[i]) / (positions[i + step] - positions[i])
+                heights[i] = height
+                positions[i] += step
+
+    def _parabolic(self, i, step):
+        h, n = self.heights, self.positions
+        return h[i] + step / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + step) * (h[i + 1] - h[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - step) * (h[i] - h[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def value(self):
+        """Current estimate; exact order statistic until five samples are seen."""
+        if not self.heights:
+            return math.nan
+        if self.count <= 5:
+            return self.heights[min(len(self.heights) - 1, int(round(self.p * (len(self.heights) - 1))))]
+        return self.heights[2]
@@ -1,22 +1,319 @@
+# backend/utils/threat_intel.py
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
 import requests
-from project_config import VT_API_KEY
+from project_config import THREAT_INTEL_OFFLINE, VT_API_KEY, VT_API_URL
 
-def is_domain_suspicious(domain):
-    url = f"https://www.virustotal.com/api/v3/domains/{domain}"
-    headers = {"x-apikey": VT_API_KEY}
-    try:
-        resp = requests.get(url, headers=headers)
-        if resp.status_code == 200:
-            data = resp.json()
-            malicious = data["data"]["attributes"]["last_analysis_stats"]["malicious"]
-            suspicious = data["data"]["attributes"]["last_analysis_stats"]["suspicious"]
-            if malicious > 0:
-                return "VT_Malicious"
-            elif suspicious > 0:
-                return "VT_Suspicious"
+from backend.utils.domain_rules import get_domain_matcher
+
+MALICIOUS = "VT_Malicious"
+SUSPICIOUS = "VT_Suspicious"
+CLEAN = "VT_Clean"
+UNKNOWN = "VT_Unknown"
+ERROR = "VT_Error"
+OFFLINE = "VT_Offline"  # not cached and lookups are disabled
+BLOCKLISTED = "Blocklisted"  # "blocklist" ruleset of the domain rules file
+THREAT_STATUSES = {MALICIOUS, SUSPICIOUS, BLOCKLISTED}
+
+THREAT_INTEL_DB = "forensics_output/threat_intel/vt_cache.sqlite3"
+# Rows of this ruleset in backend/utils/domain_rules.csv; investigators add the case's known-bad domains there
+BLOCKLIST_RULESET = "blocklist"
+CACHE_TTL = 7 * 86400
+UNKNOWN_TTL = 86400  # VirusTotal has no report yet; ask again sooner
+# Public VirusTotal API quota: 4 requests per minute
+VT_RATE = 4
+VT_RATE_PERIOD = 60.0
+VT_TIMEOUT = 10
+VT_CONCURRENCY = 4
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def is_threat(status):
+    return status in THREAT_STATUSES
+
+
+class ThreatIntelCache:
+    """Persistent domain -> status cache in SQLite; entries expire after their TTL."""
+
+    def __init__(self, path=THREAT_INTEL_DB, ttl=CACHE_TTL, unknown_ttl=UNKNOWN_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.unknown_ttl = unknown_ttl
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS verdicts ("
+                "domain TEXT PRIMARY KEY, status TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    def get_many(self, domains, include_expired=False):
+        """Cached statuses for the given domains; expired entries only if asked."""
+        domains = list(domains)
+        now = time.time()
+        found = {}
+        with self._lock:
+            for start in range(0, len(domains), 500):
+                batch = domains[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT domain, status, expires_at FROM verdicts WHERE domain IN ({','.join('?' * len(batch))})",
+                    batch,
+                ).fetchall()
+                for domain, status, expires_at in rows:
+                    if include_expired or expires_at > now:
+                        found[domain] = status
+        return found
+
+    def get(self, domain, include_expired=False):
+        return self.get_many([domain], include_expired).get(domain)
+
+    def put_many(self, statuses):
+        now = time.time()
+        rows = [
+            (domain, status, now + (self.unknown_ttl if status == UNKNOWN else self.ttl))
+            for domain, status in statuses.items()
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO verdicts VALUES (?, ?, ?)", rows)
+
+    def put(self, domain, status):
+        self.put_many({domain: status})
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class RateLimiter:
+    """
+    Token bucket allowing `rate` calls per `period` seconds. Callers reserve
+    a token up front and sleep out any deficit, so it works from any thread
+    or event loop.
+    """
+
+    def __init__(self, rate=VT_RATE, period=VT_RATE_PERIOD, clock=time.monotonic):
+        self.capacity = rate
+        self.fill_rate = rate / period
+        self.clock = clock
+        self.tokens = float(rate)
+        self.updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Take a token; returns the seconds to wait before using it."""
+        with self._lock:
+            now = self.clock()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.fill_rate)
+            self.updated = now
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.fill_rate
+
+    async def acquire(self):
+        delay = self.reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+    def wait(self):
+        delay = self.reserve()
+        if delay:
+            time.sleep(delay)
+
+
+class ThreatIntelClient:
+    """
+    VirusTotal domain verdicts behind a persistent cache. Local blocklist
+    hits and fresh cache entries are answered without the network; the rest
+    are fetched concurrently (at most max_concurrency in flight, each
+    request paced by the rate limiter and bounded by timeout). Lookups of
+    a domain already being fetched, from any thread or call, wait for that
+    request instead of sending another. In offline mode, or with
+    no API key, only the blocklist and the cache (including expired
+    entries) are consulted.
+    """
+
+    def __init__(self, api_key=VT_API_KEY, base_url=VT_API_URL, cache=None, offline=THREAT_INTEL_OFFLINE,
+                 max_concurrency=VT_CONCURRENCY, rate_limiter=None, timeout=VT_TIMEOUT, blocklist=None):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.cache = cache if cache is not None else ThreatIntelCache()
+        self.offline = offline or not api_key
+        self.max_concurrency = max_concurrency
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.timeout = timeout
+        self.blocklist = blocklist if blocklist is not None else get_domain_matcher(BLOCKLIST_RULESET)
+        self.requests_made = 0
+        self._session = requests.Session()
+        # Own pool, so asyncio.run does not wait on requests abandoned at a deadline
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="threat-intel")
+        self._in_flight = {}  # domain -> Future of its status, shared by every caller
+        self._in_flight_lock = threading.Lock()
+
+    def local_verdicts(self, domains):
+        """Statuses known without the network: blocklist hits, then cached entries."""
+        statuses = {}
+        for domain in domains:
+            if self.blocklist.match(domain):
+                statuses[domain] = BLOCKLISTED
+        rest = [domain for domain in domains if domain not in statuses]
+        statuses.update(self.cache.get_many(rest, include_expired=self.offline))
+        return statuses
+
+    def fetch(self, domain):
+        """One blocking VirusTotal request; ERROR results are not cached."""
+        self.requests_made += 1
+        try:
+            resp = self._session.get(
+                f"{self.base_url}/domains/{domain}", headers={"x-apikey": self.api_key}, timeout=self.timeout
+            )
+            if resp.status_code == 200:
+                stats = resp.json()["data"]["attributes"]["last_analysis_stats"]
+                if stats.get("malicious", 0) > 0:
+                    status = MALICIOUS
+                elif stats.get("suspicious", 0) > 0:
+                    status = SUSPICIOUS
+                else:
+                    status = CLEAN
+            elif resp.status_code == 404:
+                status = UNKNOWN
             else:
-                return "VT_Clean"
-        else:
-            return "VT_Unknown"
-    except Exception:
-        return "VT_Error"
+                return UNKNOWN
+        except Exception:
+            return ERROR
+        self.cache.put(domain, status)
+        return status
+
+    def _claim(self, domain):
+        """
+        (future, owner) for domain's request: the one in flight if any, else
+        a new one the caller (owner=True) must resolve with _resolve.
+        """
+        with self._in_flight_lock:
+            future = self._in_flight.get(domain)
+            if future is not None:
+                return future, False
+            future = self._in_flight[domain] = Future()
+            future.set_running_or_notify_cancel()  # waiters can't cancel it for everyone
+            return future, True
+
+    def _resolve(self, domain, future, status=None):
+        """Fetch domain (unless status is given) and hand the status to every waiter."""
+        try:
+            if status is None:
+                status = self.fetch(domain)
+        finally:
+            with self._in_flight_lock:
+                self._in_flight.pop(domain, None)
+            future.set_result(ERROR if status is None else status)
+        return status
+
+    async def _fetch_async(self, domain, semaphore):
+        future, owner = self._claim(domain)
+        if owner:
+            submitted = False
+            try:
+                async with semaphore:
+                    await self.rate_limiter.acquire()
+                    self._executor.submit(self._resolve, domain, future)
+                    submitted = True
+                    return await asyncio.shield(asyncio.wrap_future(future))
+            except asyncio.CancelledError:
+                if not submitted:
+                    # Out of time before sending: release anyone waiting on it
+                    self._resolve(domain, future, UNKNOWN)
+                raise
+        return await asyncio.shield(asyncio.wrap_future(future))
+
+    async def lookup_many_async(self, domains, timeout=None):
+        """
+        {domain: status} for every distinct domain. Lookups still running
+        after timeout seconds are cancelled and reported as UNKNOWN.
+        """
+        domains = list(dict.fromkeys(domains))
+        statuses = self.local_verdicts(domains)
+        missing = [domain for domain in domains if domain not in statuses]
+        if not missing:
+            return statuses
+        if self.offline:
+            statuses.update(dict.fromkeys(missing, OFFLINE))
+            return statuses
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        tasks = {domain: asyncio.ensure_future(self._fetch_async(domain, semaphore)) for domain in missing}
+        done, not_done = await asyncio.wait(set(tasks.values()), timeout=timeout)
+        for task in not_done:
+            task.cancel()
+        for domain, task in tasks.items():
+            statuses[domain] = task.result() if task in done and not task.cancelled() else UNKNOWN
+        return statuses
+
+    def lookup_many(self, domains, timeout=None):
+        """
+        Blocking lookup_many_async, for callers outside an event loop. A
+        timeout of 0 answers from the blocklist and cache only.
+        """
+        domains = list(domains)
+        statuses = self.local_verdicts(domains)
+        if all(domain in statuses for domain in domains):
+            return statuses
+        if self.offline or (timeout is not None and timeout <= 0):
+            missing = OFFLINE if self.offline else UNKNOWN
+            return {domain: statuses.get(domain, missing) for domain in domains}
+        return asyncio.run(self.lookup_many_async(domains, timeout))
+
+    def lookup(self, domain):
+        statuses = self.local_verdicts([domain])
+        if domain in statuses:
+            return statuses[domain]
+        if self.offline:
+            return OFFLINE
+        future, owner = self._claim(domain)
+        if owner:
+            self.rate_limiter.wait()
+            return self._resolve(domain, future)
+        return future.result()
+
+
+def get_client():
+    """Process-wide ThreatIntelClient, created on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = ThreatIntelClient()
+        return _client
+
+
+def set_client(client):
+    """Replace the process-wide client (e.g. an offline one, or one pointed at a mock server)."""
+    global _client
+    with _client_lock:
+        _client = client
+
+
+def use_offline_client(cache_path=THREAT_INTEL_DB):
+    """
+    Process-pool initializer: give the worker its own offline client over
+    the cache at cache_path. A forked copy of the parent's client would
+    share its SQLite connection across processes and multiply the API rate
+    limit by the number of workers; lookups stay with the parent instead.
+    """
+    set_client(ThreatIntelClient(cache=ThreatIntelCache(cache_path), offline=True))
+
+
+def lookup_domains(domains, timeout=None):
+    """Bulk verdicts through the shared client: {domain: status}."""
+    return get_client().lookup_many(domains, timeout)
+
+
+def is_domain_suspicious(domain):
+    """VirusTotal status string for a domain (see THREAT_STATUSES / is_threat)."""
+    return get_client().lookup(domain)
@@ -0,0 +1,77 @@
+# benchmarks/bench_dns_batch_inference.py
+#
+# Model-risk scoring throughput for a DNS log: the per-line path
+# (extract_features + predict_model_risk, one predict call per query)
+# against extract_features_frame + predict_model_risk_batch. The per-line
+# path is timed on a sample and extrapolated; the batched path scores all
+# queries. A small RandomForest pipeline stands in for the DNS model.
+#
+#   python -m benchmarks.bench_dns_batch_inference [num_lines] [per_line_sample]
+
+import random
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import OneHotEncoder
+
+from backend.analysis import dns_log_parser
+
+TLDS = ["com", "net", "org", "io", "xyz", "tk", "top", "in", "de", "app"]
+
+
+def generate_queries(num_lines, seed=42):
+    rng = np.random.default_rng(seed)
+    labels = np.array([f"{word}{i}" for i, word in enumerate(["api", "cdn", "mail", "img", "tracker", "auth"] * 50)])
+    sld = np.array([f"site{i}" for i in range(5000)])
+    domains = pd.Series(
+        np.char.add(np.char.add(np.char.add(labels[rng.integers(0, len(labels), num_lines)], "."),
+                                np.char.add(sld[rng.integers(0, len(sld), num_lines)], ".")),
+                    np.array(TLDS)[rng.integers(0, len(TLDS), num_lines)])
+    )
+    start = int(datetime(2025, 7, 1).timestamp())
+    timestamps = pd.Series(pd.to_datetime(start + rng.integers(0, 30 * 86400, num_lines), unit="s"))
+    return domains, timestamps
+
+
+def train_model():
+    domains, timestamps = generate_queries(5000, seed=1)
+    features = dns_log_parser.extract_features_frame(domains, timestamps)
+    labels = np.where(features["tld"].isin(["xyz", "tk", "top"]), "High",
+                      np.where(features["hour_accessed"] < 9, "Intermediate", "Low"))
+    encoder = ColumnTransformer([("tld", OneHotEncoder(handle_unknown="ignore"), ["tld"])], remainder="passthrough")
+    return make_pipeline(encoder, RandomForestClassifier(n_estimators=50, random_state=0)).fit(features, labels)
+
+
+def main():
+    num_lines = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    sample = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    model = train_model()
+    dns_log_parser.get_dns_model = lambda: model
+    domains, timestamps = generate_queries(num_lines)
+
+    rows = random.Random(0).sample(range(num_lines), min(sample, num_lines))
+    start = time.perf_counter()
+    per_line = [dns_log_parser.predict_model_risk(domains[i], timestamps[i].to_pydatetime()) for i in rows]
+    per_line_rate = len(rows) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    features = dns_log_parser.extract_features_frame(domains, timestamps)
+    predictions = dns_log_parser.predict_model_risk_batch(features)
+    batched_secs = time.perf_counter() - start
+
+    assert list(predictions[rows]) == per_line, "batched scoring diverged from per-line scoring"
+    print(f"lines:        {num_lines:,}")
+    print(f"distinct feature rows: {len(features.drop_duplicates()):,}")
+    print(f"per-line:     {per_line_rate:12,.0f} lines/s  (~{num_lines / per_line_rate / 3600:.1f} h for all lines)")
+    print(f"batched:      {num_lines / batched_secs:12,.0f} lines/s  ({batched_secs:.1f} s)")
+    print(f"speedup:      {num_lines / batched_secs / per_line_rate:,.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# benchmarks/bench_domain_rules.py
+#
+# Domain classification cost against rule-list size: the any(x in domain)
+# loops classify_risk used to run, against the compiled DomainMatcher
+# (suffix trie + Aho-Corasick). Half the rules are TLD/domain suffixes and
+# half are keywords; none of the queried domains match, the worst case for
+# the linear scan.
+#
+#   python -m benchmarks.bench_domain_rules [num_domains]
+
+import random
+import string
+import sys
+import time
+
+from backend.utils.domain_rules import DomainMatcher, DomainRule
+
+
+def random_word(rng, length):
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(length))
+
+
+def main():
+    num_domains = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    rng = random.Random(0)
+    domains = [f"{random_word(rng, 8)}.{random_word(rng, 10)}.com" for _ in range(num_domains)]
+
+    print(f"{'rules':>8} {'linear/s':>12} {'matcher/s':>12}")
+    for num_rules in (10, 1_000, 10_000, 50_000):
+        suffixes = [f".{random_word(rng, 12)}" for _ in range(num_rules // 2)]
+        keywords = [random_word(rng, 12) for _ in range(num_rules - len(suffixes))]
+        matcher = DomainMatcher(
+            [DomainRule("bench", "suffix", s, "High", "TLD") for s in suffixes]
+            + [DomainRule("bench", "substring", k, "Intermediate", "Keyword") for k in keywords]
+        )
+
+        sample = domains[:max(200, num_domains * 10 // num_rules)]
+        start = time.perf_counter()
+        linear = [any(s in d for s in suffixes) or any(k in d for k in keywords) for d in sample]
+        linear_rate = len(sample) / (time.perf_counter() - start)
+
+        assert [matcher.match(d) is not None for d in sample] == linear
+
+        start = time.perf_counter()
+        for d in domains:
+            matcher.match(d)
+        compiled_rate = num_domains / (time.perf_counter() - start)
+        print(f"{num_rules:>8,} {linear_rate:>12,.0f} {compiled_rate:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
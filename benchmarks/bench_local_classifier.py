@@ -0,0 +1,44 @@
+# benchmarks/bench_local_classifier.py
+#
+# Per-lookup cost of LocalNetworkClassifier against the old
+# startswith("192.")/("10.")/("172.") checks on a capture-like address mix.
+#
+#   python -m benchmarks.bench_local_classifier [num_lookups]
+
+import random
+import sys
+import time
+
+from backend.utils.network import LocalNetworkClassifier
+
+
+def string_prefix_check(src):
+    return src.startswith("192.") or src.startswith("10.") or src.startswith("172.")
+
+
+def main():
+    num_lookups = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    random.seed(7)
+    peers = [f"{random.randint(1, 223)}.{random.randint(0, 255)}.{random.randint(0, 255)}.{random.randint(1, 254)}" for _ in range(500)]
+    peers += ["192.168.1.23", "10.0.0.5"] * 250
+    addresses = [random.choice(peers) for _ in range(num_lookups)]
+
+    start = time.perf_counter()
+    for src in addresses:
+        string_prefix_check(src)
+    prefix_secs = time.perf_counter() - start
+
+    classifier = LocalNetworkClassifier()
+    is_local = classifier.is_local
+    start = time.perf_counter()
+    for src in addresses:
+        is_local(src)
+    classifier_secs = time.perf_counter() - start
+
+    print(f"lookups:      {num_lookups}")
+    print(f"startswith:   {prefix_secs * 1e9 / num_lookups:6.1f} ns/lookup")
+    print(f"classifier:   {classifier_secs * 1e9 / num_lookups:6.1f} ns/lookup")
+
+
+if __name__ == "__main__":
+    main()
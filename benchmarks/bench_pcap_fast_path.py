@@ -0,0 +1,56 @@
+# benchmarks/bench_pcap_fast_path.py
+#
+# Compares the scapy dissection path with the raw libpcap fast path of
+# extract_upload_data on traffic shaped like forgeneratingpcap.py.
+#
+#   python -m benchmarks.bench_pcap_fast_path [num_packets]
+
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from scapy.all import IP, TCP, Ether, RandIP, RandShort, wrpcap
+from scapy.data import ETH_P_IP
+
+from backend.analysis.bandwidth_analyser import _aggregate_raw_pcap, _aggregate_scapy
+
+
+def generate_pcap(path, num_packets):
+    base_time = datetime.now()
+    packets = []
+    for i in range(num_packets):
+        # Half the traffic originates from the device so the upload branch is exercised
+        src_ip = f"192.168.1.{random.randint(2, 254)}" if i % 2 else str(RandIP())
+        pkt = Ether(type=ETH_P_IP) / IP(src=src_ip, dst=str(RandIP())) / TCP(sport=RandShort(), dport=80) / os.urandom(random.randint(100, 1500))
+        pkt.time = (base_time + timedelta(seconds=i * 0.01)).timestamp()
+        packets.append(pkt)
+    wrpcap(path, packets)
+
+
+def timed(fn, path):
+    start = time.perf_counter()
+    result = fn(path)
+    return result, time.perf_counter() - start
+
+
+def main():
+    num_packets = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bandwidth_analysis_simulated.pcap")
+        generate_pcap(path, num_packets)
+
+        scapy_result, scapy_secs = timed(_aggregate_scapy, path)
+        fast_result, fast_secs = timed(_aggregate_raw_pcap, path)
+
+    assert scapy_result == fast_result, "fast path diverged from scapy"
+    print(f"packets:    {num_packets}")
+    print(f"scapy:      {num_packets / scapy_secs:12,.0f} pkt/s")
+    print(f"fast path:  {num_packets / fast_secs:12,.0f} pkt/s")
+    print(f"speedup:    {scapy_secs / fast_secs:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
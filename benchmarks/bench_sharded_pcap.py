@@ -0,0 +1,59 @@
+# benchmarks/bench_sharded_pcap.py
+#
+# Times extract_upload_data on one core against the sharded process pool.
+# The capture cache is bypassed so both runs actually parse the capture.
+#
+#   python -m benchmarks.bench_sharded_pcap [num_packets] [workers]
+
+import os
+import struct
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from scapy.all import IP, TCP, Ether
+
+from backend.analysis.bandwidth_analyser import extract_upload_data
+
+
+def generate_pcap(path, num_packets):
+    # Write records directly; building millions of scapy packets would take longer than the benchmark
+    frames = [
+        bytes(Ether() / IP(src=f"192.168.1.{i % 250 + 2}", dst=f"93.184.{i % 200}.1") / TCP(sport=40000 + i, dport=443) / (b"b" * (100 + i * 13 % 1400)))
+        for i in range(256)
+    ]
+    base_time = int(datetime.now().timestamp())
+    with open(path, "wb") as f:
+        f.write(struct.pack("<IHHiIII", 0xA1B2C3D4, 2, 4, 0, 0, 65535, 1))
+        for i in range(num_packets):
+            frame = frames[i % len(frames)]
+            f.write(struct.pack("<IIII", base_time + i // 100, (i % 100) * 10000, len(frame), len(frame)))
+            f.write(frame)
+
+
+def main():
+    num_packets = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "large.pcap")
+        generate_pcap(path, num_packets)
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+
+        start = time.perf_counter()
+        single = extract_upload_data(path, workers=1, use_cache=False)
+        single_secs = time.perf_counter() - start
+
+        start = time.perf_counter()
+        sharded = extract_upload_data(path, workers=workers, use_cache=False)
+        sharded_secs = time.perf_counter() - start
+
+    assert single.reset_index(drop=True).equals(sharded.reset_index(drop=True)), "sharded result diverged"
+    print(f"capture:    {num_packets} packets, {size_mb:.0f} MB")
+    print(f"1 worker:   {num_packets / single_secs:12,.0f} pkt/s")
+    print(f"{workers} workers:  {num_packets / sharded_secs:12,.0f} pkt/s")
+    print(f"speedup:    {single_secs / sharded_secs:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
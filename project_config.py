@@ -7,3 +7,7 @@ load_dotenv()  # Load environment variables from .env file
 
 VT_API_KEY = os.getenv("VT_API_KEY")
 
+# Point at a local mock server for testing, e.g. http://127.0.0.1:8000/api/v3
+VT_API_URL = os.getenv("VT_API_URL", "https://www.virustotal.com/api/v3")
+# Answer threat-intel lookups only from the local cache and blocklist
+THREAT_INTEL_OFFLINE = os.getenv("THREAT_INTEL_OFFLINE", "").lower() in ("1", "true", "yes")
@@ -1,15 +1,24 @@
 # streamlit_app/pages/5_Bandwidth_Analyzer.py
 
+import os
 import streamlit as st
 import pandas as pd
 import plotly.express as px
 from backend.analysis.bandwidth_analyser import (
     pull_pcap_from_device,
-    extract_upload_data,
+    analyze_capture,
+    resample_upload,
+    add_rolling_window,
+    BUCKET_SIZES,
     detect_anomalies,
+    summarize_destinations,
+    export_destination_report,
     export_report,
-    compute_sha256
+    compute_sha256,
+    OnlineBurstDetector
 )
+from backend.analysis.bandwidth_live import monitor_device
+from backend.utils.pcap_reader import CAPTURE_UPLOAD_TYPES
 
 def bandwidth_analysis_ui():
     st.set_page_config(page_title="📶 Bandwidth Anomaly Detector", layout="wide")
@@ -20,46 +29,88 @@ def bandwidth_analysis_ui():
     """)
     st.sidebar.header("📂 Data Source")
 
-    use_adb = st.sidebar.radio("Select Input Method", ["ADB Pull", "Manual Upload"])
+    use_adb = st.sidebar.radio("Select Input Method", ["ADB Pull", "Manual Upload", "Live Stream (ADB)"])
     use_ml = st.sidebar.checkbox("Use AI Model for Risk Scoring", value=True)
+    bucket = st.sidebar.select_slider("Time Bucket", options=list(BUCKET_SIZES), value="1m")
+    # Windows shorter than a bucket would divide a whole bucket's bytes by too few seconds
+    windows = [w for w in ("1m", "5m", "1h") if BUCKET_SIZES[w] >= BUCKET_SIZES[bucket]]
+    rolling_window = st.sidebar.selectbox("Rolling Window", ["Off"] + windows, index=0)
+    detect_bursts = st.sidebar.checkbox("Flag bursts against each flow's own baseline", value=False)
+
+    if use_adb == "Live Stream (ADB)":
+        live_bandwidth_ui(bucket, detect_bursts)
+        return
 
     if use_adb == "ADB Pull":
         if st.sidebar.button("📥 Pull PCAP from Device"):
             try:
-                pcap_path = pull_pcap_from_device()
+                st.session_state.bandwidth_pulled_pcap = pull_pcap_from_device()
                 st.success("✅ PCAP pulled from device.")
             except Exception as e:
                 st.error(f"❌ ADB Error: {e}")
                 return
-        else:
+        if "bandwidth_pulled_pcap" not in st.session_state:
             st.info("⬅️ Click 'Pull PCAP from Device' to begin.")
             return
+        pcap_path = st.session_state.bandwidth_pulled_pcap
     else:
-        uploaded_file = st.sidebar.file_uploader("Upload PCAP File", type=["pcap"])
+        uploaded_file = st.sidebar.file_uploader("Upload PCAP File", type=CAPTURE_UPLOAD_TYPES)
         if uploaded_file:
             pcap_path = f"forensics_output/bandwidth/uploaded_{uploaded_file.name}"
             with open(pcap_path, "wb") as f:
                 f.write(uploaded_file.read())
             st.success("✅ Uploaded PCAP file.")
         else:
-            st.info("⬅️ Upload a `.pcap` file to begin.")
+            st.info("⬅️ Upload a `.pcap`/`.pcapng` file (optionally `.gz` or `.zst` compressed) to begin.")
             return
 
-    with st.spinner("⏳ Processing..."):
-        df = extract_upload_data(pcap_path)
-        if df.empty:
-            st.warning("No valid upload traffic found.")
-            return
-        df = detect_anomalies(df, use_ml=use_ml)
+    # Parse once per capture; changing bucket or window only re-buckets the
+    # per-second base series kept in the session.
+    stat = os.stat(pcap_path)
+    capture_key = (pcap_path, stat.st_size, stat.st_mtime_ns, detect_bursts)
+    if st.session_state.get("bandwidth_capture_key") != capture_key:
+        with st.spinner("⏳ Processing..."):
+            detector = OnlineBurstDetector() if detect_bursts else None
+            st.session_state.bandwidth_capture = analyze_capture(pcap_path, burst_detector=detector)
+            st.session_state.bandwidth_bursts = detector.burst_frame() if detector else None
+            st.session_state.bandwidth_capture_key = capture_key
+    base_df, flow_df = st.session_state.bandwidth_capture
+    bursts = st.session_state.bandwidth_bursts
+    for algorithm, digest in base_df.attrs.get("hashes", {}).items():
+        st.caption(f"Evidence {algorithm.upper()}: `{digest}`")
+
+    if base_df.empty:
+        st.warning("No valid upload traffic found.")
+        return
+    df = detect_anomalies(resample_upload(base_df, bucket), use_ml=use_ml)
+    if rolling_window != "Off":
+        df = add_rolling_window(df, rolling_window, bucket)
 
     st.subheader("📈 Upload Bandwidth Over Time")
     fig = px.line(df, x="Timestamp", y="Upload_MB", color="Risk_Level", markers=True)
     st.plotly_chart(fig, use_container_width=True)
+    if rolling_window != "Off":
+        st.line_chart(df.set_index("Timestamp")["Rolling_Rate_Bps"])
+
+    if bursts is not None:
+        st.subheader("⚡ Upload Bursts")
+        if bursts.empty:
+            st.info("No bursts above the learned baselines.")
+        else:
+            st.dataframe(bursts, use_container_width=True)
 
     st.subheader("📌 Anomaly Table")
     with st.expander("🔍 View Detailed Anomalies"):
         st.dataframe(df, use_container_width=True)
 
+    st.subheader("🌍 Upload Destinations")
+    # Destinations are named from the capture's own DNS answers, collected in the same pass
+    destinations = summarize_destinations(flow_df, base_df.attrs.get("dns_names", {}))
+    st.dataframe(destinations, use_container_width=True)
+    with st.expander("🔗 View Flow Table"):
+        st.dataframe(flow_df, use_container_width=True)
+    export_destination_report(destinations)
+
     st.markdown("### 📁 Export Report")
     csv_path, zip_path = export_report(df)
     sha256 = compute_sha256(csv_path)
@@ -68,6 +119,37 @@ def bandwidth_analysis_ui():
     st.download_button("⬇️ Download CSV", open(csv_path, "rb"), file_name="bandwidth_anomalies.csv")
     st.download_button("📦 Download ZIP Report", open(zip_path, "rb"), file_name="bandwidth_report.zip")
 
+def live_bandwidth_ui(bucket, detect_bursts):
+    duration = st.sidebar.number_input("Observation Window (seconds)", min_value=10, max_value=3600, value=60, step=10)
+    if not st.sidebar.button("📡 Start Live Capture"):
+        st.info("⬅️ Streams `tcpdump` from the device over ADB; nothing is stored on the phone.")
+        return
+
+    status = st.empty()
+    chart = st.empty()
+    flows = st.empty()
+    burst_table = st.empty()
+    detector = OnlineBurstDetector() if detect_bursts else None
+
+    refreshes = []
+
+    def refresh(monitor):
+        refreshes.append(monitor.packets)
+        df = monitor.upload_frame()
+        status.caption(f"Packets: {monitor.packets:,} · Flows tracked: {len(monitor.flows):,} · Evicted: {monitor.evicted_flows:,}")
+        if not df.empty:
+            chart.plotly_chart(px.bar(df, x="Timestamp", y="Upload_MB", color="Risk_Level"), use_container_width=True, key=f"live_upload_{len(refreshes)}")
+        flows.dataframe(summarize_destinations(monitor.flow_frame()), use_container_width=True)
+        if detector is not None and detector.bursts:
+            burst_table.dataframe(detector.burst_frame(), use_container_width=True)
+
+    try:
+        monitor = monitor_device(duration=duration, bucket=bucket, on_update=refresh, burst_detector=detector)
+    except Exception as e:
+        st.error(f"❌ Live capture failed: {e}")
+        return
+    st.success(f"✅ Live capture finished ({monitor.packets:,} packets).")
+
 if __name__ == "__main__":
     bandwidth_analysis_ui()
 
@@ -1,8 +1,15 @@
 # streamlit_app/pages_views/dns_analysis_page.py
 
+import os
+import shutil
+
 import streamlit as st
-from backend.analysis.dns_log_parser import analyze_dns_logs
-from backend.extract.adb_connector import pull_dns_logs_from_device
+from backend.analysis.dns_log_parser import stream_dns_logs, DNS_PREVIEW_ROWS, THREAT_INTEL_BUDGET
+from backend.analysis.dns_log_tail import tail_dns_log
+from backend.analysis.dns_sketch import sketch_dns_logs
+from backend.extract.adb_connector import SDCARD_DNS_LOG_PATH, pull_dns_logs_from_device
+from backend.utils.compression import COMPRESSED_UPLOAD_TYPES
+from backend.utils.pcap_reader import is_capture_file
 
 def dns_analysis_ui():
     st.title("🌐 DNS Logs Analysis")
@@ -19,29 +26,114 @@ def dns_analysis_ui():
             else:
                 st.error("No device detected or failed to pull logs.")
     else:
-        uploaded = st.file_uploader("📤 Upload DNS log file", type=["txt", "log"])
-        if uploaded:
-            temp_path = f"temp_uploads/{uploaded.name}"
-            with open(temp_path, "wb") as f:
+        uploaded_files = st.file_uploader(
+            "📤 Upload DNS log file(s) or packet captures",
+            type=["txt", "log", "pcap", "pcapng", "cap"] + COMPRESSED_UPLOAD_TYPES,
+            accept_multiple_files=True,
+        )
+        if uploaded_files:
+            # Several rotated logs are analyzed together as one directory
+            upload_dir = "temp_uploads/dns_logs" if len(uploaded_files) > 1 else "temp_uploads"
+            if len(uploaded_files) > 1:
+                shutil.rmtree(upload_dir, ignore_errors=True)
+            os.makedirs(upload_dir, exist_ok=True)
+            for uploaded in uploaded_files:
+                with open(os.path.join(upload_dir, uploaded.name), "wb") as f:
+                    f.write(uploaded.read())
+            dns_log_file = upload_dir if len(uploaded_files) > 1 else os.path.join(upload_dir, uploaded_files[0].name)
+
+    offline_intel = st.checkbox(
+        "🛰️ Offline threat intel", value=False,
+        help="Use only cached VirusTotal verdicts and the local blocklist; no lookups are sent.",
+    )
+
+    incremental = st.checkbox(
+        "🔁 Only analyze entries added since the last run", value=False,
+        help="Appends new queries to the previous report of this log; a truncated or rotated log is rescanned.",
+    )
+
+    sketch_mode = st.checkbox(
+        "📉 Sketch mode (approximate, fixed memory)", value=False,
+        help="Top domains, distinct counts and hourly activity for very large logs, without a per-query report.",
+    )
+    merge_paths = []
+    if sketch_mode:
+        earlier = st.file_uploader(
+            "➕ Merge sketches from other runs or devices (.npz)", type=["npz"], accept_multiple_files=True
+        )
+        os.makedirs("temp_uploads/dns_sketches", exist_ok=True)
+        for uploaded in earlier or []:
+            path = os.path.join("temp_uploads/dns_sketches", uploaded.name)
+            with open(path, "wb") as f:
                 f.write(uploaded.read())
-            dns_log_file = temp_path
+            merge_paths.append(path)
 
     if dns_log_file and st.button("🚀 Analyze DNS Logs"):
-        df, csv_path, hash_path, zip_path = analyze_dns_logs(dns_log_file)
+        progress_bar = st.progress(0.0, text="Parsing DNS log...")
+
+        def show_progress(bytes_read, total_bytes, rows):
+            fraction = min(bytes_read / total_bytes, 1.0) if total_bytes else 1.0
+            progress_bar.progress(fraction, text=f"Analyzed {rows:,} queries ({fraction:.0%} of log)")
 
-        if not df.empty:
-            st.success("✅ DNS analysis complete.")
-            st.dataframe(df)
+        options = dict(
+            progress=show_progress, case_id=st.session_state.get("case_number"),
+            intel_budget=0 if offline_intel else THREAT_INTEL_BUDGET,
+        )
+        if sketch_mode:
+            summary, sketch_path, hash_path, zip_path = sketch_dns_logs(
+                dns_log_file, progress=show_progress, merge_with=merge_paths
+            )
+            progress_bar.empty()
+            show_sketch_summary(summary, sketch_path, hash_path, zip_path)
+            return
+        if incremental and os.path.isfile(dns_log_file) and not is_capture_file(dns_log_file):
+            # Every ADB pull lands in a new local file; key the checkpoint on the device path
+            source_id = f"adb:{SDCARD_DNS_LOG_PATH}" if use_adb else None
+            summary, csv_path, hash_path, zip_path = tail_dns_log(dns_log_file, source_id=source_id, **options)
+        else:
+            summary, csv_path, hash_path, zip_path = stream_dns_logs(dns_log_file, **options)
+        progress_bar.empty()
+
+        if summary["rows"]:
+            st.success(f"✅ DNS analysis complete: {summary['rows']:,} queries.")
+            if "new_rows" in summary:
+                st.caption(f"{summary['new_rows']:,} new queries appended to the existing report.")
+            if summary["rows"] > DNS_PREVIEW_ROWS:
+                st.caption(f"Showing the first {DNS_PREVIEW_ROWS:,} rows; the CSV report has all of them.")
+            st.dataframe(summary["preview"])
 
             st.download_button("📥 Download CSV Report", data=open(csv_path, "rb"), file_name="dns_analysis.csv")
             st.download_button("🔐 Download Hash", data=open(hash_path, "rb"), file_name="dns_hash.txt")
             st.download_button("🗜️ Download ZIP Report", data=open(zip_path, "rb"), file_name="dns_report.zip")
 
             st.markdown("### 📊 Risk Distribution")
-            st.bar_chart(df["Model Risk"].value_counts())
+            st.bar_chart(summary["Model Risk"])
 
             st.markdown("### ⏱️ After-Hours Access")
-            after_hours_count = df["Accessed After Hours"].value_counts()
-            st.bar_chart(after_hours_count)
+            st.bar_chart(summary["Accessed After Hours"])
         else:
             st.warning("No valid DNS entries found.")
+
+
+def show_sketch_summary(summary, sketch_path, hash_path, zip_path):
+    totals = summary["totals"]
+    if not totals["Queries"]:
+        st.warning("No valid DNS entries found.")
+        return
+    st.success(f"✅ Sketched {totals['Queries']:,} queries from {totals['Sources']} source(s).")
+    cols = st.columns(3)
+    cols[0].metric("Distinct Domains (approx.)", f"{totals['Distinct Domains']:,}")
+    cols[1].metric("Distinct Parent Domains (approx.)", f"{totals['Distinct Parent Domains']:,}")
+    cols[2].metric("After-Hours Queries", f"{totals['After-Hours Queries']:,}")
+    st.caption(f"{totals['First Seen']} → {totals['Last Seen']}")
+
+    st.markdown("### 🔝 Top Domains")
+    st.dataframe(summary["top_domains"])
+    st.markdown("### 🏷️ Top Parent Domains")
+    st.dataframe(summary["top_parents"])
+    st.markdown("### 🕒 Queries per Hour of Day")
+    st.bar_chart(summary["hours"].set_index("Hour"))
+
+    st.download_button("🧮 Download Sketch (mergeable)", data=open(sketch_path, "rb"), file_name="dns_sketch.npz")
+    st.download_button("🔐 Download Hash", data=open(hash_path, "rb"), file_name="dns_sketch_hash.txt")
+    st.download_button("🗜️ Download ZIP Report", data=open(zip_path, "rb"), file_name="dns_sketch_report.zip")
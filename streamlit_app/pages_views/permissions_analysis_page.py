@@ -1,9 +1,8 @@
 # streamlit_app/pages_views/permissions_analysis_page.py
 
 import os
-import json
 import streamlit as st
-from backend.analysis.permissions_audit import analyze_permissions, generate_visualizations, generate_report, zip_report_components
+from backend.analysis.permissions_audit import analyze_permissions, generate_visualizations, generate_report, zip_report_components, load_extracted_json, DUMP_SUFFIXES
 from backend.extract.adb_connector import auto_extract_android_filesystem
 from ai_models.permission_model.predictor import PermissionRiskPredictor
 import tempfile
@@ -29,7 +28,7 @@ def permissions_ui():
 
     # File uploader (supports multiple types)
     with col2:
-        uploaded_file = st.file_uploader("📤 Upload Permissions-related File", type=["json", "xml", "txt", "zip", "pcap", "log"], accept_multiple_files=False)
+        uploaded_file = st.file_uploader("📤 Upload Permissions-related File", type=["json", "xml", "txt", "zip", "pcap", "log", "gz", "zst"], accept_multiple_files=False)
 
     # Choose from existing dumps
     existing_dumps = [d for d in os.listdir(base_dir) if os.path.isdir(os.path.join(base_dir, d))]
@@ -38,6 +37,7 @@ def permissions_ui():
     # Final action
     if st.button("🚀 Run Permissions Audit"):
         json_data = None
+        source_hashes = {}
 
         # Option 1: Uploaded file
         if uploaded_file:
@@ -46,19 +46,18 @@ def permissions_ui():
                 temp_path = os.path.join(tmpdir, uploaded_file.name)
                 with open(temp_path, "wb") as f:
                     f.write(uploaded_file.read())
-                if suffix == "json":
-                    json_data = json.load(open(temp_path))
+                if uploaded_file.name.lower().endswith(DUMP_SUFFIXES):
+                    json_data, source_hashes = load_extracted_json(temp_path, with_hashes=True)
                 elif suffix in ["zip", "pcap", "log", "txt", "xml"]:
                     st.warning(f"⚠️ File type `{suffix}` is supported for upload, but parsing logic is not yet implemented for it.")
         # Option 2: From parsed dump
         elif selected_case:
             selected_dir = os.path.join(base_dir, selected_case)
-            candidates = [f for f in os.listdir(selected_dir) if f.endswith(".json")]
+            candidates = [f for f in os.listdir(selected_dir) if f.endswith(DUMP_SUFFIXES)]
             if candidates:
                 latest_file = sorted(candidates)[-1]
                 json_path = os.path.join(selected_dir, latest_file)
-                with open(json_path, "r") as f:
-                    json_data = json.load(f)
+                json_data, source_hashes = load_extracted_json(json_path, with_hashes=True)
             else:
                 st.error("❌ No JSON file found in selected dump folder.")
 
@@ -66,6 +65,8 @@ def permissions_ui():
             predictor = PermissionRiskPredictor()
             df = analyze_permissions(json_data)
             st.success("✅ Permissions successfully analyzed.")
+            for algorithm, digest in source_hashes.items():
+                st.caption(f"Source {algorithm.upper()}: `{digest}`")
             st.dataframe(df)
 
             report_csv = generate_report(json_data, predictor)
@@ -7,11 +7,12 @@ import shutil
 import tempfile
 import pandas as pd
 from backend.analysis.ssl_certificate_inspector import pull_pcap_from_android, parse_ssl_certificates
+from backend.utils.pcap_reader import CAPTURE_UPLOAD_TYPES
 
 def ssl_analysis_ui():
     st.title("🔐 SSL Certificate Analysis")
 
-    uploaded_pcap = st.file_uploader("Upload PCAP or ZIP File", type=["pcap", "zip"])
+    uploaded_pcap = st.file_uploader("Upload PCAP or ZIP File", type=CAPTURE_UPLOAD_TYPES + ["zip"])
     col1, col2 = st.columns(2)
     analyze = False
 
@@ -36,7 +37,7 @@ def ssl_analysis_ui():
                     zip_ref.extractall(tmpdir)
                 for root, _, files in os.walk(tmpdir):
                     for f in files:
-                        if f.endswith(".pcap"):
+                        if f.rsplit(".", 1)[-1] in CAPTURE_UPLOAD_TYPES:
                             shutil.copy(os.path.join(root, f), path)
                             st.success(f"Loaded: {f}")
                             analyze = True
@@ -46,14 +47,24 @@ def ssl_analysis_ui():
             st.success("✅ PCAP uploaded.")
 
     if analyze and os.path.exists("data/traffic.pcap"):
-        with st.spinner("🔎 Parsing SSL certificates..."):
-            csv, zipf, certs = parse_ssl_certificates()
-            if certs:
-                df = pd.DataFrame(certs)
-                st.dataframe(df)
-                if os.path.exists(csv):
-                    st.download_button("⬇ Download CSV", open(csv, "rb"), "ssl_certificates.csv")
-                if os.path.exists(zipf):
-                    st.download_button("⬇ Download ZIP", open(zipf, "rb"), "ssl_certificates.zip")
-            else:
-                st.warning("⚠️ No certificates found.")
+        progress_bar = st.progress(0.0, text="🔎 Reading server names from capture...")
+        live_table = st.empty()
+        seen = []
+
+        def show_result(info, done, total):
+            # Certificates appear as each host answers, not after the slowest one
+            seen.append(info)
+            progress_bar.progress(done / total, text=f"Inspected {done:,} of {total:,} hosts")
+            live_table.dataframe(pd.DataFrame(seen))
+
+        csv, zipf, certs = parse_ssl_certificates(on_result=show_result)
+        progress_bar.empty()
+        if certs:
+            df = pd.DataFrame(certs)
+            live_table.dataframe(df)
+            if os.path.exists(csv):
+                st.download_button("⬇ Download CSV", open(csv, "rb"), "ssl_certificates.csv")
+            if os.path.exists(zipf):
+                st.download_button("⬇ Download ZIP", open(zipf, "rb"), "ssl_certificates.zip")
+        else:
+            st.warning("⚠️ No certificates found.")
@@ -1,6 +1,7 @@
 # streamlit_app/sidebar.py
 
 import streamlit as st
+from ai_models.registry import model_load_stats
 
 def show_sidebar():
     with st.sidebar:
@@ -33,6 +34,16 @@ def show_sidebar():
             if st.button("🚀 Go to Case Workspace"):
                 st.session_state.page = "CaseWorkspace"
 
+            with st.expander("🧠 AI Models"):
+                # Models load on first use; this shows which are resident and what they cost
+                for row in model_load_stats():
+                    if row["loaded"]:
+                        st.caption(f"{row['model']}: loaded in {row['load_seconds']:.2f}s")
+                    elif row["error"]:
+                        st.caption(f"{row['model']}: unavailable")
+                    else:
+                        st.caption(f"{row['model']}: not loaded yet")
+
             if st.button("🔓 Logout"):
                 st.session_state.authenticated = False
                 st.session_state.case_started = False
@@ -0,0 +1,48 @@
+# tests/conftest.py
+
+import gzip
+
+import pytest
+import zstandard
+from scapy.all import wrpcap, wrpcapng
+
+from backend.analysis import bandwidth_cache, dns_log_parser
+from backend.utils import threat_intel
+
+
+@pytest.fixture(autouse=True)
+def isolated_capture_cache(tmp_path, monkeypatch):
+    """Keep parsed-capture caches written by tests out of forensics_output/."""
+    monkeypatch.setattr(bandwidth_cache, "CACHE_DIR", str(tmp_path / "capture_cache"))
+
+
+@pytest.fixture(autouse=True)
+def fresh_domain_cache(monkeypatch):
+    """Per-domain DNS verdicts must not leak between tests that patch threat intel."""
+    monkeypatch.setattr(dns_log_parser, "_domain_cache", None)
+
+
+@pytest.fixture(autouse=True)
+def offline_threat_intel(monkeypatch):
+    """No test talks to VirusTotal: an offline client over an in-memory cache."""
+    client = threat_intel.ThreatIntelClient(
+        api_key=None, cache=threat_intel.ThreatIntelCache(":memory:"), offline=True
+    )
+    monkeypatch.setattr(threat_intel, "_client", client)
+    return client
+
+
+@pytest.fixture
+def capture_variants(tmp_path):
+    """Write packets as pcap, pcapng, gzip'd pcapng and zstd'd pcap; returns the paths."""
+    def write(packets):
+        pcap_path = tmp_path / "plain.pcap"
+        pcapng_path = tmp_path / "plain.pcapng"
+        wrpcap(str(pcap_path), packets)
+        wrpcapng(str(pcapng_path), packets)
+        gz_path = tmp_path / "capture.pcapng.gz"
+        gz_path.write_bytes(gzip.compress(pcapng_path.read_bytes()))
+        zst_path = tmp_path / "capture.pcap.zst"
+        zst_path.write_bytes(zstandard.ZstdCompressor().compress(pcap_path.read_bytes()))
+        return [str(p) for p in (pcap_path, pcapng_path, gz_path, zst_path)]
+    return write
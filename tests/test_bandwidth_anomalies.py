@@ -0,0 +1,42 @@
+# tests/test_bandwidth_anomalies.py
+
+from datetime import datetime
+
+import pandas as pd
+
+from backend.analysis.bandwidth_analyser import detect_anomalies
+
+
+def sample_frame():
+    df = pd.DataFrame({
+        "Timestamp": [
+            datetime(2025, 7, 13, 10, 0),
+            datetime(2025, 7, 13, 11, 0),
+            datetime(2025, 7, 13, 12, 0),
+            datetime(2025, 7, 13, 22, 0),
+            datetime(2025, 7, 13, 8, 59),
+        ],
+        "Upload_MB": [0.5, 1.5, 6.0, 0.1, 0.2],
+    })
+    df["Upload_Bytes"] = (df["Upload_MB"] * 1024 * 1024).astype(int)
+    return df
+
+
+def test_labels_match_rules():
+    df = detect_anomalies(sample_frame(), threshold_mb=1.0)
+    assert df["After_Hours"].tolist() == [False, False, False, True, True]
+    assert df["Risk_Level"].tolist() == ["Low", "Intermediate", "High", "High", "High"]
+    assert "Hour" not in df.columns
+
+
+def test_ml_scores_apply_thresholds():
+    df = detect_anomalies(sample_frame(), use_ml=True)
+    assert df["ML_Score"].between(0, 1).all()
+    high = (df["Upload_MB"] > 5) | df["After_Hours"] | (df["ML_Score"] > 0.8)
+    assert (df.loc[high, "Risk_Level"] == "High").all()
+    assert "Hour" not in df.columns
+
+
+def test_empty_frame():
+    df = pd.DataFrame(columns=["Timestamp", "Upload_Bytes", "Upload_MB"])
+    assert detect_anomalies(df)["Risk_Level"].tolist() == []
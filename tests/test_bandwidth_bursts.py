@@ -0,0 +1,86 @@
+# tests/test_bandwidth_bursts.py
+
+import random
+from datetime import datetime
+
+import numpy as np
+from scapy.all import IP, TCP, Ether, wrpcap
+
+from backend.analysis import bandwidth_analyser
+from backend.analysis.bandwidth_analyser import TOTAL_SERIES, OnlineBurstDetector
+from backend.analysis.bandwidth_live import LiveBandwidthMonitor
+from backend.utils.streaming_stats import EWMA, P2Quantile
+
+
+def test_p2_quantile_tracks_numpy():
+    values = np.random.default_rng(7).lognormal(10, 1, 20000)
+    estimate = P2Quantile(0.95)
+    for value in values:
+        estimate.update(float(value))
+    assert abs(estimate.value() / np.quantile(values, 0.95) - 1) < 0.02
+
+
+def test_ewma_mean_and_std():
+    ewma = EWMA(alpha=0.2)
+    for value in [10.0] * 50:
+        ewma.update(value)
+    assert ewma.mean == 10.0 and ewma.std == 0.0
+    ewma.update(20.0)
+    assert ewma.mean == 12.0
+    assert round(ewma.std, 6) == 4.0
+
+
+def burst_packets(base_time):
+    """A chatty flow with a steady few KB per 10s, then one 2 MB burst; plus a quiet flow."""
+    rng = random.Random(3)
+    packets = []
+    for second in range(1200):
+        size = 2_000_000 if second == 1000 else rng.randint(300, 600)
+        for chunk in range(0, size, 1400):
+            pkt = Ether() / IP(src="192.168.1.5", dst="93.184.216.34") / TCP(sport=40000, dport=443) / (b"b" * min(1400, size - chunk))
+            pkt.time = base_time + second + chunk / 1e7
+            packets.append(pkt)
+        if second % 30 == 0:
+            pkt = Ether() / IP(src="192.168.1.5", dst="1.1.1.1") / TCP(sport=41000, dport=443) / (b"q" * 200)
+            pkt.time = base_time + second
+            packets.append(pkt)
+    return packets
+
+
+def test_offline_pass_flags_burst_per_series(tmp_path):
+    base_time = datetime(2025, 7, 13, 11, 0).timestamp()
+    pcap_path = str(tmp_path / "burst.pcap")
+    wrpcap(pcap_path, burst_packets(base_time))
+
+    detector = OnlineBurstDetector(bucket_sizes=("10s", "1m"))
+    upload_df, _ = bandwidth_analyser.analyze_capture(pcap_path, burst_detector=detector)
+    assert upload_df["Upload_Bytes"].sum() > 2_000_000
+
+    bursts = detector.burst_frame()
+    assert list(bursts.columns) == bandwidth_analyser.BURST_COLUMNS
+    assert set(bursts["Bucket"]) == {"10s", "1m"}
+    assert set(bursts["Series"]) == {TOTAL_SERIES, "192.168.1.5:40000 -> 93.184.216.34:443/TCP"}
+    assert set(bursts["Timestamp"]) == {datetime.fromtimestamp(base_time + 1000), datetime.fromtimestamp(base_time + 960)}
+    assert (bursts["Upload_Bytes"] > bursts["Threshold_Bytes"]).all()
+    # One EWMA/P² pair per bucket size per series, whatever the capture length
+    assert len(detector.series) == 2
+
+
+def test_live_monitor_feeds_detector(tmp_path):
+    base_time = datetime(2025, 7, 13, 11, 0).timestamp()
+    pcap_path = str(tmp_path / "burst.pcap")
+    wrpcap(pcap_path, burst_packets(base_time))
+
+    seen = []
+    detector = OnlineBurstDetector(bucket_sizes=("10s",), on_burst=seen.append)
+    with open(pcap_path, "rb") as stream:
+        LiveBandwidthMonitor(bucket="10s", burst_detector=detector).consume(stream)
+    assert len(seen) == 2  # the total and the bursting flow
+    assert detector.burst_frame()["Timestamp"].eq(datetime.fromtimestamp(base_time + 1000)).all()
+
+
+def test_series_count_is_bounded():
+    detector = OnlineBurstDetector(max_series=10)
+    for port in range(1000):
+        detector.observe_upload(1_700_000_000 + port, (b"\x0a\x00\x00\x01", b"\x08\x08\x08\x08", port, 443, 6), 100)
+    assert len(detector.series) == 10
@@ -0,0 +1,95 @@
+# tests/test_bandwidth_cache.py
+
+import hashlib
+import os
+from datetime import datetime
+
+from scapy.all import IP, TCP, UDP, Ether, IPv6, wrpcap
+
+from backend.analysis import bandwidth_analyser, bandwidth_cache
+
+
+def write_capture(path):
+    base_time = datetime(2025, 7, 13, 10, 0).timestamp()
+    packets = []
+    for i in range(50):
+        pkt = Ether() / IP(src="192.168.1.5", dst="10.0.0.0") / TCP(sport=40000, dport=443) / (b"c" * i)
+        pkt.time = base_time + i * 0.25
+        packets.append(pkt)
+    v6 = Ether() / IPv6(src="fd00::5", dst="2001:db8::1") / UDP(sport=5000, dport=53)
+    v6.time = base_time
+    packets.append(v6)
+    wrpcap(str(path), packets)
+
+
+def test_sha256_computed_during_parse(tmp_path):
+    pcap_path = tmp_path / "evidence.pcap"
+    write_capture(pcap_path)
+
+    upload_df, _ = bandwidth_analyser.analyze_capture(str(pcap_path), workers=1)
+    assert upload_df.attrs["sha256"] == hashlib.sha256(pcap_path.read_bytes()).hexdigest()
+    assert upload_df.attrs["hashes"]["md5"] == hashlib.md5(pcap_path.read_bytes()).hexdigest()
+
+
+def test_reopening_capture_skips_decoding(tmp_path, monkeypatch):
+    pcap_path = tmp_path / "evidence.pcap"
+    write_capture(pcap_path)
+
+    first_upload, first_flows = bandwidth_analyser.analyze_capture(str(pcap_path), workers=1)
+    sha256 = first_upload.attrs["sha256"]
+    assert bandwidth_cache.lookup_hashes(str(pcap_path))["sha256"] == sha256
+
+    def fail_decode(*args, **kwargs):
+        raise AssertionError("cached capture must not be decoded again")
+
+    monkeypatch.setattr(bandwidth_analyser, "_aggregate_raw_pcap", fail_decode)
+    monkeypatch.setattr(bandwidth_analyser, "_aggregate_scapy", fail_decode)
+    cached_upload, cached_flows = bandwidth_analyser.analyze_capture(str(pcap_path), workers=1)
+
+    assert cached_upload.equals(first_upload)
+    assert cached_flows.equals(first_flows)
+    assert cached_upload.attrs["sha256"] == sha256
+
+
+def test_cache_round_trip_preserves_aggregates(tmp_path):
+    pcap_path = tmp_path / "evidence.pcap"
+    write_capture(pcap_path)
+    aggregates, hashes = bandwidth_analyser._aggregate_raw_pcap(str(pcap_path))
+    sha256 = hashes["sha256"]
+
+    bandwidth_cache.save_aggregates(sha256, 1, aggregates)
+    assert bandwidth_cache.load_aggregates(sha256, 1) == aggregates
+    assert bandwidth_cache.load_aggregates(sha256, 2) is None
+
+
+def test_cache_hit_rehashes_rewritten_capture(tmp_path):
+    pcap_path = tmp_path / "evidence.pcap"
+    write_capture(pcap_path)
+    first_upload, _ = bandwidth_analyser.analyze_capture(str(pcap_path), workers=1)
+
+    # Same size and mtime, different content (cp -p / touch -r style)
+    stat = pcap_path.stat()
+    data = bytearray(pcap_path.read_bytes())
+    data[-1] ^= 0xFF
+    pcap_path.write_bytes(bytes(data))
+    os.utime(pcap_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    upload, _ = bandwidth_analyser.analyze_capture(str(pcap_path), workers=1)
+    assert upload.attrs["sha256"] == hashlib.sha256(bytes(data)).hexdigest() != first_upload.attrs["sha256"]
+    assert upload.attrs["hashes"]["md5"] == hashlib.md5(bytes(data)).hexdigest()
+
+
+def test_cold_parse_reads_capture_once(tmp_path, monkeypatch):
+    pcap_path = tmp_path / "evidence.pcap"
+    write_capture(pcap_path)
+
+    def fail_hash(*args, **kwargs):
+        raise AssertionError("an uncached capture must be hashed while it is parsed")
+
+    monkeypatch.setattr(bandwidth_analyser, "calculate_hashes", fail_hash)
+    upload, _ = bandwidth_analyser.analyze_capture(str(pcap_path), workers=1)
+    # Indexed, but the cached aggregates are unreadable: parse again, still in one read
+    with open(bandwidth_cache.cache_path(upload.attrs["sha256"], bandwidth_analyser.PARSER_VERSION), "wb") as f:
+        f.write(b"truncated")
+    again, _ = bandwidth_analyser.analyze_capture(str(pcap_path), workers=1)
+    assert again.attrs["hashes"] == upload.attrs["hashes"]
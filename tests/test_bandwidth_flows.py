@@ -0,0 +1,56 @@
+# tests/test_bandwidth_flows.py
+
+from datetime import datetime
+
+import pandas as pd
+from scapy.all import IP, TCP, UDP, Ether, wrpcap
+
+from backend.analysis import bandwidth_analyser
+
+
+def write_flows_pcap(path):
+    base_time = datetime(2025, 7, 13, 10, 0).timestamp()
+    packets = []
+    for i in range(10):
+        up = Ether() / IP(src="192.168.1.5", dst="93.184.216.34") / TCP(sport=40000, dport=443) / (b"u" * 946)
+        up.time = base_time + i
+        down = Ether() / IP(src="93.184.216.34", dst="192.168.1.5") / TCP(sport=443, dport=40000) / (b"d" * 446)
+        down.time = base_time + i + 0.5
+        packets += [up, down]
+    dns = Ether() / IP(src="192.168.1.5", dst="8.8.8.8") / UDP(sport=5353, dport=53) / (b"q" * 30)
+    dns.time = base_time + 3
+    packets.append(dns)
+    wrpcap(str(path), packets)
+
+
+def test_flow_table_tracks_both_directions(tmp_path):
+    pcap_path = tmp_path / "flows.pcap"
+    write_flows_pcap(pcap_path)
+
+    upload_df, flow_df = bandwidth_analyser.analyze_capture(str(pcap_path), workers=1)
+
+    assert upload_df["Upload_Bytes"].sum() == 10 * 1000
+    assert len(flow_df) == 2
+    web = flow_df.iloc[0]
+    assert (web["Source"], web["Destination"], web["Source_Port"], web["Destination_Port"], web["Protocol"]) == (
+        "192.168.1.5", "93.184.216.34", 40000, 443, "TCP"
+    )
+    assert (web["Bytes_Up"], web["Bytes_Down"], web["Packets_Up"], web["Packets_Down"]) == (10000, 5000, 10, 10)
+    assert web["First_Seen"] == datetime(2025, 7, 13, 10, 0)
+    assert web["Last_Seen"] == datetime(2025, 7, 13, 10, 0, 9, 500000)
+    assert flow_df.iloc[1]["Protocol"] == "UDP"
+
+
+def test_destination_report_feeds_timeline(tmp_path, monkeypatch):
+    pcap_path = tmp_path / "flows.pcap"
+    write_flows_pcap(pcap_path)
+    monkeypatch.setattr(bandwidth_analyser, "REPORT_DIR", str(tmp_path / "reports"))
+
+    _, flow_df = bandwidth_analyser.analyze_capture(str(pcap_path), workers=1)
+    destinations = bandwidth_analyser.summarize_destinations(flow_df)
+    assert destinations["Destination"].tolist() == ["93.184.216.34", "8.8.8.8"]
+
+    csv_path = bandwidth_analyser.export_destination_report(destinations)
+    report = pd.read_csv(csv_path)
+    assert {"Timestamp", "Destination", "Risk Level"} <= set(report.columns)
+    assert report["Risk Level"].tolist() == ["Low", "Low"]
@@ -0,0 +1,74 @@
+# tests/test_bandwidth_live.py
+
+import subprocess
+from datetime import datetime
+
+from scapy.all import IP, TCP, UDP, Ether, wrpcap
+
+from backend.analysis import bandwidth_analyser, bandwidth_live
+from backend.analysis.bandwidth_live import LiveBandwidthMonitor
+
+
+def sample_packets(base_time):
+    packets = []
+    for i in range(600):
+        if i % 5 == 0:
+            pkt = Ether() / IP(src="142.250.0.1", dst="192.168.1.5") / TCP(sport=443, dport=40000 + i % 9) / (b"d" * 700)
+        elif i % 7 == 0:
+            pkt = Ether() / IP(src="192.168.1.5", dst="8.8.8.8") / UDP(sport=5353, dport=53) / (b"q" * 40)
+        else:
+            pkt = Ether() / IP(src="192.168.1.5", dst="142.250.0.1") / TCP(sport=40000 + i % 9, dport=443) / (b"u" * (i % 1200))
+        pkt.time = base_time + i * 0.9
+        packets.append(pkt)
+    return packets
+
+
+def test_replayed_stream_matches_offline_analysis(tmp_path):
+    base_time = datetime(2025, 7, 13, 16, 55).timestamp()
+    pcap_path = str(tmp_path / "replay.pcap")
+    wrpcap(pcap_path, sample_packets(base_time))
+
+    offline_upload, offline_flows = bandwidth_analyser.analyze_capture(pcap_path, workers=1)
+    expected = bandwidth_analyser.detect_anomalies(bandwidth_analyser.resample_upload(offline_upload, "1m"))
+
+    updates = []
+    with open(pcap_path, "rb") as stream:
+        monitor = LiveBandwidthMonitor(bucket="1m").consume(stream, on_update=updates.append, update_interval=0)
+    assert len(updates) == 601  # once per packet with a zero interval, plus the final one
+
+    live = monitor.upload_frame()
+    assert live.equals(expected)
+    assert live["Risk_Level"].eq("High").any()  # crosses 17:00
+    assert monitor.flow_frame().equals(offline_flows)
+
+
+def test_memory_stays_bounded(tmp_path):
+    base_time = datetime(2025, 7, 13, 10, 0).timestamp()
+    pcap_path = str(tmp_path / "long.pcap")
+    wrpcap(pcap_path, sample_packets(base_time))
+
+    with open(pcap_path, "rb") as stream:
+        monitor = LiveBandwidthMonitor(bucket="10s", max_buckets=5, max_flows=3).consume(stream)
+    assert len(monitor.buckets) == 5
+    assert len(monitor.flows) == 3
+    assert monitor.evicted_flows > 0
+
+    df = monitor.upload_frame()
+    # Only the newest buckets are kept, each labelled
+    assert df["Timestamp"].iloc[-1] == datetime.fromtimestamp(base_time + 599 * 0.9).replace(microsecond=0, second=50)
+    assert df["Risk_Level"].notna().all()
+
+
+def test_monitor_device_reads_adb_stream(tmp_path, monkeypatch):
+    base_time = datetime(2025, 7, 13, 12, 0).timestamp()
+    pcap_path = str(tmp_path / "device.pcap")
+    wrpcap(pcap_path, sample_packets(base_time))
+
+    # Stand-in for `adb exec-out tcpdump -w -`
+    monkeypatch.setattr(
+        bandwidth_live, "open_tcpdump_stream",
+        lambda device_id=None: subprocess.Popen(["cat", pcap_path], stdout=subprocess.PIPE),
+    )
+    monitor = bandwidth_live.monitor_device(duration=30, bucket="1m")
+    assert monitor.packets == 600
+    assert monitor.upload_frame()["Upload_Bytes"].sum() > 0
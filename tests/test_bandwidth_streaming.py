@@ -0,0 +1,64 @@
+# tests/test_bandwidth_streaming.py
+
+from datetime import datetime
+
+from scapy.all import IP, TCP, Ether, wrpcap
+
+from backend.analysis import bandwidth_analyser
+
+
+def write_sample_pcap(path, base_time):
+    packets = []
+    for i in range(120):
+        pkt = Ether() / IP(src="192.168.1.10", dst="93.184.216.34") / TCP(sport=40000, dport=443) / (b"x" * 100)
+        pkt.time = base_time + i
+        packets.append(pkt)
+    # Inbound traffic must not count as upload
+    reply = Ether() / IP(src="93.184.216.34", dst="192.168.1.10") / TCP(sport=443, dport=40000) / (b"y" * 500)
+    reply.time = base_time
+    packets.append(reply)
+    wrpcap(str(path), packets)
+
+
+def test_extract_upload_data_streams_without_rdpcap(tmp_path, monkeypatch):
+    base_time = datetime(2025, 7, 13, 10, 0, 0).timestamp()
+    pcap_path = tmp_path / "sample.pcap"
+    write_sample_pcap(pcap_path, base_time)
+
+    def fail_rdpcap(*args, **kwargs):
+        raise AssertionError("extract_upload_data must not load the whole capture")
+
+    monkeypatch.setattr("scapy.all.rdpcap", fail_rdpcap)
+    df = bandwidth_analyser.extract_upload_data(str(pcap_path))
+
+    assert list(df.columns) == ["Timestamp", "Upload_Bytes", "Upload_MB"]
+    assert len(df) == 2
+    assert df["Upload_Bytes"].sum() == 120 * 154
+    assert df["Timestamp"].iloc[0] == datetime(2025, 7, 13, 10, 0)
+
+
+def test_resample_and_rolling_from_base_buckets(tmp_path):
+    base_time = datetime(2025, 7, 13, 10, 0, 0).timestamp()
+    pcap_path = tmp_path / "sample.pcap"
+    write_sample_pcap(pcap_path, base_time)
+
+    base, _ = bandwidth_analyser.analyze_capture(str(pcap_path), workers=1)
+    assert len(base) == 120  # one packet per second
+
+    ten_second = bandwidth_analyser.resample_upload(base, "10s")
+    assert len(ten_second) == 12
+    assert ten_second["Upload_Bytes"].eq(10 * 154).all()
+    assert ten_second["Timestamp"].iloc[1] == datetime(2025, 7, 13, 10, 0, 10)
+
+    hourly = bandwidth_analyser.resample_upload(base, "1h")
+    assert hourly["Upload_Bytes"].tolist() == [120 * 154]
+    assert hourly["Timestamp"].iloc[0] == datetime(2025, 7, 13, 10, 0)
+
+    rolled = bandwidth_analyser.add_rolling_window(ten_second, "1m")
+    assert rolled["Rolling_Bytes"].tolist()[:7] == [1540, 3080, 4620, 6160, 7700, 9240, 9240]
+    assert rolled["Rolling_Rate_Bps"].iloc[-1] == 9240 / 60
+
+    # A window shorter than the bucket covers that one bucket, not a 60x rate
+    clamped = bandwidth_analyser.add_rolling_window(hourly, "1m", "1h")
+    assert clamped["Rolling_Bytes"].tolist() == [120 * 154]
+    assert clamped["Rolling_Rate_Bps"].iloc[0] == 120 * 154 / 3600
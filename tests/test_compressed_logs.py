@@ -0,0 +1,74 @@
+# tests/test_compressed_logs.py
+
+import gzip
+import hashlib
+import json
+import random
+import zipfile
+from datetime import datetime, timedelta
+
+import pytest
+import zstandard
+
+from backend.analysis import dns_log_parser, dns_log_tail, permissions_audit
+
+DOMAINS = ["mail.google.com", "user.duckdns.org", "x.bad.xyz", "cdn1.example.net", "exploit-kit.site"]
+
+
+def log_text(seed, count, start):
+    rng = random.Random(seed)
+    return "".join(
+        f"{start + timedelta(seconds=i * 41):%Y-%m-%d %H:%M:%S} dnsmasq[812]: query {rng.choice(DOMAINS)}.\n"
+        for i in range(count)
+    )
+
+
+@pytest.fixture
+def logs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(dns_log_parser, "is_domain_suspicious", lambda domain: None)
+    first = log_text(1, 1200, datetime(2025, 7, 13))
+    second = log_text(2, 800, datetime(2025, 7, 14))
+    plain = tmp_path / "resolver.log"
+    plain.write_text(first + second)
+    (tmp_path / "resolver.log.gz").write_bytes(gzip.compress((first + second).encode()))
+    (tmp_path / "resolver.log.zst").write_bytes(zstandard.ZstdCompressor().compress((first + second).encode()))
+    # rotated logs zipped together; the first one lost its final newline
+    with zipfile.ZipFile(tmp_path / "resolver_logs.zip", "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("logs/", "")
+        archive.writestr("logs/dns_1.log", first.rstrip("\n"))
+        archive.writestr("logs/dns_2.log", second)
+    return tmp_path
+
+
+def sha256_of(path):
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def test_compressed_logs_match_plain_text(logs):
+    expected, _, _, _ = dns_log_parser.analyze_dns_logs(str(logs / "resolver.log"))
+    assert len(expected) == 2000
+    for name in ["resolver.log.gz", "resolver.log.zst", "resolver_logs.zip"]:
+        progress = []
+        df, _, hash_path, _ = dns_log_parser.analyze_dns_logs(
+            str(logs / name), chunk_rows=300, progress=lambda *args: progress.append(args)
+        )
+        assert df.equals(expected), name
+        assert progress[-1][0] == progress[-1][1] == (logs / name).stat().st_size
+        # the chain of custody covers the archive as stored, not what it unpacks to
+        assert f"Source SHA256: {sha256_of(logs / name)}" in open(hash_path).read()
+
+
+def test_tail_analyzes_compressed_log_in_full(logs):
+    summary, csv_path, _, _ = dns_log_tail.tail_dns_log(str(logs / "resolver.log.gz"))
+    assert summary["rows"] == 2000
+    assert "new_rows" not in summary
+
+
+def test_compressed_permissions_dump(tmp_path):
+    dump = {"com.example.app": {"permissions": ["READ_SMS"]}, "logcat": ["07-13 22:15:00 I/ActivityManager: start"]}
+    path = tmp_path / "permissions_dump.json.zst"
+    path.write_bytes(zstandard.ZstdCompressor().compress(json.dumps(dump).encode()))
+    data, hashes = permissions_audit.load_extracted_json(str(path), with_hashes=True)
+    assert data == dump
+    assert hashes["sha256"] == sha256_of(path)
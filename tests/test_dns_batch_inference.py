@@ -0,0 +1,87 @@
+# tests/test_dns_batch_inference.py
+
+import random
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import OneHotEncoder
+
+from backend.analysis import dns_log_parser
+
+DOMAINS = [
+    "mail.google.com", "api.x1y2.xyz", "user.duckdns.org", "c2.example.net",
+    "cdn7.akamai.net", "example.com", "a.b.c.d.tk", "leak.site.top.", "weird.unseen",
+]
+
+
+def feature_rows(count, seed=0):
+    rng = random.Random(seed)
+    start = datetime(2025, 7, 13)
+    return [(rng.choice(DOMAINS).rstrip("."), start + timedelta(minutes=rng.randint(0, 2880))) for _ in range(count)]
+
+
+def train_model(rows, unknown_tld="error"):
+    features = pd.DataFrame([dns_log_parser.extract_features(d, t) for d, t in rows])
+    labels = ["High" if f["tld"] in ("xyz", "tk") else "Low" if f["hour_accessed"] < 12 else "Intermediate" for _, f in features.iterrows()]
+    encoder = ColumnTransformer([("tld", OneHotEncoder(handle_unknown=unknown_tld), ["tld"])], remainder="passthrough")
+    return make_pipeline(encoder, RandomForestClassifier(n_estimators=10, random_state=0)).fit(features, labels)
+
+
+def per_row(rows):
+    return [dns_log_parser.predict_model_risk(domain, timestamp) for domain, timestamp in rows]
+
+
+def batched(rows):
+    domains = pd.Series([d for d, _ in rows])
+    timestamps = pd.Series([t for _, t in rows])
+    return list(dns_log_parser.predict_model_risk_batch(dns_log_parser.extract_features_frame(domains, timestamps)))
+
+
+def test_features_frame_matches_per_row_features():
+    rows = feature_rows(200)
+    expected = pd.DataFrame([dns_log_parser.extract_features(d, t) for d, t in rows])
+    frame = dns_log_parser.extract_features_frame(pd.Series([d for d, _ in rows]), pd.Series([t for _, t in rows]))
+    assert frame.astype(object).equals(expected.astype(object))
+
+
+@pytest.mark.parametrize("unknown_tld", ["ignore", "error"])
+def test_batched_predictions_match_per_row(monkeypatch, unknown_tld):
+    training = [row for row in feature_rows(500, seed=1) if not row[0].endswith("unseen")]
+    model = train_model(training, unknown_tld)
+    monkeypatch.setattr(dns_log_parser, "get_dns_model", lambda: model)
+    monkeypatch.setattr(dns_log_parser, "MODEL_BATCH_ROWS", 7)
+    rows = feature_rows(300, seed=2)
+    assert batched(rows) == per_row(rows)
+    if unknown_tld == "error":
+        # Rows the model rejects still come back as Unknown, one by one
+        assert "Unknown" in batched(rows)
+
+
+def test_without_model_everything_is_unknown(monkeypatch):
+    monkeypatch.setattr(dns_log_parser, "get_dns_model", lambda: None)
+    assert batched(feature_rows(5)) == ["Unknown"] * 5
+
+
+def test_analyze_dns_logs_scores_with_one_call(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(dns_log_parser, "is_domain_suspicious", lambda domain: None)
+    model = train_model(feature_rows(500, seed=1), "ignore")
+    calls = []
+    real_predict = model.predict
+    monkeypatch.setattr(model, "predict", lambda X: calls.append(len(X)) or real_predict(X))
+    monkeypatch.setattr(dns_log_parser, "get_dns_model", lambda: model)
+
+    rows = feature_rows(1000, seed=3)
+    log_path = tmp_path / "dns.log"
+    log_path.write_text("".join(f"{t:%Y-%m-%d %H:%M:%S} query {d}\n" for d, t in rows) + "garbage line\n")
+
+    df, csv_path, _, _ = dns_log_parser.analyze_dns_logs(str(log_path))
+    assert len(calls) == 1
+    assert list(df.columns) == ["Timestamp", "Domain", "Accessed After Hours", "Heuristic Risk", "Reason", "Model Risk"]
+    assert df["Model Risk"].tolist() == real_predict(pd.DataFrame([dns_log_parser.extract_features(d, t) for d, t in rows])).tolist()
+    assert df["Accessed After Hours"].tolist() == [not (9 <= t.hour < 17) for _, t in rows]
+    assert df["Heuristic Risk"].tolist() == [dns_log_parser.classify_risk(d)[0] for d, _ in rows]
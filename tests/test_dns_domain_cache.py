@@ -0,0 +1,73 @@
+# tests/test_dns_domain_cache.py
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.analysis import dns_log_parser
+from backend.utils.lru import LRUCache
+
+
+@pytest.fixture
+def counted_classify(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(dns_log_parser, "is_domain_suspicious", lambda domain: None)
+    calls = []
+    real_classify = dns_log_parser.classify_risk
+    monkeypatch.setattr(dns_log_parser, "classify_risk", lambda domain, *args: calls.append(domain) or real_classify(domain, *args))
+    return calls
+
+
+def write_log(path, domains):
+    start = datetime(2025, 7, 13, 8)
+    path.write_text("".join(f"{start + timedelta(minutes=i):%Y-%m-%d %H:%M:%S} query {d}\n" for i, d in enumerate(domains)))
+    return str(path)
+
+
+def test_heuristics_run_once_per_domain_and_case(tmp_path, counted_classify):
+    domains = ["a.example.com", "evil.xyz", "user.duckdns.org"] * 400
+    first = write_log(tmp_path / "first.log", domains)
+    second = write_log(tmp_path / "second.log", domains[::-1] + ["new.example.org"])
+
+    df, _, _, _ = dns_log_parser.analyze_dns_logs(first, chunk_rows=100, case_id="CASE-1")
+    assert sorted(counted_classify) == sorted(set(domains))
+    assert df["Heuristic Risk"].tolist() == [("Low", "High", "Intermediate")[i % 3] for i in range(len(domains))]
+    assert df["Reason"].tolist()[:3] == ["Normal", "Suspicious TLD", "Free Domain"]
+
+    # Another file of the same case only evaluates the domain it hasn't seen
+    counted_classify.clear()
+    dns_log_parser.analyze_dns_logs(second, case_id="CASE-1")
+    assert counted_classify == ["new.example.org"]
+
+    # A different case starts from scratch
+    counted_classify.clear()
+    dns_log_parser.analyze_dns_logs(second, case_id="CASE-2")
+    assert sorted(counted_classify) == sorted(set(domains) | {"new.example.org"})
+
+
+def test_cached_scoring_matches_per_row_features(tmp_path, counted_classify):
+    domains = [f"host{i % 37}.cdn{i % 5}.example.net" for i in range(500)]
+    log = write_log(tmp_path / "features.log", domains)
+    df, _, _, _ = dns_log_parser.analyze_dns_logs(log, chunk_rows=64)
+    rows = list(zip(df["Domain"], df["Timestamp"]))
+    frame = dns_log_parser.extract_features_frame(df["Domain"], df["Timestamp"])
+    expected = [dns_log_parser.extract_features(domain, timestamp.to_pydatetime()) for domain, timestamp in rows]
+    assert frame.to_dict("records") == expected
+
+
+def test_domain_cache_is_bounded(tmp_path, counted_classify, monkeypatch):
+    monkeypatch.setattr(dns_log_parser, "DOMAIN_CACHE_SIZE", 10)
+    log = write_log(tmp_path / "many.log", [f"d{i}.example.com" for i in range(50)])
+    dns_log_parser.analyze_dns_logs(log, case_id="CASE-3")
+    assert len(dns_log_parser.get_domain_cache("CASE-3")) == 10
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert "b" not in cache and "a" in cache and "c" in cache
+    assert cache.get("b") is None
+    assert (cache.hits, cache.misses) == (1, 1)
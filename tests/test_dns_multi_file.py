@@ -0,0 +1,79 @@
+# tests/test_dns_multi_file.py
+
+import random
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from backend.analysis import dns_log_parser
+
+DOMAINS = ["mail.google.com", "user.duckdns.org", "x.bad.xyz", "cdn1.example.net", "leak.example.org"]
+
+
+@pytest.fixture
+def rotated_logs(tmp_path, monkeypatch):
+    """Four rotated logs with overlapping time ranges, shared timestamps and some disorder."""
+    monkeypatch.chdir(tmp_path)
+    log_dir = tmp_path / "dump"
+    log_dir.mkdir()
+    rng = random.Random(11)
+    start = datetime(2025, 7, 13, 6)
+    for n in range(4):
+        lines = []
+        for i in range(300):
+            when = start + timedelta(seconds=(i + n * 120) * 20 + rng.choice([0, 0, 0, -40, 40]))
+            lines.append(f"{when:%Y-%m-%d %H:%M:%S} dnsmasq[812]: query {rng.choice(DOMAINS)}\n")
+        (log_dir / f"dns_log_2025071{n}.log").write_text("".join(lines))
+    (log_dir / "notes.md").write_text("2025-07-13 06:00:00 query ignored.example\n")
+    return log_dir
+
+
+def test_parallel_matches_sequential_and_per_file_merge(rotated_logs):
+    def run(workers):
+        # Report names have one-second resolution, so read them before the next run
+        df, csv_path, hash_path, _ = dns_log_parser.analyze_dns_logs(str(rotated_logs), chunk_rows=64, workers=workers)
+        with open(csv_path, "rb") as report, open(hash_path) as manifest:
+            return df, report.read(), manifest.read()
+
+    parallel, parallel_csv, manifest = run(3)
+    sequential, sequential_csv, sequential_manifest = run(1)
+    assert len(parallel) == 1200
+    assert parallel.equals(sequential)
+    assert parallel_csv == sequential_csv
+    assert manifest.split("\n")[2:] == sequential_manifest.split("\n")[2:]  # same sources and digests
+
+    # Same rows as analysing each file alone, stably sorted by time
+    per_file = [
+        dns_log_parser.analyze_dns_logs(str(path))[0]
+        for path in sorted(rotated_logs.glob("*.log"))
+    ]
+    expected = pd.concat(per_file, ignore_index=True).sort_values("Timestamp", kind="stable", ignore_index=True)
+    assert parallel["Timestamp"].is_monotonic_increasing
+    pd.testing.assert_frame_equal(parallel, expected, check_dtype=False)
+
+    assert manifest.count("Source: ") == 4
+    assert manifest.count("Source SHA256: ") == 4
+    assert "notes.md" not in manifest
+
+
+def test_glob_and_summary(rotated_logs):
+    chunks = []
+    progress = []
+    summary, csv_path, _, _ = dns_log_parser.stream_dns_logs(
+        str(rotated_logs / "dns_log_*.log"), chunk_rows=500, workers=2,
+        on_chunk=chunks.append, progress=lambda *args: progress.append(args),
+    )
+    assert summary["rows"] == 1200
+    assert [len(chunk) for chunk in chunks] == [500, 500, 200]
+    assert summary["Heuristic Risk"].sum() == 1200
+    assert len(summary["preview"]) == 1000
+    assert progress[-1][0] == progress[-1][1] and progress[-1][2] == 1200
+
+
+def test_empty_directory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "empty").mkdir()
+    summary, csv_path, hash_path, zip_path = dns_log_parser.stream_dns_logs(str(tmp_path / "empty"))
+    assert summary["rows"] == 0
+    assert csv_path is hash_path is zip_path is None
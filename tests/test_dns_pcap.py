@@ -0,0 +1,152 @@
+# tests/test_dns_pcap.py
+
+import struct
+from datetime import datetime
+
+from scapy.all import DNS, DNSQR, DNSRR, IP, TCP, UDP, Ether, raw
+
+from backend.analysis import bandwidth_analyser, dns_log_parser, dns_pcap
+from backend.utils.dns_wire import DnsFormatError, parse_dns_message
+
+BASE_TIME = datetime(2025, 7, 13, 22, 15, 0).timestamp()
+DEVICE = "192.168.1.20"
+RESOLVER = "8.8.8.8"
+
+
+def lookup(name, addresses, t, msg_id, sport, with_query=True, rcode=0):
+    query = DNS(id=msg_id, rd=1, qd=DNSQR(qname=name))
+    answers = [DNSRR(rrname=name, type="AAAA" if ":" in address else "A", ttl=60, rdata=address) for address in addresses]
+    response = DNS(id=msg_id, qr=1, rd=1, ra=1, rcode=rcode, qd=DNSQR(qname=name), an=answers)
+    packets = []
+    if with_query:
+        packets.append(Ether() / IP(src=DEVICE, dst=RESOLVER) / UDP(sport=sport, dport=53) / query)
+        packets[-1].time = t
+    packets.append(Ether() / IP(src=RESOLVER, dst=DEVICE) / UDP(sport=53, dport=sport) / response)
+    packets[-1].time = t + 0.02
+    return packets
+
+
+def tcp_lookup(name, address, t, sport):
+    """A query and its response over TCP, the response split across two segments."""
+    query = raw(DNS(id=77, rd=1, qd=DNSQR(qname=name)))
+    response = raw(DNS(id=77, qr=1, qd=DNSQR(qname=name), an=[DNSRR(rrname=name, rdata=address)]))
+    query_wire = len(query).to_bytes(2, "big") + query
+    response_wire = len(response).to_bytes(2, "big") + response
+    head, tail = response_wire[:9], response_wire[9:]
+    packets = [
+        Ether() / IP(src=DEVICE, dst=RESOLVER) / TCP(sport=sport, dport=53, seq=1000, flags="PA") / query_wire,
+        Ether() / IP(src=RESOLVER, dst=DEVICE) / TCP(sport=53, dport=sport, seq=5000, flags="PA") / head,
+        # retransmission of the first part, then the rest
+        Ether() / IP(src=RESOLVER, dst=DEVICE) / TCP(sport=53, dport=sport, seq=5000, flags="PA") / head,
+        Ether() / IP(src=RESOLVER, dst=DEVICE) / TCP(sport=53, dport=sport, seq=5000 + len(head), flags="PA") / tail,
+    ]
+    for i, pkt in enumerate(packets):
+        pkt.time = t + i * 0.01
+    return packets
+
+
+def sample_packets():
+    packets = []
+    packets += lookup("mail.google.com", ["142.250.1.17"], BASE_TIME, 1, 40001)
+    packets += lookup("exfil.bad.xyz", ["203.0.113.9", "2001:db8::9"], BASE_TIME + 5, 2, 40002)
+    # response whose query was not captured
+    packets += lookup("user.duckdns.org", ["198.51.100.4"], BASE_TIME + 10, 3, 40003, with_query=False)
+    packets += lookup("missing.example.net", [], BASE_TIME + 12, 4, 40004, rcode=3)
+    packets += tcp_lookup("big.example.org", "192.0.2.55", BASE_TIME + 20, 40005)
+    noise = Ether() / IP(src=DEVICE, dst="142.250.1.17") / UDP(sport=40100, dport=443) / (b"\x00" * 40)
+    noise.time = BASE_TIME + 30
+    packets.append(noise)
+    return packets
+
+
+def test_extract_dns_records_from_every_capture_format(capture_variants):
+    for path in capture_variants(sample_packets()):
+        records, names = dns_pcap.extract_dns_records(path)
+        assert list(records.columns) == dns_pcap.DNS_RECORD_COLUMNS
+        assert len(records) == 9
+        responses = records[records["Message"] == "Response"].set_index("Query")
+        assert responses.loc["exfil.bad.xyz", "Answers"] == "203.0.113.9, 2001:db8::9"
+        assert responses.loc["missing.example.net", "RCode"] == "NXDOMAIN"
+        assert responses.loc["big.example.org", "Transport"] == "TCP"
+        assert (records["Client"] == DEVICE).all()
+        assert names == {
+            "142.250.1.17": "mail.google.com",
+            "203.0.113.9": "exfil.bad.xyz",
+            "2001:db8::9": "exfil.bad.xyz",
+            "198.51.100.4": "user.duckdns.org",
+            "192.0.2.55": "big.example.org",
+        }
+
+
+def test_capture_feeds_dns_scoring(capture_variants, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path = capture_variants(sample_packets())[2]
+    df, csv_path, hash_path, _ = dns_log_parser.analyze_dns_logs(path)
+    # one row per lookup: queries, plus the response whose query is missing
+    assert df["Domain"].tolist() == [
+        "mail.google.com", "exfil.bad.xyz", "user.duckdns.org", "missing.example.net", "big.example.org"
+    ]
+    assert df["Timestamp"].iloc[0] == datetime.fromtimestamp(int(BASE_TIME))
+    assert df["Accessed After Hours"].all()
+    assert df.set_index("Domain").loc["user.duckdns.org", "Heuristic Risk"] != "Low"
+    with open(hash_path) as h:
+        assert f"Source: {path}" in h.read()
+
+
+def test_destinations_named_from_captured_answers(capture_variants):
+    path = capture_variants(sample_packets())[0]
+    _, flow_df = bandwidth_analyser.analyze_capture(path, use_cache=False)
+    destinations = bandwidth_analyser.summarize_destinations(flow_df, dns_pcap.dns_name_map(path))
+    named = dict(zip(destinations["Destination"], destinations["Domain"]))
+    assert named["142.250.1.17"] == "mail.google.com"
+    assert named[RESOLVER] == ""
+    assert list(bandwidth_analyser.summarize_destinations(flow_df).columns) == bandwidth_analyser.DESTINATION_COLUMNS
+
+
+def test_parse_rejects_pointer_loops_and_handles_compression():
+    message = parse_dns_message(raw(DNS(id=9, qr=1, qd=DNSQR(qname="WWW.Example.com"),
+                                        an=[DNSRR(rrname="WWW.Example.com", type="CNAME", rdata="edge.example.net"),
+                                            DNSRR(rrname="edge.example.net", rdata="192.0.2.1")])))
+    assert message.qname == "www.example.com"
+    assert [answer[3] for answer in message.answers] == ["edge.example.net", "192.0.2.1"]
+
+    # one question whose name is a pointer to itself
+    looped = struct.pack(">HHHHHH", 9, 0, 1, 0, 0, 0) + b"\xc0\x0c" + b"\x00\x01\x00\x01"
+    try:
+        parse_dns_message(looped)
+    except DnsFormatError:
+        return
+    raise AssertionError("pointer loop should be rejected")
+
+
+def test_directory_of_cap_uploads(capture_variants, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    upload_dir = tmp_path / "uploads"
+    upload_dir.mkdir()
+    pcap_path = capture_variants(sample_packets())[0]
+    for name in ["phone_1.cap", "phone_2.cap"]:
+        (upload_dir / name).write_bytes(open(pcap_path, "rb").read())
+    assert dns_log_parser.resolve_dns_log_paths(str(upload_dir)) == [
+        str(upload_dir / "phone_1.cap"), str(upload_dir / "phone_2.cap")
+    ]
+    df, _, _, _ = dns_log_parser.analyze_dns_logs(str(upload_dir), workers=1)
+    assert len(df) == 10
+
+
+def test_bandwidth_pass_collects_dns_names(capture_variants, monkeypatch):
+    paths = capture_variants(sample_packets())
+    expected = dns_pcap.dns_name_map(paths[0])
+    for path in paths:
+        upload_df, _ = bandwidth_analyser.analyze_capture(path, workers=1)
+        assert upload_df.attrs["dns_names"] == expected
+
+    # cached aggregates keep the names, without decoding the capture again
+    def fail_decode(*args, **kwargs):
+        raise AssertionError("cached capture must not be decoded again")
+
+    monkeypatch.setattr(bandwidth_analyser, "_aggregate_raw_pcap", fail_decode)
+    upload_df, _ = bandwidth_analyser.analyze_capture(paths[0], workers=1)
+    assert upload_df.attrs["dns_names"] == expected
+    assert bandwidth_analyser._aggregate_scapy(paths[0])[0]["dns_names"] == {
+        address: name for address, name in expected.items() if name != "big.example.org"  # TCP answer
+    }
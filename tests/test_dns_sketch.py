@@ -0,0 +1,92 @@
+# tests/test_dns_sketch.py
+
+import random
+from collections import Counter
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from backend.analysis import dns_sketch
+from backend.utils.sketches import HeavyHitters, HyperLogLog
+
+
+def zipf_queries(count, seed):
+    rng = np.random.default_rng(seed)
+    ranks = rng.zipf(1.3, count) % 20_000
+    start = datetime(2025, 7, 13)
+    domains = [f"host{rank % 7}.site{rank}.example.com" for rank in ranks.tolist()]
+    timestamps = [start + timedelta(seconds=i * 3) for i in range(count)]
+    return timestamps, domains
+
+
+def write_log(path, timestamps, domains):
+    path.write_text("".join(f"{t:%Y-%m-%d %H:%M:%S} dnsmasq[1]: query {d}\n"
+                            for t, d in zip(timestamps, domains)))
+    return str(path)
+
+
+def test_hyperloglog_and_heavy_hitters_accuracy():
+    hll = HyperLogLog()
+    hll.add([f"name{i}.example.org" for i in range(50_000)])
+    assert abs(hll.count() - 50_000) / 50_000 < 0.03
+
+    _, domains = zipf_queries(60_000, seed=1)
+    hitters = HeavyHitters(k=20)
+    for start in range(0, len(domains), 7000):
+        hitters.update(domains[start:start + 7000])
+    truth = Counter(domains)
+    top = hitters.top()
+    assert [name for name, _ in top[:10]] == [name for name, _ in truth.most_common(10)]
+    assert all(estimate >= truth[name] for name, estimate in top)
+
+
+def test_merged_sketches_equal_sketch_of_all_queries():
+    timestamps, domains = zipf_queries(30_000, seed=2)
+    whole = dns_sketch.DnsSketch()
+    whole.update(timestamps, domains)
+    first, second = dns_sketch.DnsSketch(), dns_sketch.DnsSketch()
+    first.update(timestamps[:12_345], domains[:12_345])
+    second.update(timestamps[12_345:], domains[12_345:])
+    merged = first.merge(second)
+
+    assert np.array_equal(merged.domains.registers, whole.domains.registers)
+    assert np.array_equal(merged.subdomains.registers, whole.subdomains.registers)
+    assert np.array_equal(merged.top_domains.sketch.table, whole.top_domains.sketch.table)
+    assert merged.top_domains.top()[:20] == whole.top_domains.top()[:20]
+    assert (merged.queries, merged.first_seen, merged.last_seen) == (whole.queries, whole.first_seen, whole.last_seen)
+    assert merged.hours.tolist() == whole.hours.tolist()
+
+
+def test_sketch_mode_over_logs_and_devices(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    logs = tmp_path / "logs"
+    logs.mkdir()
+    timestamps, domains = zipf_queries(20_000, seed=3)
+    tunnel = [f"{random.Random(i).getrandbits(64):016x}.t.tunnel-example.net" for i in range(1500)]
+    domains[:1500] = tunnel
+    write_log(logs / "dns_1.log", timestamps[:10_000], domains[:10_000])
+    write_log(logs / "dns_2.log", timestamps[10_000:], domains[10_000:])
+
+    summary, sketch_path, hash_path, zip_path = dns_sketch.sketch_dns_logs(str(logs), workers=1)
+    totals = summary["totals"]
+    assert totals["Queries"] == 20_000
+    assert totals["Sources"] == 2
+    assert abs(totals["Distinct Domains"] - len(set(domains))) / len(set(domains)) < 0.03
+    assert totals["First Seen"] == timestamps[0] and totals["Last Seen"] == timestamps[-1]
+    assert summary["hours"]["Queries"].sum() == 20_000
+
+    parents = summary["top_parents"].set_index("Parent Domain")
+    assert abs(parents.loc["tunnel-example.net", "Distinct Subdomains"] - 1500) / 1500 < 0.15
+    assert parents.loc["tunnel-example.net", "Estimated Queries"] >= 1500
+    with open(hash_path) as h:
+        manifest = h.read()
+    assert "dns_1.log" in manifest and "dns_2.log" in manifest and sketch_path in manifest
+
+    # a second device's sketch merges into the first
+    other_timestamps, other_domains = zipf_queries(5_000, seed=4)
+    other_log = write_log(tmp_path / "device_b.log", other_timestamps, other_domains)
+    merged, _, _, _ = dns_sketch.sketch_dns_logs(other_log, merge_with=[sketch_path])
+    assert merged["totals"]["Queries"] == 25_000
+    assert merged["totals"]["Sources"] == 3
+    reloaded = dns_sketch.load_dns_sketch(sketch_path)
+    assert reloaded.top_domains.top() == dns_sketch.merge_dns_sketches([sketch_path]).top_domains.top()
@@ -0,0 +1,78 @@
+# tests/test_dns_streaming.py
+
+import csv
+import hashlib
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.analysis import dns_log_parser
+
+DOMAINS = ["mail.google.com", "user.duckdns.org", "x.bad.xyz", "cdn1.example.net", "exploit-kit.site"]
+
+
+@pytest.fixture
+def dns_log(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(dns_log_parser, "is_domain_suspicious", lambda domain: None)
+    rng = random.Random(5)
+    start = datetime(2025, 7, 13)
+    lines = []
+    for i in range(2500):
+        if i % 50 == 0:
+            lines.append("dnsmasq: cache size 150, 0/0 cache insertions re-used\n")
+        when = start + timedelta(seconds=i * 37)
+        lines.append(f"{when:%Y-%m-%d %H:%M:%S} dnsmasq[812]: query {rng.choice(DOMAINS)}.\n")
+    path = tmp_path / "resolver.log"
+    path.write_text("".join(lines))
+    return str(path)
+
+
+def test_chunked_run_matches_single_chunk(dns_log):
+    whole, _, _, _ = dns_log_parser.analyze_dns_logs(dns_log, chunk_rows=10_000)
+    chunked, csv_path, hash_path, _ = dns_log_parser.analyze_dns_logs(dns_log, chunk_rows=333)
+    assert len(whole) == 2500
+    assert chunked.equals(whole)
+
+    with open(csv_path, newline="") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == list(whole.columns)
+    assert rows[1:] == [[str(value) for value in row] for row in whole.values.tolist()]
+
+    with open(csv_path, "rb") as f:
+        csv_sha256 = hashlib.sha256(f.read()).hexdigest()
+    with open(dns_log, "rb") as f:
+        log_sha256 = hashlib.sha256(f.read()).hexdigest()
+    hash_report = open(hash_path).read()
+    assert f"SHA256: {csv_sha256}" in hash_report
+    assert f"Source SHA256: {log_sha256}" in hash_report
+
+
+def test_stream_reports_progress_and_bounded_chunks(dns_log, monkeypatch):
+    monkeypatch.setattr(dns_log_parser, "DNS_PREVIEW_ROWS", 100)
+    progress, chunk_sizes = [], []
+    summary, csv_path, _, _ = dns_log_parser.stream_dns_logs(
+        dns_log, chunk_rows=400, progress=lambda *args: progress.append(args),
+        on_chunk=lambda chunk: chunk_sizes.append(len(chunk)),
+    )
+    assert chunk_sizes == [400] * 6 + [100]
+    assert [rows for _, _, rows in progress] == [400, 800, 1200, 1600, 2000, 2400, 2500]
+    assert all(a[0] <= b[0] for a, b in zip(progress, progress[1:]))
+    assert progress[-1][0] == progress[-1][1]  # whole log consumed
+
+    assert summary["rows"] == 2500
+    assert len(summary["preview"]) == 100
+    full, _, _, _ = dns_log_parser.analyze_dns_logs(dns_log)
+    for column in dns_log_parser.SUMMARY_COLUMNS:
+        assert summary[column].sort_index().equals(full[column].value_counts().sort_index().rename(None).rename_axis(None))
+
+
+def test_log_without_queries(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path = tmp_path / "empty.log"
+    path.write_text("nothing to see\n")
+    summary, csv_path, hash_path, zip_path = dns_log_parser.stream_dns_logs(str(path))
+    assert summary["rows"] == 0
+    assert (csv_path, hash_path, zip_path) == (None, None, None)
+    assert dns_log_parser.analyze_dns_logs(str(path))[0].empty
@@ -0,0 +1,117 @@
+# tests/test_dns_tail.py
+
+import csv
+import hashlib
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.analysis import dns_log_parser, dns_log_tail
+
+DOMAINS = ["mail.google.com", "user.duckdns.org", "x.bad.xyz", "cdn1.example.net"]
+
+
+def log_lines(start_index, count):
+    start = datetime(2025, 7, 13, 8)
+    return "".join(
+        f"{start + timedelta(seconds=i * 30):%Y-%m-%d %H:%M:%S} query {DOMAINS[i % len(DOMAINS)]}\n"
+        for i in range(start_index, start_index + count)
+    )
+
+
+def read_rows(csv_path):
+    with open(csv_path, newline="") as f:
+        return list(csv.reader(f))
+
+
+@pytest.fixture
+def growing_log(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path = tmp_path / "dns_log.txt"
+    path.write_text(log_lines(0, 100))
+    return path
+
+
+def test_later_runs_parse_only_the_tail(growing_log, monkeypatch):
+    summary, csv_path, hash_path, _ = dns_log_tail.tail_dns_log(str(growing_log), chunk_rows=30)
+    assert summary["rows"] == summary["new_rows"] == 100
+
+    # The device appends more, the last line only half written
+    with open(growing_log, "a") as f:
+        f.write(log_lines(100, 50) + "2025-07-13 09:15:00 query half.writ")
+    parsed = []
+    real_parse = dns_log_parser.parse_dns_log_line
+    monkeypatch.setattr(dns_log_parser, "parse_dns_log_line", lambda line: parsed.append(line) or real_parse(line))
+    summary, csv_path_2, hash_path_2, _ = dns_log_tail.tail_dns_log(str(growing_log), chunk_rows=30)
+    assert len(parsed) == 50
+    assert (csv_path_2, hash_path_2) == (csv_path, hash_path)
+    assert summary["rows"] == 150 and summary["new_rows"] == 50
+    assert summary["Heuristic Risk"].sum() == 150
+    assert summary["preview"]["Timestamp"].iloc[0] == datetime(2025, 7, 13, 8, 50)
+
+    # The line is finished; a third run picks it up
+    with open(growing_log, "a") as f:
+        f.write("ten.example\n")
+    summary, _, _, _ = dns_log_tail.tail_dns_log(str(growing_log))
+    assert summary["new_rows"] == 1
+
+    # Same report as analysing the final file in one go
+    full, _, _, _ = dns_log_parser.analyze_dns_logs(str(growing_log))
+    rows = read_rows(csv_path)
+    assert rows[0] == list(full.columns)
+    assert rows[1:] == [[str(v) for v in row] for row in full.values.tolist()]
+
+    manifest = open(hash_path).read()
+    assert f"SHA256: {hashlib.sha256(open(csv_path, 'rb').read()).hexdigest()}" in manifest
+    assert f"Source SHA256: {hashlib.sha256(growing_log.read_bytes()).hexdigest()}" in manifest
+
+
+def test_truncated_or_rotated_log_is_rescanned(growing_log, capsys):
+    _, first_csv, _, _ = dns_log_tail.tail_dns_log(str(growing_log))
+
+    # Rotated: same length or longer, but different content at the checkpoint
+    growing_log.write_text(log_lines(500, 120))
+    summary, rotated_csv, _, _ = dns_log_tail.tail_dns_log(str(growing_log))
+    assert "rescanning" in capsys.readouterr().out
+    assert summary["rows"] == summary["new_rows"] == 120
+    assert len(read_rows(rotated_csv)) == 121
+
+    # Truncated
+    growing_log.write_text(log_lines(0, 10))
+    summary, _, _, _ = dns_log_tail.tail_dns_log(str(growing_log))
+    assert summary["rows"] == 10
+    assert "rescanning" in capsys.readouterr().out
+
+
+def test_stable_source_id_across_pulled_copies(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    first = tmp_path / "dns_log_1.log"
+    first.write_text(log_lines(0, 40))
+    second = tmp_path / "dns_log_2.log"
+    second.write_text(log_lines(0, 60))
+
+    dns_log_tail.tail_dns_log(str(first), source_id="adb:/sdcard/dns_log.txt")
+    summary, _, hash_path, _ = dns_log_tail.tail_dns_log(str(second), source_id="adb:/sdcard/dns_log.txt")
+    assert summary["new_rows"] == 20 and summary["rows"] == 60
+    assert dns_log_tail.load_checkpoint("adb:/sdcard/dns_log.txt")["offset"] == second.stat().st_size
+
+    # The report's first 40 rows came from the first pull, which stays in the manifest
+    manifest = open(hash_path).read()
+    for pulled in (first, second):
+        assert f"Source: {pulled}\n" in manifest
+        assert f"Source SHA256: {hashlib.sha256(pulled.read_bytes()).hexdigest()}" in manifest
+
+
+def test_follow_pulls_and_tails(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    pulls = iter([log_lines(0, 5), log_lines(0, 8), log_lines(0, 8)])
+
+    def pull():
+        path = tmp_path / "pulled.log"
+        path.write_text(next(pulls))
+        return str(path)
+
+    updates = []
+    dns_log_tail.follow_dns_log(pull=pull, source_id="device", interval=0, runs=3,
+                                on_update=lambda summary, *paths: updates.append(summary["new_rows"]))
+    assert updates == [5, 3, 0]
@@ -0,0 +1,93 @@
+# tests/test_dns_tunneling.py
+
+import math
+import random
+from collections import Counter
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from backend.analysis import dns_log_parser, dns_tunneling
+
+
+def queries(count=3000, seed=3):
+    rng = random.Random(seed)
+    start = datetime(2025, 7, 13, 10, 0, 0)
+    domains, timestamps = [], []
+    for i in range(count):
+        r = rng.random()
+        if r < 0.7:
+            label = "".join(rng.choice("abcdef0123456789") for _ in range(rng.randint(30, 60)))
+            domain = f"{label}.t.tunnel-example.co.uk"
+        elif r < 0.8:
+            domain = rng.choice(["Mail.Google.com", "google.com", "a.b.c.example.org", "localhost"])
+        else:
+            domain = f"img{rng.randint(0, 20)}.cdn{rng.randint(0, 3)}.example.net"
+        domains.append(domain)
+        timestamps.append(start + timedelta(seconds=i * 0.5))
+    return domains, pd.Series(timestamps)
+
+
+def reference(domain):
+    """Per-name character features computed the slow, obvious way."""
+    domain = domain.lower()
+    parent = dns_tunneling.parent_domains(pd.Series([domain]))[0]
+    subdomain = domain[:len(domain) - len(parent) - 1] if len(domain) > len(parent) else ""
+    chars = [c for c in (subdomain or domain.split(".")[0]) if c != "."]
+    counts = Counter(chars)
+    entropy = -sum(v / len(chars) * math.log2(v / len(chars)) for v in counts.values())
+    return {
+        "parent_domain": parent,
+        "label_entropy": entropy,
+        "longest_label": max(len(label) for label in domain.split(".")),
+        "digit_ratio": sum(c.isdigit() for c in chars) / len(chars),
+        "consonant_ratio": sum(c in "bcdfghjklmnpqrstvwxyz" for c in chars) / len(chars),
+        "subdomain_length": len(subdomain),
+    }
+
+
+def test_character_features_match_reference():
+    domains = ["Mail.Google.com", "google.com", "x.bbc.co.uk", "localhost", "aaaa.b9.example.org", "abc123def.net"]
+    features = dns_tunneling.domain_char_features(pd.Series(domains).str.lower())
+    for domain, row in zip(domains, features.to_dict("records")):
+        expected = reference(domain)
+        assert row["parent_domain"] == expected["parent_domain"]
+        for column in dns_tunneling.DOMAIN_FEATURE_COLUMNS:
+            assert math.isclose(row[column], expected[column]), (domain, column)
+
+
+def test_window_counters_do_not_depend_on_chunking():
+    domains, timestamps = queries()
+    whole = dns_tunneling.tunneling_features(domains, timestamps)
+    engine = dns_tunneling.TunnelingFeatureEngine()
+    chunked = pd.concat(
+        [engine.transform(domains[i:i + 257], timestamps.iloc[i:i + 257]) for i in range(0, len(domains), 257)],
+        ignore_index=True,
+    )
+    pd.testing.assert_frame_equal(whole, chunked)
+
+    # running counts per parent and minute, recomputed by brute force
+    seen, hits = {}, Counter()
+    for i, parent in enumerate(whole["parent_domain"]):
+        key = (parent, timestamps[i].floor("min"))
+        seen.setdefault(key, set()).add(domains[i].lower())
+        hits[key] += 1
+        assert whole["unique_subdomains"][i] == len(seen[key])
+        assert math.isclose(whole["parent_query_rate"][i], hits[key] / 60)
+
+
+def test_tunnel_flagged_in_report(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    domains, timestamps = queries()
+    log = tmp_path / "resolver.log"
+    log.write_text("".join(f"{t:%Y-%m-%d %H:%M:%S} dnsmasq[1]: query {d}\n" for t, d in zip(timestamps, domains)))
+    df, _, _, _ = dns_log_parser.analyze_dns_logs(str(log), chunk_rows=500)
+
+    tunnel = df["Domain"].str.endswith("tunnel-example.co.uk")
+    flagged = df["Reason"] == dns_tunneling.TUNNEL_REASON
+    assert not flagged[~tunnel].any()
+    # tunnel queries are flagged once their parent has answered enough distinct names that minute
+    assert flagged[tunnel].mean() > 0.5
+    assert (df.loc[flagged, "Heuristic Risk"] == dns_tunneling.TUNNEL_RISK).all()
+    assert np.array_equal(dns_log_parser.analyze_dns_logs(str(log), chunk_rows=10_000)[0]["Reason"], df["Reason"])
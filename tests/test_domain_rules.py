@@ -0,0 +1,82 @@
+# tests/test_domain_rules.py
+
+import random
+import string
+
+from ai_models.email_model import predictor
+from backend.analysis import dns_log_parser
+from backend.utils.domain_rules import AhoCorasick, DomainMatcher, DomainRule, SuffixTrie, load_domain_rules
+
+
+def rule(match, pattern, risk="High", reason="test"):
+    return DomainRule("test", match, pattern, risk, reason)
+
+
+def test_aho_corasick_agrees_with_naive_substring_scan():
+    rng = random.Random(7)
+    patterns = ["".join(rng.choice("abc.-") for _ in range(rng.randint(1, 5))) for _ in range(300)]
+    automaton = AhoCorasick()
+    for i, pattern in enumerate(patterns):
+        automaton.add(pattern, i)
+    automaton.build()
+    for _ in range(500):
+        text = "".join(rng.choice("abcd.-") for _ in range(rng.randint(0, 30)))
+        expected = next((i for i, pattern in enumerate(patterns) if pattern in text), None)
+        assert automaton.first(text) == expected
+
+
+def test_suffix_trie_matches_whole_labels_only():
+    trie = SuffixTrie()
+    trie.add(".xyz", 0)
+    trie.add("duckdns.org", 1)
+    assert trie.first("evil.xyz") == 0
+    assert trie.first("user.duckdns.org") == 1
+    assert trie.first("duckdns.org") == 1
+    assert trie.first("notduckdns.org") is None
+    assert trie.first("a.xyz.example.com") is None
+    assert trie.first("fooxyz") is None
+
+
+def test_earlier_rule_wins_across_match_types():
+    matcher = DomainMatcher([
+        rule("suffix", "xyz", "High", "Suspicious TLD"),
+        rule("substring", "malware", "Intermediate", "Keyword"),
+    ])
+    assert matcher.match("Malware.Example.XYZ.").reason == "Suspicious TLD"
+    assert matcher.match("malware.example.com").reason == "Keyword"
+    assert matcher.match("example.com") is None
+    assert matcher.match("") is None
+
+
+def test_large_rule_file(tmp_path):
+    rng = random.Random(1)
+    words = {"".join(rng.choice(string.ascii_lowercase) for _ in range(10)) for _ in range(40_000)}
+    rules_path = tmp_path / "rules.csv"
+    lines = ["ruleset,match,pattern,risk,reason"]
+    for i, word in enumerate(sorted(words)):
+        match = "suffix" if i % 2 else "substring"
+        pattern = f"{word}.com" if match == "suffix" else word
+        lines.append(f"big,{match},{pattern},High,{match}")
+    lines.append("#commented,substring,example,Low,ignored")
+    rules_path.write_text("\n".join(lines) + "\n")
+
+    matchers = load_domain_rules(str(rules_path))
+    assert set(matchers) == {"big"}
+    matcher = matchers["big"]
+    assert len(matcher) == len(words)
+    suffix_word = sorted(words)[1]
+    substring_word = sorted(words)[0]
+    assert matcher.match(f"cdn.{suffix_word}.com").reason == "suffix"
+    assert matcher.match(f"x{substring_word}y.net").reason == "substring"
+    assert matcher.match("example.com") is None
+
+
+def test_default_rulesets_keep_existing_verdicts():
+    assert dns_log_parser.classify_risk("darkwebsite.onion") == ("High", "Suspicious TLD")
+    assert dns_log_parser.classify_risk("user.duckdns.org") == ("Intermediate", "Free Domain")
+    assert dns_log_parser.classify_risk("c2.example.com") == ("Intermediate", "Keyword")
+
+    assert predictor.is_suspicious_domain("promo.buzz")
+    assert predictor.is_suspicious_domain("user.protonmail.com")
+    assert predictor.is_suspicious_domain("discount-deals.com")
+    assert not predictor.is_suspicious_domain("example.com")
@@ -0,0 +1,74 @@
+# tests/test_model_registry.py
+
+import os
+import pickle
+
+import joblib
+
+from ai_models.registry import ModelRegistry
+
+
+def test_loads_once_and_reloads_when_file_changes(tmp_path):
+    path = tmp_path / "model.pkl"
+    joblib.dump({"version": 1}, path)
+    calls = []
+
+    def loader(p):
+        calls.append(p)
+        return joblib.load(p)
+
+    registry = ModelRegistry()
+    registry.register("demo", str(path), loader=loader)
+    assert calls == []  # registering does not touch the file
+    assert registry.get("demo") == {"version": 1}
+    assert registry.get("demo") is registry.get("demo")
+    assert len(calls) == 1
+
+    joblib.dump({"version": 2}, path)
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert registry.get("demo") == {"version": 2}
+    assert len(calls) == 2
+
+    [row] = registry.stats()
+    assert row["model"] == "demo" and row["loaded"] and row["loads"] == 2
+    assert row["load_seconds"] >= 0 and row["error"] is None
+
+    registry.invalidate("demo")
+    registry.get("demo")
+    assert len(calls) == 3
+
+
+def test_missing_and_broken_files(tmp_path, capsys):
+    broken = tmp_path / "broken.pkl"
+    broken.write_bytes(b"")
+    calls = []
+
+    def loader(p):
+        calls.append(p)
+        with open(p, "rb") as f:
+            return pickle.load(f)
+
+    registry = ModelRegistry()
+    registry.register("missing", str(tmp_path / "nope.pkl"))
+    registry.register("broken", str(broken), loader=loader)
+    assert registry.get("missing") is None
+    assert registry.get("broken") is None
+    assert registry.get("broken") is None
+    assert len(calls) == 1  # a bad file is not re-read until it changes
+    assert "could not be loaded" in capsys.readouterr().out
+
+    stats = {row["model"]: row for row in registry.stats()}
+    assert not stats["missing"]["loaded"] and stats["missing"]["loads"] == 0
+    assert not stats["broken"]["loaded"] and stats["broken"]["error"]
+
+
+def test_backends_import_without_loading_models():
+    import backend.analysis.dns_log_parser  # noqa: F401
+    import backend.analysis.bandwidth_analyser  # noqa: F401
+    from ai_models.permission_model.predictor import PermissionRiskPredictor
+    from ai_models.registry import MODELS
+
+    MODELS.invalidate()
+    PermissionRiskPredictor()
+    assert not any(row["loads"] for row in MODELS.stats())
@@ -0,0 +1,43 @@
+# tests/test_network.py
+
+import socket
+
+from backend.utils.network import LocalNetworkClassifier
+
+
+def test_private_ranges_are_local():
+    classifier = LocalNetworkClassifier()
+    for ip in ["10.1.2.3", "172.16.0.1", "172.31.255.255", "192.168.1.5", "100.64.0.1", "169.254.10.1", "fd12::1", "fe80::1"]:
+        assert classifier.is_local(ip), ip
+
+
+def test_public_lookalikes_are_remote():
+    classifier = LocalNetworkClassifier()
+    for ip in ["172.32.0.1", "172.15.255.255", "192.0.2.1", "193.168.1.1", "100.128.0.1", "8.8.8.8", "2001:db8::1"]:
+        assert not classifier.is_local(ip), ip
+
+
+def test_packed_addresses():
+    classifier = LocalNetworkClassifier()
+    assert classifier.is_local(socket.inet_aton("192.168.0.7"))
+    assert not classifier.is_local(socket.inet_pton(socket.AF_INET6, "2a00:1450::1"))
+
+
+def test_device_ips_learned_from_client_flows():
+    carrier_ip = socket.inet_aton("37.120.4.4")
+    server_ip = socket.inet_aton("93.184.216.34")
+    flows = {
+        (carrier_ip, server_ip, 51000, 443, 6): None,
+        (server_ip, carrier_ip, 443, 51000, 6): None,
+    }
+    classifier = LocalNetworkClassifier()
+    learned = classifier.learn_device_ips(flows)
+    assert [str(ip) for ip in learned] == ["37.120.4.4"]
+    assert classifier.is_local("37.120.4.4")
+    assert not classifier.is_local(server_ip)
+
+
+def test_configured_device_ip():
+    classifier = LocalNetworkClassifier(device_ips=["2a02:1234::5"])
+    assert classifier.is_local("2a02:1234::5")
+    assert not classifier.is_local("2a02:1234::6")
@@ -0,0 +1,162 @@
+# tests/test_pcap_reader.py
+
+import io
+import socket
+import struct
+from datetime import datetime
+
+from scapy.all import IP, TCP, UDP, Dot1Q, Ether, IPv6, IPv6ExtHdrHopByHop, CookedLinux, wrpcap
+
+from backend.analysis import bandwidth_analyser
+from backend.utils import pcap_reader
+from backend.utils.pcap_reader import IPPROTO_TCP, IPPROTO_UDP, decode_ip
+
+
+def test_decode_ethernet_vlan_ipv4_tcp():
+    frame = bytes(Ether() / Dot1Q(vlan=5) / IP(src="10.0.0.2", dst="8.8.8.8") / TCP(sport=1234, dport=443))
+    version, proto, src, dst, sport, dport = decode_ip(pcap_reader.LINKTYPE_ETHERNET, frame)
+    assert (version, proto, sport, dport) == (4, IPPROTO_TCP, 1234, 443)
+    assert socket.inet_ntoa(src) == "10.0.0.2"
+    assert socket.inet_ntoa(dst) == "8.8.8.8"
+
+
+def test_decode_sll_ipv6_with_extension_header():
+    frame = bytes(CookedLinux(proto=0x86DD) / IPv6(src="fd00::1", dst="2001:db8::1") / IPv6ExtHdrHopByHop() / UDP(sport=5353, dport=53))
+    version, proto, src, _, sport, dport = decode_ip(pcap_reader.LINKTYPE_LINUX_SLL, frame)
+    assert (version, proto, sport, dport) == (6, IPPROTO_UDP, 5353, 53)
+    assert socket.inet_ntop(socket.AF_INET6, src) == "fd00::1"
+
+
+def test_decode_non_first_fragment_has_no_transport():
+    frame = bytes(Ether() / IP(src="10.0.0.2", dst="8.8.8.8", frag=100, proto=6) / (b"z" * 40))
+    assert decode_ip(pcap_reader.LINKTYPE_ETHERNET, frame)[1] is None
+
+
+def test_decode_truncated_frame():
+    assert decode_ip(pcap_reader.LINKTYPE_ETHERNET, b"\x00" * 10) is None
+
+
+def test_read_header_rejects_other_formats():
+    try:
+        pcap_reader.read_pcap_header(io.BytesIO(b"\x0a\x0d\x0d\x0a" + b"\x00" * 20))
+    except pcap_reader.PcapFormatError:
+        return
+    raise AssertionError("pcapng magic should not parse as libpcap")
+
+
+def test_iter_records_stops_on_truncated_record():
+    header = struct.pack("<IHHiIII", 0xA1B2C3D4, 2, 4, 0, 0, 65535, 1)
+    record = struct.pack("<IIII", 1, 2, 10, 10) + b"a" * 10
+    partial = struct.pack("<IIII", 3, 4, 10, 10) + b"b" * 4
+    f = io.BytesIO(header + record + partial)
+    byte_order, _, linktype = pcap_reader.read_pcap_header(f)
+    assert linktype == 1
+    assert list(pcap_reader.iter_pcap_records(f, byte_order)) == [(1, 2, b"a" * 10)]
+
+
+def test_fast_path_matches_scapy(tmp_path):
+    base_time = datetime(2025, 7, 13, 16, 58, 30).timestamp()
+    packets = []
+    for i in range(300):
+        src = ["192.168.1.5", "172.16.0.9", "10.1.1.1", "8.8.8.8"][i % 4]
+        l4 = TCP(sport=40000 + i, dport=443) if i % 3 else UDP(sport=5000, dport=53)
+        pkt = Ether() / IP(src=src, dst="93.184.216.34") / l4 / (b"p" * (i % 700))
+        pkt.time = base_time + i * 0.7
+        packets.append(pkt)
+    pcap_path = str(tmp_path / "mixed.pcap")
+    wrpcap(pcap_path, packets)
+
+    assert bandwidth_analyser._aggregate_raw_pcap(pcap_path) == bandwidth_analyser._aggregate_scapy(pcap_path)
+
+
+def test_unsupported_link_type_falls_back_to_scapy(tmp_path, monkeypatch):
+    pkt = Ether() / IP(src="192.168.1.5", dst="1.1.1.1") / TCP()
+    pkt.time = datetime(2025, 7, 13, 10, 0).timestamp()
+    pcap_path = str(tmp_path / "one.pcap")
+    wrpcap(pcap_path, [pkt])
+
+    monkeypatch.setattr(bandwidth_analyser, "can_decode", lambda linktype: False)
+    df = bandwidth_analyser.extract_upload_data(pcap_path)
+    assert df["Upload_Bytes"].tolist() == [len(pkt)]
+
+
+def test_sharded_run_matches_single_pass(tmp_path, monkeypatch):
+    base_time = datetime(2025, 7, 13, 8, 0).timestamp()
+    packets = []
+    for i in range(2000):
+        pkt = Ether() / IP(src="192.168.1.5", dst="93.184.216.34") / TCP(sport=40000, dport=443) / (b"s" * (i % 900))
+        pkt.time = base_time + i * 0.5
+        packets.append(pkt)
+    pcap_path = str(tmp_path / "large.pcap")
+    wrpcap(pcap_path, packets)
+
+    with open(pcap_path, "rb") as f:
+        byte_order, _, _ = pcap_reader.read_pcap_header(f)
+        shards = pcap_reader.build_shard_index(f, byte_order, 64 * 1024)
+    assert len(shards) > 4
+    assert shards[0][0] == 24
+    assert all(a[0] + a[1] == b[0] for a, b in zip(shards, shards[1:]))
+
+    monkeypatch.setattr(bandwidth_analyser, "SHARD_BYTES", 64 * 1024)
+    sharded_runs = []
+    aggregate_sharded = bandwidth_analyser._aggregate_sharded
+
+    def spy(*args):
+        sharded_runs.append(args)
+        return aggregate_sharded(*args)
+
+    monkeypatch.setattr(bandwidth_analyser, "_aggregate_sharded", spy)
+    single_upload, single_flows = bandwidth_analyser.analyze_capture(pcap_path, workers=1, use_cache=False)
+    sharded_upload, sharded_flows = bandwidth_analyser.analyze_capture(pcap_path, workers=4, use_cache=False)
+    assert len(sharded_runs) == 1
+    assert single_upload.reset_index(drop=True).equals(sharded_upload.reset_index(drop=True))
+    assert single_flows.equals(sharded_flows)
+
+
+def test_pcapng_and_compressed_captures_match_pcap(capture_variants, monkeypatch):
+    base_time = datetime(2025, 7, 13, 9, 0, 0, 250000).timestamp()
+    packets = []
+    for i in range(200):
+        pkt = Ether() / IP(src="192.168.1.5", dst="93.184.216.34") / TCP(sport=40000 + i % 7, dport=443) / (b"c" * (i % 300))
+        pkt.time = base_time + i * 0.37
+        packets.append(pkt)
+    paths = capture_variants(packets)
+
+    def fail_scapy(*args, **kwargs):
+        raise AssertionError("pcapng and compressed captures should use the fast path")
+
+    monkeypatch.setattr(bandwidth_analyser, "_aggregate_scapy", fail_scapy)
+    results = [bandwidth_analyser._aggregate_raw_pcap(path) for path in paths]
+    assert all(aggregates == results[0][0] for aggregates, _ in results)
+    # Evidence hashes are of the file as stored, not the decompressed stream
+    assert len({hashes["sha256"] for _, hashes in results}) == 4
+
+    upload_df = bandwidth_analyser.extract_upload_data(paths[2], bucket="1m")
+    assert upload_df["Upload_Bytes"].sum() == sum(len(p) for p in packets)
+
+
+def test_pcapng_timestamp_resolution_and_interfaces():
+    def block(block_type, body):
+        length = 12 + len(body)
+        return struct.pack("<II", block_type, length) + body + struct.pack("<I", length)
+
+    shb = block(0x0A0D0D0A, struct.pack("<IHHq", 0x1A2B3C4D, 1, 0, -1))
+    # Interface 0: Ethernet, microseconds. Interface 1: raw IP, nanoseconds (if_tsresol=9)
+    idb_eth = block(1, struct.pack("<HHI", 1, 0, 65535))
+    idb_raw = block(1, struct.pack("<HHI", 101, 0, 65535) + struct.pack("<HHB3x", 9, 1, 9) + struct.pack("<HH", 0, 0))
+
+    def epb(interface, ticks, data):
+        body = struct.pack("<IIIII", interface, ticks >> 32, ticks & 0xFFFFFFFF, len(data), len(data))
+        return block(6, body + data + b"\x00" * (-len(data) % 4))
+
+    stream = io.BufferedReader(io.BytesIO(
+        shb + idb_eth + idb_raw
+        + epb(0, 1_700_000_000_500_000, b"eth")
+        + epb(1, 1_700_000_001_250_000_000, b"rawip")
+        + block(5, b"stats")
+    ))
+    assert pcap_reader.is_pcapng(stream)
+    packets = list(pcap_reader.iter_pcapng_packets(stream))
+    assert [(p[0], p[1], p[3]) for p in packets] == [(1, 1_700_000_000, b"eth"), (101, 1_700_000_001, b"rawip")]
+    assert packets[0][2] == 1_700_000_000.5
+    assert packets[1][2] == 1_700_000_001.25
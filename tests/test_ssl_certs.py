@@ -0,0 +1,150 @@
+# tests/test_ssl_certs.py
+
+import socket
+import ssl
+import threading
+import time
+
+import pytest
+from OpenSSL import crypto
+from scapy.all import IP, TCP, Ether
+from scapy.layers.tls.extensions import ServerName, TLS_Ext_ServerName
+from scapy.layers.tls.handshake import TLSClientHello
+from scapy.layers.tls.record import TLS
+
+from backend.analysis import ssl_certificate_inspector
+
+
+def client_hello(server_name, cipher_count=2):
+    extensions = [TLS_Ext_ServerName(servernames=[ServerName(servername=server_name.encode())])]
+    return bytes(TLS(msg=[TLSClientHello(ciphers=[0x1301] * cipher_count, ext=extensions)]))
+
+
+def tcp(payload, sport, seq, dst="142.250.0.1", dport=443):
+    return Ether() / IP(src="192.168.1.5", dst=dst) / TCP(sport=sport, dport=dport, seq=seq, flags="PA") / payload
+
+
+def sample_packets():
+    # Large enough to span two segments, like hellos carrying post-quantum key shares
+    split_hello = client_hello("split.example.org", cipher_count=1000)
+    assert len(split_hello) > 1500
+    return [
+        tcp(client_hello("mail.google.com"), 40001, 1000),
+        tcp(b"GET / HTTP/1.1\r\nHost: plain.example.net:8080\r\nAccept: */*\r\n\r\n", 40002, 5000, dport=80),
+        tcp(split_hello[:1400], 40003, 9000),
+        tcp(b"unrelated", 40004, 1),
+        tcp(split_hello[1400:], 40003, 10400),
+        tcp(b"\x17\x03\x03\x00\x05hello", 40001, 2000),
+    ]
+
+
+def test_extract_domains_from_pcap_natively(capture_variants, monkeypatch):
+    def fail_tshark(*args, **kwargs):
+        raise AssertionError("tshark must not be needed for decodable captures")
+
+    monkeypatch.setattr(ssl_certificate_inspector.subprocess, "Popen", fail_tshark)
+    expected = ["mail.google.com", "plain.example.net", "split.example.org"]
+    for path in capture_variants(sample_packets()):
+        assert sorted(ssl_certificate_inspector.extract_domains_from_pcap(path)) == expected
+
+
+def test_http_host_and_sni_helpers():
+    assert ssl_certificate_inspector._tls_server_name(client_hello("a.example.com")) == "a.example.com"
+    assert ssl_certificate_inspector._tls_server_name(b"\x16\x03\x01\x00") is None
+    assert ssl_certificate_inspector._http_host(b"POST /x HTTP/1.1\r\nhost: b.example.com\r\n\r\n") == "b.example.com"
+    assert ssl_certificate_inspector._http_host(b"HTTP/1.1 200 OK\r\nHost: c.example.com\r\n\r\n") is None
+
+
+def test_missing_capture_returns_no_domains(tmp_path):
+    assert ssl_certificate_inspector.extract_domains_from_pcap(str(tmp_path / "none.pcap")) == []
+
+
+def make_cert(common_name, days, issuer=None):
+    """(cert, key) valid for days, signed by issuer's (cert, key) or self-signed."""
+    key = crypto.PKey()
+    key.generate_key(crypto.TYPE_RSA, 2048)
+    cert = crypto.X509()
+    cert.get_subject().CN = common_name
+    cert.set_serial_number(int(time.time() * 1000))
+    cert.gmtime_adj_notBefore(0)
+    cert.gmtime_adj_notAfter(days * 86400)
+    cert.set_pubkey(key)
+    issuer_cert, issuer_key = issuer or (cert, key)
+    cert.set_issuer(issuer_cert.get_subject())
+    cert.sign(issuer_key, "sha256")
+    return cert, key
+
+
+@pytest.fixture
+def tls_server(tmp_path):
+    """Start local TLS servers presenting a given certificate; yields a factory returning (host, port)."""
+    listeners = []
+
+    def start(cert, key):
+        cert_path, key_path = tmp_path / f"cert{len(listeners)}.pem", tmp_path / f"key{len(listeners)}.pem"
+        cert_path.write_bytes(crypto.dump_certificate(crypto.FILETYPE_PEM, cert))
+        key_path.write_bytes(crypto.dump_privatekey(crypto.FILETYPE_PEM, key))
+        ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        ctx.load_cert_chain(cert_path, key_path)
+        listener = socket.create_server(("127.0.0.1", 0))
+        listeners.append(listener)
+
+        def serve():
+            while True:
+                try:
+                    conn, _ = listener.accept()
+                except OSError:
+                    return
+                try:
+                    with ctx.wrap_socket(conn, server_side=True) as tls:
+                        tls.recv(1)
+                except (OSError, ssl.SSLError):
+                    pass
+
+        threading.Thread(target=serve, daemon=True).start()
+        return listener.getsockname()
+
+    yield start
+    for listener in listeners:
+        listener.close()
+
+
+@pytest.fixture
+def silent_server():
+    """A port that accepts TCP connections (via the backlog) but never answers a handshake."""
+    listener = socket.create_server(("127.0.0.1", 0), backlog=16)
+    yield listener.getsockname()
+    listener.close()
+
+
+def test_concurrent_inspection_of_local_servers(tls_server, silent_server):
+    ca = make_cert("Shady Root CA", 3650)
+    addresses = {
+        "short.example.net": tls_server(*make_cert("short.example.net", 7)),
+        "mail.google.com": tls_server(*make_cert("mail.google.com", 365, issuer=ca)),
+        "stalled.example.org": silent_server,
+    }
+    results = list(ssl_certificate_inspector.iter_certificates(
+        list(addresses), addresses, host_timeout=1, budget=10
+    ))
+    # answered hosts stream back before the one that times out
+    assert results[-1]["Domain"] == "stalled.example.org"
+    assert "Error" in results[-1]
+
+    certs = {info["Domain"]: info for info in results}
+    short = certs["short.example.net"]
+    assert (short["Self-Signed"], short["Suspicious"]) == ("Yes", ssl_certificate_inspector.SHORT_EXPIRY_LABEL)
+    forged = certs["mail.google.com"]
+    assert (forged["Issuer"], forged["Self-Signed"]) == ("Shady Root CA", "No")
+    assert forged["Suspicious"] == ssl_certificate_inspector.FORGED_CN_LABEL
+
+
+def test_overall_budget_bounds_inspection(silent_server):
+    domains = [f"slow{i}.example.com" for i in range(6)]
+    started = time.monotonic()
+    results = list(ssl_certificate_inspector.iter_certificates(
+        domains, dict.fromkeys(domains, silent_server), host_timeout=30, budget=0.5, workers=2
+    ))
+    assert time.monotonic() - started < 2
+    assert sorted(info["Domain"] for info in results) == domains
+    assert all(info["Error"] == ssl_certificate_inspector.BUDGET_EXHAUSTED for info in results)
@@ -0,0 +1,219 @@
+# tests/test_threat_intel.py
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from ai_models.email_model import predictor
+from backend.analysis import dns_log_parser
+from backend.utils import threat_intel
+from backend.utils.domain_rules import DomainMatcher, DomainRule
+from backend.utils.threat_intel import RateLimiter, ThreatIntelCache, ThreatIntelClient
+
+
+class MockVirusTotal(BaseHTTPRequestHandler):
+    """Answers /api/v3/domains/<domain> from the server's `verdicts` dict."""
+
+    def do_GET(self):
+        server = self.server
+        domain = self.path.rsplit("/", 1)[-1]
+        with server.lock:
+            server.requests.append(domain)
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        time.sleep(server.delay)
+        with server.lock:
+            server.in_flight -= 1
+        if self.headers.get("x-apikey") != "test-key":
+            self.send_response(401)
+            self.end_headers()
+            return
+        stats = server.verdicts.get(domain)
+        if stats is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = json.dumps({"data": {"attributes": {"last_analysis_stats": stats}}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def vt_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockVirusTotal)
+    server.verdicts = {
+        "evil.example": {"malicious": 5, "suspicious": 0},
+        "iffy.example": {"malicious": 0, "suspicious": 2},
+        "fine.example": {"malicious": 0, "suspicious": 0},
+    }
+    server.requests = []
+    server.lock = threading.Lock()
+    server.delay = 0.0
+    server.in_flight = server.max_in_flight = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/api/v3"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_client(vt_server, tmp_path, **kwargs):
+    kwargs.setdefault("rate_limiter", RateLimiter(rate=1000, period=1))
+    return ThreatIntelClient(
+        api_key="test-key", base_url=vt_server.url, cache=ThreatIntelCache(str(tmp_path / "vt.sqlite3")),
+        blocklist=DomainMatcher([DomainRule("blocklist", "suffix", "blocked.example", "High", "Blocklist")]),
+        **kwargs,
+    )
+
+
+def test_bulk_lookup_dedupes_and_persists(vt_server, tmp_path):
+    client = make_client(vt_server, tmp_path)
+    statuses = client.lookup_many(
+        ["evil.example", "iffy.example", "fine.example", "new.example", "evil.example", "cdn.blocked.example"]
+    )
+    assert statuses == {
+        "evil.example": "VT_Malicious",
+        "iffy.example": "VT_Suspicious",
+        "fine.example": "VT_Clean",
+        "new.example": "VT_Unknown",
+        "cdn.blocked.example": "Blocklisted",
+    }
+    assert sorted(vt_server.requests) == ["evil.example", "fine.example", "iffy.example", "new.example"]
+
+    # A new client over the same database answers without the network
+    vt_server.requests.clear()
+    again = make_client(vt_server, tmp_path)
+    assert again.lookup("evil.example") == "VT_Malicious"
+    assert again.lookup_many(["iffy.example", "new.example"]) == {
+        "iffy.example": "VT_Suspicious", "new.example": "VT_Unknown"
+    }
+    assert vt_server.requests == []
+
+
+def test_expired_entries_are_refetched_online_but_served_offline(vt_server, tmp_path):
+    cache = ThreatIntelCache(str(tmp_path / "vt.sqlite3"), ttl=-1)
+    cache.put("evil.example", "VT_Clean")
+    client = make_client(vt_server, tmp_path)
+    client.cache = cache
+    assert client.lookup("evil.example") == "VT_Malicious"
+    assert vt_server.requests == ["evil.example"]
+
+    cache.put("fine.example", "VT_Suspicious")
+    offline = make_client(vt_server, tmp_path, offline=True)
+    offline.cache = cache
+    assert offline.lookup("fine.example") == "VT_Suspicious"
+    assert offline.lookup_many(["fine.example", "other.example", "x.blocked.example"]) == {
+        "fine.example": "VT_Suspicious", "other.example": "VT_Offline", "x.blocked.example": "Blocklisted"
+    }
+    assert vt_server.requests == ["evil.example"]
+
+
+def test_concurrency_is_bounded_and_deadline_cancels(vt_server, tmp_path):
+    vt_server.delay = 0.05
+    client = make_client(vt_server, tmp_path, max_concurrency=3)
+    domains = [f"host{i}.example" for i in range(12)]
+    assert set(client.lookup_many(domains).values()) == {"VT_Unknown"}
+    assert vt_server.max_in_flight <= 3
+    assert len(vt_server.requests) == 12
+
+    slow = make_client(vt_server, tmp_path, rate_limiter=RateLimiter(rate=1, period=60))
+    start = time.monotonic()
+    statuses = slow.lookup_many(["a.example", "b.example", "c.example"], timeout=0.5)
+    assert time.monotonic() - start < 5
+    assert set(statuses.values()) == {"VT_Unknown"}
+    assert len(vt_server.requests) == 13  # one token, one request; the others ran out of time
+
+
+def test_concurrent_callers_share_in_flight_requests(vt_server, tmp_path):
+    vt_server.delay = 0.2
+    client = make_client(vt_server, tmp_path)
+    results = []
+
+    def bulk():
+        results.append(client.lookup_many(["evil.example", "fine.example"]))
+
+    def single():
+        results.append({"evil.example": client.lookup("evil.example")})
+
+    threads = [threading.Thread(target=target) for target in (bulk, bulk, single, single)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(vt_server.requests) == ["evil.example", "fine.example"]
+    assert all(statuses["evil.example"] == "VT_Malicious" for statuses in results)
+    assert client._in_flight == {}
+
+
+def test_rate_limiter_paces_after_burst():
+    now = [0.0]
+    limiter = RateLimiter(rate=4, period=60, clock=lambda: now[0])
+    assert [limiter.reserve() for _ in range(4)] == [0.0] * 4
+    assert limiter.reserve() == pytest.approx(15.0)
+    now[0] = 30.0
+    assert limiter.reserve() == pytest.approx(0.0)
+
+
+def test_no_api_key_means_offline(tmp_path):
+    client = ThreatIntelClient(api_key=None, cache=ThreatIntelCache(":memory:"), blocklist=DomainMatcher())
+    assert client.offline
+    assert client.lookup("evil.example") == "VT_Offline"
+
+
+def test_shipped_blocklist_answers_offline():
+    client = ThreatIntelClient(api_key=None, cache=ThreatIntelCache(":memory:"))
+    assert client.lookup("malware.wicar.org") == "Blocklisted"
+    assert client.lookup("example.com") == "VT_Offline"
+
+
+def test_dns_heuristics_only_flag_threat_statuses(tmp_path, offline_threat_intel):
+    offline_threat_intel.cache.put_many({"evil.example": "VT_Malicious", "fine.example": "VT_Clean"})
+    assert dns_log_parser.classify_risk("evil.example") == ("High", "Threat Intel Match")
+    # Any status string used to count as a match
+    assert dns_log_parser.classify_risk("fine.example") == ("Low", "Normal")
+    assert dns_log_parser.classify_risk("never-seen.example") == ("Low", "Normal")
+
+    chunk = dns_log_parser.score_dns_chunk(
+        [dns_log_parser.datetime(2025, 7, 13, 10)] * 3, ["evil.example", "fine.example", "evil.xyz"]
+    )
+    assert chunk["Reason"].tolist() == ["Threat Intel Match", "Normal", "Suspicious TLD"]
+
+
+def test_email_score_uses_shared_client(offline_threat_intel):
+    offline_threat_intel.cache.put("sender.example", "VT_Malicious")
+    features = {"spf": "pass", "dkim": "pass", "dmarc": "pass", "domain": "sender.example"}
+    result = predictor.score_email(features)
+    assert result["reasons"] == ["VirusTotal: Malicious"]
+    assert threat_intel.get_client() is offline_threat_intel
+
+
+def test_multi_file_lookups_stay_in_parent(vt_server, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(threat_intel, "_client", make_client(vt_server, tmp_path))
+    log_dir = tmp_path / "dump"
+    log_dir.mkdir()
+    for n, domains in enumerate([["evil.example", "fine.example"], ["evil.example", "nobody.example"], ["fine.example"]]):
+        (log_dir / f"dns_{n}.log").write_text("".join(
+            f"2025-07-13 1{n}:00:0{i} dnsmasq[812]: query {domain}\n" for i, domain in enumerate(domains)
+        ))
+
+    parallel, _, _, _ = dns_log_parser.analyze_dns_logs(str(log_dir), case_id="case-1", workers=3)
+    # each domain asked once, by the parent, whatever worker saw it
+    assert sorted(vt_server.requests) == ["evil.example", "fine.example", "nobody.example"]
+    assert parallel.set_index("Domain").loc["evil.example", "Reason"].tolist() == ["Threat Intel Match"] * 2
+    cache = dns_log_parser.get_domain_cache("case-1")
+    assert cache.get("evil.example")[:2] == ("High", "Threat Intel Match")
+    assert cache.get("fine.example")[:2] == ("Low", "Normal")
+
+    sequential, _, _, _ = dns_log_parser.analyze_dns_logs(str(log_dir), case_id="case-2", workers=1)
+    assert parallel.equals(sequential)